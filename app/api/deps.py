@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -6,6 +7,7 @@ from app.core.auth import get_current_user, is_admin
 from app.models.user import User
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 def get_current_active_user(
@@ -22,6 +24,16 @@ def get_current_active_user(
     return user
 
 
+def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: Session = Depends(get_db)
+) -> Optional[User]:
+    """Current user on public endpoints; None without (valid) credentials"""
+    if not credentials:
+        return None
+    return get_current_user(db, credentials.credentials)
+
+
 def get_current_admin_user(
     current_user: User = Depends(get_current_active_user)
 ) -> User:
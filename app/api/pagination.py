@@ -0,0 +1,101 @@
+import base64
+from fastapi import HTTPException, Response, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from uuid import UUID
+from app.crud import product as product_crud
+from app.models.product import Product
+from app.models.user import User
+from app.schemas.product import ProductDetailResponse, ProductListResponse
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# Ids looked at per call, in pages: bounds the work of a call whatever the list length
+SCAN_PAGES = 10
+
+
+def encode_cursor(remaining: int, last_id: UUID) -> str:
+    return base64.urlsafe_b64encode(f"{remaining}:{last_id}".encode()).decode().rstrip("=")
+
+
+def _upcoming(ids: List[UUID], remaining: int, count: int, newest_first: bool) -> List[UUID]:
+    """The next ``count`` ids in serving order when ``remaining`` are left to serve"""
+    if newest_first:
+        return ids[max(remaining - count, 0):remaining][::-1]
+    return ids[len(ids) - remaining:len(ids) - remaining + count]
+
+
+def resolve_cursor(cursor: Optional[str], ids: List[UUID], newest_first: bool, scan: int) -> int:
+    """
+    How many ids are left to serve. The cursor counts them from the far end
+    of the stored array (its start when serving newest first), which items
+    added at the near end don't move. Removing an item not yet served moves
+    the count past some served items; if the last served id is found among
+    the next ``scan`` ids the count is corrected, otherwise those items are
+    served again. Items are never skipped, as long as the list only grows
+    at the near end (likes, bookmarks; feeds are replaced wholesale).
+    """
+    if not cursor:
+        return len(ids)
+    try:
+        remaining, last_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":", 1)
+        remaining, last_id = int(remaining), UUID(last_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    remaining = max(min(remaining, len(ids)), 0)
+    upcoming = _upcoming(ids, remaining, scan, newest_first)
+    if last_id in upcoming:
+        remaining -= upcoming.index(last_id) + 1
+    return remaining
+
+
+def product_list_items(products: List[Product], user: Optional[User] = None) -> List[ProductListResponse]:
+    """List items; for a user also whether they liked/bookmarked each, from the id arrays on their row"""
+    liked = set(user.liked_products or []) if user else None
+    bookmarked = set(user.bookmarked_products or []) if user else None
+    return [
+        ProductListResponse(
+            id=product.id,
+            name=product.name,
+            price=product.price,
+            images=product.images,
+            gender=product.gender,
+            is_liked=product.id in liked if user else None,
+            is_bookmarked=product.id in bookmarked if user else None
+        )
+        for product in products
+    ]
+
+
+def product_detail_item(product: Product, user: Optional[User] = None) -> ProductDetailResponse:
+    detail = ProductDetailResponse.model_validate(product)
+    if user:
+        detail.is_liked = product.id in (user.liked_products or [])
+        detail.is_bookmarked = product.id in (user.bookmarked_products or [])
+    return detail
+
+
+def product_list_page(
+        db: Session,
+        ids: List[UUID],
+        cursor: Optional[str],
+        limit: int,
+        response: Response,
+        user: Optional[User] = None,
+        newest_first: bool = False
+) -> List[ProductListResponse]:
+    """
+    One page of the active products in a stored id array, from its end when
+    ``newest_first``. At most SCAN_PAGES pages of ids are looked at, so a run
+    of inactive products can make a page short or even empty; the next
+    cursor goes in X-Next-Cursor, and clients keep paging until it's absent.
+    """
+    scan = limit * SCAN_PAGES
+    remaining = resolve_cursor(cursor, ids, newest_first, scan)
+    window = _upcoming(ids, remaining, scan, newest_first)
+    products, next_position = product_crud.get_active_products_page(db, window, limit=limit, max_scan=scan)
+    scanned = len(window) if next_position is None else next_position
+    if remaining > scanned:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(remaining - scanned, window[scanned - 1])
+    return product_list_items(products, user)
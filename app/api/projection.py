@@ -0,0 +1,89 @@
+"""
+Sparse product payloads: ``fields=`` (comma-separated) or ``view=`` on the
+product endpoints.
+
+The selected fields decide both the columns loaded (the ``columns`` argument
+of the product CRUD reads) and the keys serialized. Without either parameter
+an endpoint returns its usual response model.
+"""
+
+from fastapi import HTTPException, status
+from typing import List, Optional, Tuple
+from app.models.product import Product
+from app.models.user import User
+from app.schemas.product import ProductFields
+
+# Field -> Product columns it reads
+PRODUCT_FIELDS = {
+    "id": ("id",),
+    "name": ("name",),
+    "description": ("description",),
+    "category_id": ("category_id",),
+    "gender": ("gender",),
+    "price": ("price",),
+    "sizes": ("sizes",),
+    "images": ("images",),
+    "image": ("images",),
+    "colors": ("colors",),
+    "tags": ("tags",),
+    "click_count": ("click_count",),
+    "like_count": ("like_count",),
+    "bookmark_count": ("bookmark_count",),
+    "is_active": ("is_active",),
+    "created_at": ("created_at",),
+    "updated_at": ("updated_at",),
+    "is_liked": (),
+    "is_bookmarked": (),
+}
+
+VIEWS = {
+    # Product cards in lists and grids
+    "card": ("id", "name", "price", "image", "gender", "is_liked", "is_bookmarked"),
+    # The product screen
+    "detail": ("id", "name", "description", "category_id", "gender", "price", "sizes", "images", "colors", "tags",
+               "is_liked", "is_bookmarked"),
+    "full": tuple(PRODUCT_FIELDS),
+}
+VIEW_PATTERN = f"^({'|'.join(VIEWS)})$"
+
+
+def selected_fields(fields: Optional[str], view: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """The fields asked for (``fields`` wins over ``view``); None means the endpoint's default payload"""
+    names = tuple(dict.fromkeys(name.strip() for name in (fields or "").split(",") if name.strip()))
+    if names:
+        unknown = [name for name in names if name not in PRODUCT_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        return names
+    return VIEWS[view] if view else None
+
+
+def product_columns(names: Optional[Tuple[str, ...]], *extra: str) -> Optional[list]:
+    """Columns to load for the fields, plus ``extra`` ones the endpoint reads itself"""
+    if names is None:
+        return None
+    keys = dict.fromkeys(["id", *(key for name in names for key in PRODUCT_FIELDS[name]), *extra])
+    return [getattr(Product, key) for key in keys]
+
+
+def project_products(products: List[Product], names: Tuple[str, ...], user: Optional[User] = None) -> List[dict]:
+    """JSON-ready dicts holding only the selected fields"""
+    liked = set(user.liked_products or []) if user else None
+    bookmarked = set(user.bookmarked_products or []) if user else None
+    projected = []
+    for product in products:
+        values = {}
+        for name in names:
+            if name == "image":
+                values[name] = product.images[0] if product.images else None
+            elif name == "is_liked":
+                values[name] = product.id in liked if user else None
+            elif name == "is_bookmarked":
+                values[name] = product.id in bookmarked if user else None
+            else:
+                values[name] = getattr(product, name)
+        projected.append(ProductFields(**values).model_dump(mode="json", exclude_unset=True))
+    return projected
@@ -1,16 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timezone
 from uuid import UUID
 from app.database import get_db
 from app.api.deps import get_current_admin_user
 from app.schemas.product import ProductCreate, ProductUpdate, ProductAdminResponse
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
-from app.crud import product as product_crud, category as category_crud
+from app.crud import product as product_crud, category as category_crud, analytics as analytics_crud
+from app.config import settings
+from app.core.leader import get_worker_id
+from app.core.scheduler import host_scheduler, scheduler
+from app.core import index
+from app.core.count_cache import product_counts
+from app.core.search_cache import search_cache
+from app.models.product import GenderEnum
 from app.models.user import User
+from app.utils.text import fold
 
 router = APIRouter()
 
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
 
 # Product Management
 @router.post("/products", response_model=ProductAdminResponse)
@@ -29,6 +40,7 @@ def create_product(
         )
 
     db_product = product_crud.create_product(db, product)
+    index.product_saved(db_product)
     response = ProductAdminResponse.from_orm(db_product)
     response.category_name = category.name
     return response
@@ -36,21 +48,33 @@ def create_product(
 
 @router.get("/products", response_model=List[ProductAdminResponse])
 def get_all_products(
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=200),
+        sort: str = Query(
+            "-created_at", pattern=f"^-?({'|'.join(product_crud.ADMIN_SORTS)})$",
+            description="Sort key, descending with a - prefix"
+        ),
+        is_active: Optional[bool] = None,
+        category_id: Optional[UUID] = None,
+        gender: Optional[GenderEnum] = None,
+        search: Optional[str] = None,
         current_user: User = Depends(get_current_admin_user),
         db: Session = Depends(get_db)
 ):
-    """Get all products (including inactive)"""
-    products = product_crud.get_products(db, include_inactive=True, limit=1000)
-
-    # Get category names
-    category_ids = list(set(product.category_id for product in products))
-    categories = {cat.id: cat.name for cat in category_crud.get_categories(db)}
+    """Products of any status, one page at a time; the total matching the filters is in X-Total-Count"""
+    filters = dict(is_active=is_active, category_id=category_id, gender=gender, search=search)
+    rows = product_crud.get_admin_products(db, skip=skip, limit=limit, sort=sort, **filters)
+    total = product_counts.get(
+        (is_active, category_id, gender, fold(search or "")), lambda: product_crud.count_products(db, **filters)
+    )
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
 
     result = []
-    for product in products:
-        response = ProductAdminResponse.from_orm(product)
-        response.category_name = categories.get(product.category_id)
-        result.append(response)
+    for product, category_name in rows:
+        item = ProductAdminResponse.from_orm(product)
+        item.category_name = category_name
+        result.append(item)
 
     return result
 
@@ -99,6 +123,7 @@ def update_product(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
+    index.product_saved(updated_product)
 
     # Get category name
     category = category_crud.get_category_by_id(db, updated_product.category_id)
@@ -122,6 +147,7 @@ def delete_product(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
+    index.product_deleted(product_id)
     return {"message": "Product deleted successfully"}
 
 
@@ -141,7 +167,9 @@ def create_category(
             detail="Category already exists"
         )
 
-    return category_crud.create_category(db, category)
+    db_category = category_crud.create_category(db, category)
+    index.category_saved(db_category)
+    return db_category
 
 
 @router.put("/categories/{category_id}", response_model=CategoryResponse)
@@ -167,6 +195,7 @@ def update_category(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Category not found"
         )
+    index.category_saved(updated_category)
 
     return updated_category
 
@@ -184,38 +213,76 @@ def delete_category(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Category not found"
         )
+    index.category_deleted(category_id)
     return {"message": "Category deleted successfully"}
 
 
 # Analytics
 @router.get("/analytics")
 def get_analytics(
+        fresh: bool = Query(False, description="Compute live instead of using the latest snapshot"),
         current_user: User = Depends(get_current_admin_user),
         db: Session = Depends(get_db)
 ):
     """Get basic analytics"""
-    from sqlalchemy import func
-    from app.models.user import User
-    from app.models.product import Product
-    from app.models.category import Category
-
-    # Basic counts
-    total_users = db.query(func.count(User.id)).scalar()
-    total_products = db.query(func.count(Product.id)).scalar()
-    active_products = db.query(func.count(Product.id)).filter(Product.is_active == True).scalar()
-    total_categories = db.query(func.count(Category.id)).scalar()
-
-    # Product stats
-    total_clicks = db.query(func.sum(Product.click_count)).scalar() or 0
-    total_likes = db.query(func.sum(Product.like_count)).scalar() or 0
-    total_bookmarks = db.query(func.sum(Product.bookmark_count)).scalar() or 0
-
+    if not fresh:
+        snapshot = analytics_crud.get_latest_snapshot(db)
+        if snapshot and snapshot.created_at:
+            created_at = snapshot.created_at
+            if created_at.tzinfo is None:  # SQLite drops the timezone
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            age = (datetime.now(timezone.utc) - created_at).total_seconds()
+            # Allow one missed refresh before falling back to a live query
+            if age <= settings.analytics_snapshot_interval * 2:
+                return {**snapshot.data, "snapshot_at": snapshot.created_at.isoformat()}
+
+    return {**analytics_crud.compute_analytics(db), "snapshot_at": None}
+
+
+# Search
+@router.get("/search/popular")
+def get_popular_searches(
+        limit: int = Query(20, ge=1, le=100),
+        current_user: User = Depends(get_current_admin_user)
+):
+    """Most searched queries and result cache hit rate of this worker"""
+    return search_cache.report(limit)
+
+
+# Background jobs
+@router.get("/jobs")
+def get_jobs(current_user: User = Depends(get_current_admin_user)):
+    """
+    Per-job run metrics of this worker's schedulers. Jobs only run on the
+    leader; any other worker answers with leader false and no runs, so
+    retry until the leader answers. ``running`` is whether the scheduler is
+    started (false on the leader too with ENABLE_SCHEDULER off). Host jobs
+    run in every worker.
+    """
+    from app import main  # Owns the elector; imported here, main imports this module
+
+    elector = main.leader_elector
     return {
-        "total_users": total_users,
-        "total_products": total_products,
-        "active_products": active_products,
-        "total_categories": total_categories,
-        "total_clicks": total_clicks,
-        "total_likes": total_likes,
-        "total_bookmarks": total_bookmarks
-    }
\ No newline at end of file
+        "worker": get_worker_id(),
+        "leader": elector.is_leader if elector else False,
+        "running": scheduler.running,
+        "jobs": scheduler.metrics(),
+        "host_jobs": host_scheduler.metrics()
+    }
+
+
+@router.post("/jobs/{job_name}/run")
+async def run_job(
+        job_name: str,
+        current_user: User = Depends(get_current_admin_user)
+):
+    """Run a job immediately"""
+    owner = scheduler if job_name in scheduler.jobs else host_scheduler
+    if job_name not in owner.jobs:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    job = await owner.run_job(job_name)
+    return job.metrics()
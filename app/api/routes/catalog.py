@@ -0,0 +1,190 @@
+import base64
+import re
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional, Tuple
+from app.config import settings
+from app.core.snapshot import latest_snapshot
+from app.database import get_read_db
+from app.schemas.catalog import CatalogChangeResponse, CatalogChangesResponse
+from app.crud import catalog as catalog_crud, category as category_crud, product as product_crud
+
+router = APIRouter()
+
+
+# A token is the change log position; whether it is too old is decided by the
+# log (catalog_crud.compacted_through), not by anything the client sends
+def encode_token(position: int) -> str:
+    return base64.urlsafe_b64encode(str(position).encode()).decode().rstrip("=")
+
+
+def decode_token(token: str) -> int:
+    try:
+        # Older tokens carry ":<issued at>", which is ignored
+        return int(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode().split(":", 1)[0])
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token")
+
+
+@router.get("/changes", response_model=CatalogChangesResponse)
+def get_catalog_changes(
+        since: Optional[str] = Query(None, description="Token from the previous response; omit to start from now"),
+        limit: int = Query(100, ge=1, le=1000),
+        db: Session = Depends(get_read_db)
+):
+    """Products and categories changed since the token, each once with its current state"""
+    if since is None:
+        return CatalogChangesResponse(
+            changes=[], token=encode_token(catalog_crud.latest_change_id(db)), has_more=False
+        )
+
+    position = decode_token(since)
+    log = catalog_crud.get_changes(db, position, limit)
+    # Checked after reading the log: a compaction in between then answers 410
+    # rather than slipping through with changes missing
+    if position < catalog_crud.compacted_through(db):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync token expired; reload the catalog"
+        )
+    # Newest change per entity, in log order
+    latest = {}
+    for change in log:
+        latest.pop((change.entity, change.entity_id), None)
+        latest[(change.entity, change.entity_id)] = change.op
+
+    upserted = [entity_id for (entity, entity_id), op in latest.items() if entity == "product" and op == "upsert"]
+    products = {product.id: product for product in product_crud.get_products_by_ids(db, upserted)}
+    categories = {
+        category.id: category for category in category_crud.get_categories(db)
+    } if any(entity == "category" for entity, _ in latest) else {}
+
+    changes = []
+    for (entity, entity_id), op in latest.items():
+        if op == "delete":
+            changes.append(CatalogChangeResponse(entity=entity, id=entity_id, op="delete"))
+        elif entity == "product":
+            product = products.get(entity_id)
+            if product is None:
+                continue  # Deleted after this page; that change follows
+            if not product.is_active:
+                # Deactivated products leave the client's catalog
+                changes.append(CatalogChangeResponse(entity=entity, id=entity_id, op="delete"))
+            else:
+                changes.append(CatalogChangeResponse(entity=entity, id=entity_id, op="upsert", product=product))
+        elif entity_id in categories:
+            changes.append(
+                CatalogChangeResponse(entity=entity, id=entity_id, op="upsert", category=categories[entity_id])
+            )
+
+    return CatalogChangesResponse(
+        changes=changes,
+        # A lagging replica may be behind the client; never move the token back
+        token=encode_token(max(position, log[-1].id) if log else position),
+        has_more=len(log) == limit
+    )
+
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CHUNK = 64 * 1024
+
+
+def _byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(first, last) byte of a single "bytes=" range, None to ignore it; raises 416 if unsatisfiable"""
+    match = _RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None  # Multiple or malformed ranges: send the whole file
+    first, last = match.groups()
+    if not first:  # Suffix: the last N bytes
+        first, last = max(size - int(last), 0), size - 1
+    else:
+        first, last = int(first), min(int(last), size - 1) if last else size - 1
+    if first > last or first >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return first, last
+
+
+def _open_latest_snapshot():
+    """The newest snapshot and its open file, or (None, None); the open file outlives a rebuild's cleanup"""
+    # A rebuild can remove the file between listing and opening; list again
+    for _ in range(3):
+        snapshot = latest_snapshot(settings.catalog_snapshot_dir)
+        if snapshot is None:
+            return None, None
+        try:
+            return snapshot, open(snapshot.path, "rb")
+        except FileNotFoundError:
+            continue
+    return None, None
+
+
+def _read_range(file, first: int, last: int):
+    with file:
+        file.seek(first)
+        remaining = last - first + 1
+        while remaining:
+            chunk = file.read(min(_CHUNK, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+
+@router.get("/snapshot")
+def get_catalog_snapshot(request: Request):
+    """
+    All categories and active products as gzipped NDJSON, one catalog change
+    per line; continue with /catalog/changes from the X-Sync-Token header.
+    Supports ETag revalidation and resuming with Range / If-Range.
+    """
+    snapshot, file = _open_latest_snapshot()
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Catalog snapshot not built yet",
+            headers={"Retry-After": str(int(settings.catalog_snapshot_interval))}
+        )
+
+    headers = {
+        "ETag": snapshot.etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+        "X-Sync-Token": encode_token(snapshot.version)
+    }
+    if request.headers.get("if-none-match") == snapshot.etag:
+        file.close()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # A resume of an older snapshot gets the new one whole
+    if range_header and if_range in (None, snapshot.etag):
+        byte_range = _byte_range(range_header, snapshot.size)
+        if byte_range:
+            first, last = byte_range
+            return StreamingResponse(
+                _read_range(file, first, last),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type="application/gzip",
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {first}-{last}/{snapshot.size}",
+                    "Content-Length": str(last - first + 1)
+                }
+            )
+
+    # Streamed from the file opened above: no database, no buffering
+    return StreamingResponse(
+        _read_range(file, 0, snapshot.size - 1),
+        media_type="application/gzip",
+        headers={
+            **headers,
+            "Content-Disposition": 'attachment; filename="catalog.ndjson.gz"',
+            "Content-Length": str(snapshot.size)
+        }
+    )
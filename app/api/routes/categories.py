@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from typing import List
-from app.database import get_db
+from app.database import get_read_db
 from app.schemas.category import CategoryResponse
 from app.crud import category as category_crud
 
@@ -9,7 +9,7 @@ router = APIRouter()
 
 
 @router.get("", response_model=List[CategoryResponse])
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(db: Session = Depends(get_read_db)):
     """Get all categories"""
     categories = category_crud.get_categories(db)
     return categories
\ No newline at end of file
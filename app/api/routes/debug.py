@@ -0,0 +1,56 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from app.config import settings
+from app.core import profiler
+
+router = APIRouter()
+
+
+@router.get("/queries")
+def get_query_profiles(
+        limit: int = Query(50, ge=1, le=500),
+        suspects_only: bool = False
+):
+    """Recent requests with their SQL totals and N+1 suspects"""
+    result = []
+    for profile in profiler.list_profiles(limit if not suspects_only else len(profiler.recent_profiles)):
+        report = profile.report(settings.query_profiler_repeat_threshold)
+        if suspects_only and not report["n_plus_one_suspects"]:
+            continue
+        report.pop("statements")
+        result.append(report)
+    return result[:limit]
+
+
+@router.get("/queries/summary")
+def get_query_summary():
+    """Routes ranked by how many statements they repeat"""
+    routes = {}
+    for profile in profiler.list_profiles(len(profiler.recent_profiles)):
+        report = profile.report(settings.query_profiler_repeat_threshold)
+        key = f"{report['method']} {report['route']}"
+        summary = routes.setdefault(key, {"route": key, "requests": 0, "queries": 0, "db_time_ms": 0.0, "suspects": {}})
+        summary["requests"] += 1
+        summary["queries"] += report["query_count"]
+        summary["db_time_ms"] += report["db_time_ms"]
+        for suspect in report["n_plus_one_suspects"]:
+            summary["suspects"][suspect["sql"]] = max(summary["suspects"].get(suspect["sql"], 0), suspect["count"])
+
+    result = []
+    for summary in routes.values():
+        summary["avg_queries"] = round(summary["queries"] / summary["requests"], 2)
+        summary["db_time_ms"] = round(summary["db_time_ms"], 3)
+        summary["suspects"] = [{"sql": sql, "max_count": count} for sql, count in summary["suspects"].items()]
+        result.append(summary)
+    return sorted(result, key=lambda s: (len(s["suspects"]), s["avg_queries"]), reverse=True)
+
+
+@router.get("/queries/{profile_id}")
+def get_query_profile(profile_id: str):
+    """Full statement list for one request (id from the X-DB-Profile-Id header)"""
+    profile = profiler.get_profile(profile_id)
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return profile.report(settings.query_profiler_repeat_threshold)
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import time
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
-from app.database import get_db
-from app.api.deps import get_current_active_user
-from app.schemas.product import ProductResponse, ProductListResponse
-from app.crud import product as product_crud, user as user_crud
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.api.deps import get_current_active_user, get_optional_user
+from app.api.pagination import product_detail_item, product_list_items, product_list_page
+from app.api.projection import VIEW_PATTERN, product_columns, project_products, selected_fields
+from app.core.search_cache import search_cache
+from app.core.suggest import suggest_index
+from app.schemas.product import ProductBatchResponse, ProductDetailResponse, ProductListResponse, SuggestionResponse
+from app.crud import product as product_crud, user as user_crud, product_view as view_crud, feed as feed_crud
 from app.models.product import GenderEnum
 from app.models.user import User
+from app.utils.text import fold
 
 router = APIRouter()
 
@@ -19,38 +27,119 @@ def get_products(
         gender: Optional[GenderEnum] = None,
         category_id: Optional[UUID] = None,
         search: Optional[str] = None,
-        db: Session = Depends(get_db)
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,price,image"),
+        view: Optional[str] = Query(None, pattern=VIEW_PATTERN, description="Field preset when fields is not given"),
+        current_user: Optional[User] = Depends(get_optional_user),
+        db: Session = Depends(get_read_db)
+):
+    """Get products with filtering; with a token, also whether the user liked/bookmarked each"""
+    names = selected_fields(fields, view)
+    columns = product_columns(names)
+
+    # Repeated searches reuse the ids found last time (app.core.search_cache)
+    query = fold(search) if search else ""
+    key = (query, gender, category_id, skip, limit)
+    version = search_cache.version
+    product_ids = search_cache.lookup(key, query) if query else None
+    if product_ids is not None:
+        products, _ = product_crud.get_active_products_page(db, product_ids, limit=limit, columns=columns)
+    else:
+        products = product_crud.get_products(
+            db=db,
+            skip=skip,
+            limit=limit,
+            gender=gender,
+            category_id=category_id,
+            search=search,
+            include_inactive=False,
+            similarity_threshold=settings.search_similarity_threshold,
+            columns=columns
+        )
+        if query:
+            search_cache.store(key, [product.id for product in products], version)
+
+    if names:
+        return JSONResponse(project_products(products, names, current_user))
+    return product_list_items(products, current_user)
+
+
+@router.get("/suggest", response_model=List[SuggestionResponse])
+def suggest(
+        response: Response,
+        q: str = Query(..., min_length=1, max_length=100),
+        limit: int = Query(10, ge=1, le=20)
+):
+    """Typeahead suggestions (product names, tags, categories) for a prefix, most popular first"""
+    started = time.perf_counter()
+    suggestions = suggest_index.search(q, limit)
+    response.headers["Server-Timing"] = f"suggest;dur={(time.perf_counter() - started) * 1000:.3f}"
+    return [SuggestionResponse(text=item.text, kind=item.kind, id=item.id) for item in suggestions]
+
+
+# Feeds are built by the scheduler; the request only reads the stored ranking
+@router.get("/for-you", response_model=List[ProductListResponse])
+def get_for_you_feed(
+        response: Response,
+        limit: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None,
+        current_user: User = Depends(get_current_active_user),
+        db: Session = Depends(get_read_db)
+):
+    """Personalized products, trending ones until the user has history (next page cursor in X-Next-Cursor)"""
+    product_ids = feed_crud.get_feed_product_ids(db, current_user.id)
+    return product_list_page(db, product_ids, cursor, limit, response, current_user)
+
+
+@router.get("/batch", response_model=ProductBatchResponse)
+def get_products_batch(
+        ids: str = Query(..., description="Comma-separated product ids"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,price,image"),
+        view: Optional[str] = Query(None, pattern=VIEW_PATTERN, description="Field preset when fields is not given"),
+        current_user: Optional[User] = Depends(get_optional_user),
+        db: Session = Depends(get_read_db)
 ):
-    """Get products with filtering"""
-    products = product_crud.get_products(
-        db=db,
-        skip=skip,
-        limit=limit,
-        gender=gender,
-        category_id=category_id,
-        search=search,
-        include_inactive=False
-    )
-
-    return [
-        ProductListResponse(
-            id=product.id,
-            name=product.name,
-            price=product.price,
-            images=product.images,
-            gender=product.gender
+    """Several products by id in one request, in the order given; unknown or inactive ids are listed in missing"""
+    try:
+        # Each id once, first occurrence wins
+        product_ids = list(dict.fromkeys(UUID(value.strip()) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid product id"
         )
-        for product in products
-    ]
+    if len(product_ids) > settings.product_batch_max:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.product_batch_max} ids per request"
+        )
+
+    names = selected_fields(fields, view)
+    found = {
+        product.id: product
+        for product in product_crud.get_products_by_ids(db, product_ids, columns=product_columns(names, "is_active"))
+        if product.is_active
+    }
+    products = [found[product_id] for product_id in product_ids if product_id in found]
+    missing = [product_id for product_id in product_ids if product_id not in found]
+    if names:
+        return JSONResponse({
+            "products": project_products(products, names, current_user),
+            "missing": [str(product_id) for product_id in missing]
+        })
+    return ProductBatchResponse(products=product_list_items(products, current_user), missing=missing)
 
 
-@router.get("/{product_id}", response_model=ProductResponse)
+@router.get("/{product_id}", response_model=ProductDetailResponse)
 def get_product(
         product_id: UUID,
-        db: Session = Depends(get_db)
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,price,image"),
+        view: Optional[str] = Query(None, pattern=VIEW_PATTERN, description="Field preset when fields is not given"),
+        current_user: Optional[User] = Depends(get_optional_user),
+        db: Session = Depends(get_read_db)
 ):
-    """Get product details"""
-    product = product_crud.get_product_by_id(db, product_id)
+    """Get product details; with a token, also whether the user liked/bookmarked it"""
+    names = selected_fields(fields, view)
+    product = product_crud.get_product_by_id(db, product_id, columns=product_columns(names, "is_active"))
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -63,7 +152,9 @@ def get_product(
             detail="Product not available"
         )
 
-    return product
+    if names:
+        return JSONResponse(project_products([product], names, current_user)[0])
+    return product_detail_item(product, current_user)
 
 
 @router.post("/{product_id}/click")
@@ -80,8 +171,8 @@ def track_product_click(
             detail="Product not found"
         )
 
-    # Add to user's click history
-    user_crud.add_to_click_history(db, current_user.id, product_id)
+    # Record the view in its own table; the users row stays untouched
+    view_crud.record_view(db, current_user.id, product_id)
 
     # Increment product click count
     product_crud.increment_click_count(db, product_id)
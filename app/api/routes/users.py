@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from app.database import get_db, get_read_db
 from app.api.deps import get_current_active_user
+from app.api.pagination import product_list_items, product_list_page
 from app.schemas.user import UserResponse, UserUpdate, UserInteractionsResponse
 from app.schemas.product import ProductListResponse
-from app.crud import user as user_crud, product as product_crud
+from app.crud import user as user_crud, product_view as view_crud
 from app.models.user import User
 
 router = APIRouter()
@@ -33,74 +34,44 @@ def update_my_profile(
     return updated_user
 
 
+# The user row (and so the liked/bookmarked ids) is read from the primary by
+# get_current_active_user, so the caller's own writes show up immediately;
+# only the product rows come from a replica
 @router.get("/me/likes", response_model=List[ProductListResponse])
 def get_my_liked_products(
+        response: Response,
+        limit: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None,
         current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
-    """Get user's liked products"""
-    if not current_user.liked_products:
-        return []
-
-    products = product_crud.get_products_by_ids(db, current_user.liked_products)
-    return [
-        ProductListResponse(
-            id=product.id,
-            name=product.name,
-            price=product.price,
-            images=product.images,
-            gender=product.gender
-        )
-        for product in products
-    ]
+    """Get user's liked products, most recently liked first (next page cursor in X-Next-Cursor)"""
+    # Ids are appended when saved, so newest first is from the end of the array
+    return product_list_page(
+        db, current_user.liked_products or [], cursor, limit, response, current_user, newest_first=True
+    )
 
 
 @router.get("/me/bookmarks", response_model=List[ProductListResponse])
 def get_my_bookmarked_products(
+        response: Response,
+        limit: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None,
         current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
-    """Get user's bookmarked products"""
-    if not current_user.bookmarked_products:
-        return []
-
-    products = product_crud.get_products_by_ids(db, current_user.bookmarked_products)
-    return [
-        ProductListResponse(
-            id=product.id,
-            name=product.name,
-            price=product.price,
-            images=product.images,
-            gender=product.gender
-        )
-        for product in products
-    ]
+    """Get user's bookmarked products, most recent first (next page cursor in X-Next-Cursor)"""
+    return product_list_page(
+        db, current_user.bookmarked_products or [], cursor, limit, response, current_user, newest_first=True
+    )
 
 
+# Served from the primary: a click must show up here right away
 @router.get("/me/recent-clicks", response_model=List[ProductListResponse])
 def get_my_recent_clicks(
         current_user: User = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
     """Get user's recent clicked products"""
-    if not current_user.click_history:
-        return []
-
-    # Get first 10 recent clicks
-    recent_ids = current_user.click_history[:10]
-    products = product_crud.get_products_by_ids(db, recent_ids)
-
-    # Sort by click history order
-    products_dict = {product.id: product for product in products}
-    ordered_products = [products_dict[pid] for pid in recent_ids if pid in products_dict]
-
-    return [
-        ProductListResponse(
-            id=product.id,
-            name=product.name,
-            price=product.price,
-            images=product.images,
-            gender=product.gender
-        )
-        for product in ordered_products
-    ]
\ No newline at end of file
+    products = view_crud.get_recently_viewed_products(db, current_user.id, limit=10)
+    return product_list_items(products, current_user)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Offline harness for the Telegram bot in webhook mode.
+
+It provides two halves:
+
+* a fake Bot API server (``serve``) which answers the handful of methods the
+  bot calls (getMe, setWebhook, sendMessage, ...) and records every message
+  the bot sends, and
+* a client (``send``) which posts hand-built update payloads to the API's
+  ``/bot/webhook/{secret}`` route, exactly like Telegram does.
+
+Typical local run:
+
+    python -m app.bot.fake_telegram serve --port 8081
+    BOT_MODE=webhook BOT_WEBHOOK_URL=http://127.0.0.1:8000 \\
+        TELEGRAM_API_BASE_URL=http://127.0.0.1:8081/bot \\
+        uvicorn app.main:app --port 8000
+    python -m app.bot.fake_telegram send contact --phone +998901234567
+    curl http://127.0.0.1:8081/_sent
+"""
+
+import argparse
+import itertools
+import json
+import time
+from typing import List, Optional
+
+import httpx
+
+DEFAULT_USER_ID = 700000001
+
+_update_ids = itertools.count(1)
+_message_ids = itertools.count(1)
+
+
+def _user(user_id: int, first_name: str = "Test", username: Optional[str] = "test_user") -> dict:
+    user = {"id": user_id, "is_bot": False, "first_name": first_name}
+    if username:
+        user["username"] = username
+    return user
+
+
+def _message(user_id: int, **fields) -> dict:
+    message = {
+        "message_id": next(_message_ids),
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": _user(user_id),
+    }
+    message.update(fields)
+    return {"update_id": next(_update_ids), "message": message}
+
+
+def make_start_update(user_id: int = DEFAULT_USER_ID) -> dict:
+    """/start command"""
+    return _message(
+        user_id,
+        text="/start",
+        entities=[{"type": "bot_command", "offset": 0, "length": 6}]
+    )
+
+
+def make_contact_update(phone_number: str, user_id: int = DEFAULT_USER_ID, contact_user_id: Optional[int] = None) -> dict:
+    """Shared contact; pass a different contact_user_id to simulate someone else's contact"""
+    return _message(
+        user_id,
+        contact={
+            "phone_number": phone_number,
+            "first_name": "Test",
+            "user_id": contact_user_id if contact_user_id is not None else user_id,
+        }
+    )
+
+
+def make_text_update(text: str, user_id: int = DEFAULT_USER_ID) -> dict:
+    """Plain text message"""
+    return _message(user_id, text=text)
+
+
+def post_update(api_url: str, secret: str, payload: dict) -> httpx.Response:
+    """Deliver an update to the webhook route the way Telegram does"""
+    return httpx.post(
+        f"{api_url.rstrip('/')}/bot/webhook/{secret}",
+        json=payload,
+        headers={"X-Telegram-Bot-Api-Secret-Token": secret},
+        timeout=10
+    )
+
+
+def create_fake_bot_api(bot_username: str = "inbazar_robot"):
+    """FastAPI app imitating the subset of the Bot API used by the bot"""
+    from fastapi import FastAPI, Request
+
+    fake_api = FastAPI(title="Fake Telegram Bot API")
+    sent_messages: List[dict] = []
+    webhook = {"url": "", "secret_token": None}
+
+    async def read_params(request: Request) -> dict:
+        # python-telegram-bot sends form fields whose values are JSON encoded
+        if request.headers.get("content-type", "").startswith("application/json"):
+            return await request.json()
+        params = {}
+        for key, value in (await request.form()).items():
+            try:
+                params[key] = json.loads(value)
+            except (TypeError, ValueError):
+                params[key] = value
+        return params
+
+    @fake_api.get("/_sent")
+    def list_sent_messages():
+        return sent_messages
+
+    @fake_api.delete("/_sent")
+    def clear_sent_messages():
+        sent_messages.clear()
+        return {"ok": True}
+
+    @fake_api.post("/bot{token}/{method}")
+    async def bot_method(token: str, method: str, request: Request):
+        params = await read_params(request)
+        method = method.lower()
+
+        if method == "getme":
+            result = {
+                "id": 1,
+                "is_bot": True,
+                "first_name": "InBazar",
+                "username": bot_username,
+                "can_join_groups": False,
+                "can_read_all_group_messages": False,
+                "supports_inline_queries": False,
+            }
+        elif method == "setwebhook":
+            webhook["url"] = params.get("url", "")
+            webhook["secret_token"] = params.get("secret_token")
+            result = True
+        elif method == "deletewebhook":
+            webhook["url"] = ""
+            result = True
+        elif method == "getwebhookinfo":
+            result = {"url": webhook["url"], "has_custom_certificate": False, "pending_update_count": 0}
+        elif method == "sendmessage":
+            chat_id = int(params.get("chat_id"))
+            sent_messages.append({"chat_id": chat_id, "text": params.get("text")})
+            result = {
+                "message_id": next(_message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text"),
+            }
+        else:
+            result = True
+
+        return {"ok": True, "result": result}
+
+    return fake_api
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Telegram harness for webhook mode")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the fake Bot API server")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8081)
+
+    send_parser = subparsers.add_parser("send", help="Post an update to the webhook route")
+    send_parser.add_argument("kind", choices=["start", "contact", "text"])
+    send_parser.add_argument("--api", default="http://127.0.0.1:8000", help="InBazar API base URL")
+    send_parser.add_argument("--secret", help="Webhook secret (defaults to the configured one)")
+    send_parser.add_argument("--user-id", type=int, default=DEFAULT_USER_ID)
+    send_parser.add_argument("--phone", default="+998901234567")
+    send_parser.add_argument("--text", default="salom")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        import uvicorn
+        uvicorn.run(create_fake_bot_api(), host=args.host, port=args.port)
+        return
+
+    secret = args.secret
+    if not secret:
+        from app.bot.main import get_webhook_secret
+        secret = get_webhook_secret()
+
+    if args.kind == "start":
+        payload = make_start_update(args.user_id)
+    elif args.kind == "contact":
+        payload = make_contact_update(args.phone, args.user_id)
+    else:
+        payload = make_text_update(args.text, args.user_id)
+
+    response = post_update(args.api, secret, payload)
+    print(f"{response.status_code} {response.text}")
+
+
+if __name__ == "__main__":
+    main()
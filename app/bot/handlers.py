@@ -1,10 +1,19 @@
+import logging
 import random
 import string
 from telegram import Update, ReplyKeyboardMarkup, KeyboardButton
 from telegram.ext import ContextTypes
-from app.database import SessionLocal
-from app.crud.bot_user import create_or_update_bot_user, store_otp_code, get_bot_user_by_telegram_id
+from app import database
+from app.crud.bot_user import (
+    get_active_otp_code_async,
+    get_bot_user_by_phone_async,
+    get_bot_user_by_telegram_id_async,
+    register_contact_async,
+)
 from app.bot.utils import format_phone_number, validate_uzbek_phone
+from app.core.log import mask_phone
+
+logger = logging.getLogger(__name__)
 
 
 def get_contact_keyboard():
@@ -63,11 +72,10 @@ async def contact_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
         return
 
-    # SECURITY CHECK 5: Check if this phone is already registered to another Telegram user
-    db = SessionLocal()
-    try:
-        from app.crud.bot_user import get_bot_user_by_phone
-        existing_user = get_bot_user_by_phone(db, phone_number)
+    # One session and one transaction per contact
+    async with database.AsyncSessionLocal() as db:
+        # SECURITY CHECK 5: Check if this phone is already registered to another Telegram user
+        existing_user = await get_bot_user_by_phone_async(db, phone_number)
 
         if existing_user and existing_user.telegram_id != str(user.id):
             await update.message.reply_text(
@@ -76,41 +84,39 @@ async def contact_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 reply_markup=get_contact_keyboard()
             )
             return
-    finally:
-        pass
-
-    # Generate 6-digit OTP
-    otp_code = ''.join(random.choices(string.digits, k=6))
 
-    # Save to database
-    try:
-        store_otp_code(db, phone_number, otp_code)
-        create_or_update_bot_user(
-            db=db,
-            telegram_id=str(user.id),
-            username=user.username,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            phone_number=phone_number
-        )
+        # Generate 6-digit OTP
+        otp_code = ''.join(random.choices(string.digits, k=6))
+
+        # Save to database
+        try:
+            await register_contact_async(
+                db=db,
+                telegram_id=str(user.id),
+                phone_number=phone_number,
+                code=otp_code,
+                username=user.username,
+                first_name=user.first_name,
+                last_name=user.last_name
+            )
+        except Exception:
+            logger.exception("Storing OTP failed", extra={"phone": mask_phone(phone_number)})
+            await update.message.reply_text(
+                "❌ Xatolik yuz berdi. Qaytadan urinib ko'ring.",
+                reply_markup=get_contact_keyboard()
+            )
+            return
 
-        # Send OTP
-        await update.message.reply_text(
-            f"✅ Kod: **{otp_code}**\n\n"
-            f"📱 Raqam: {phone_number}\n"
-            f"⏰ 5 daqiqada tugaydi",
-            parse_mode='Markdown',
-            reply_markup=get_contact_keyboard()
-        )
+    logger.info("OTP issued", extra={"phone": mask_phone(phone_number), "sample_rate": 0.1})
 
-    except Exception as e:
-        await update.message.reply_text(
-            "❌ Xatolik yuz berdi. Qaytadan urinib ko'ring.",
-            reply_markup=get_contact_keyboard()
-        )
-        print(f"Error storing OTP: {e}")
-    finally:
-        db.close()
+    # Send OTP
+    await update.message.reply_text(
+        f"✅ Kod: **{otp_code}**\n\n"
+        f"📱 Raqam: {phone_number}\n"
+        f"⏰ 5 daqiqada tugaydi",
+        parse_mode='Markdown',
+        reply_markup=get_contact_keyboard()
+    )
 
 
 async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -118,32 +124,23 @@ async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     user = update.effective_user
 
     # Check if user has active OTP
-    db = SessionLocal()
     try:
-        bot_user = get_bot_user_by_telegram_id(db, str(user.id))
-
-        if bot_user and bot_user.phone_number:
-            # Check for active OTP
-            from app.models.bot_user import OTPCode
-            from datetime import datetime
-
-            active_otp = db.query(OTPCode).filter(
-                OTPCode.phone_number == bot_user.phone_number,
-                OTPCode.expires_at > datetime.utcnow()
-            ).first()
-
-            if active_otp:
-                await update.message.reply_text(
-                    f"✅ Faol kodingiz bor: **{active_otp.code}**\n\n"
-                    f"📱 Raqam: {bot_user.phone_number}",
-                    parse_mode='Markdown',
-                    reply_markup=get_contact_keyboard()
-                )
-                return
-    except Exception as e:
-        print(f"Error checking active OTP: {e}")
-    finally:
-        db.close()
+        async with database.AsyncSessionLocal() as db:
+            bot_user = await get_bot_user_by_telegram_id_async(db, str(user.id))
+            active_otp = None
+            if bot_user and bot_user.phone_number:
+                active_otp = await get_active_otp_code_async(db, bot_user.phone_number)
+
+        if active_otp:
+            await update.message.reply_text(
+                f"✅ Faol kodingiz bor: **{active_otp.code}**\n\n"
+                f"📱 Raqam: {bot_user.phone_number}",
+                parse_mode='Markdown',
+                reply_markup=get_contact_keyboard()
+            )
+            return
+    except Exception:
+        logger.exception("Checking active OTP failed")
 
     # Default: remind to use button
     await update.message.reply_text(
@@ -1,54 +1,105 @@
 import asyncio
+import hashlib
+import hmac
 import logging
+from typing import Optional
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from app.config import settings
 from app.bot.handlers import start_handler, contact_handler, text_handler
+from app.core.metrics import track_bot_handler
 
-# Enable logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
 logger = logging.getLogger(__name__)
 
+WEBHOOK_PATH = "/bot/webhook/{secret}"
+
 
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Log the error and send a telegram message to notify the developer."""
     logger.error(msg="Exception while handling an update:", exc_info=context.error)
 
 
+def get_webhook_secret() -> str:
+    """Secret used both in the webhook path and as Telegram's secret_token header"""
+    if settings.bot_webhook_secret:
+        return settings.bot_webhook_secret
+    return hashlib.sha256(settings.telegram_bot_token.encode()).hexdigest()[:32]
+
+
+def is_valid_webhook_secret(secret: Optional[str]) -> bool:
+    return bool(secret) and hmac.compare_digest(secret, get_webhook_secret())
+
+
 class TelegramBot:
     def __init__(self):
         self.application = None
 
-    async def start_bot(self):
-        """Start the bot."""
-        # Create the Application
-        self.application = Application.builder().token(settings.telegram_bot_token).build()
+    @property
+    def mode(self) -> str:
+        return settings.bot_mode.lower()
+
+    def build_application(self) -> Application:
+        """Create the Application with all handlers registered."""
+        # Handlers only await I/O, so updates from different users can be
+        # processed concurrently
+        builder = (
+            Application.builder()
+            .token(settings.telegram_bot_token)
+            .concurrent_updates(True)
+        )
+        if settings.telegram_api_base_url:
+            builder = builder.base_url(settings.telegram_api_base_url)
+        if self.mode == "webhook":
+            # Updates arrive through the FastAPI route, no Updater needed
+            builder = builder.updater(None)
+        application = builder.build()
 
         # Add handlers
-        self.application.add_handler(CommandHandler("start", start_handler))
-        self.application.add_handler(MessageHandler(filters.CONTACT, contact_handler))
-        self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_handler))
+        application.add_handler(CommandHandler("start", track_bot_handler("start", start_handler)))
+        application.add_handler(MessageHandler(filters.CONTACT, track_bot_handler("contact", contact_handler)))
+        application.add_handler(
+            MessageHandler(filters.TEXT & ~filters.COMMAND, track_bot_handler("text", text_handler))
+        )
 
         # Add error handler
-        self.application.add_error_handler(error_handler)
+        application.add_error_handler(error_handler)
+        return application
+
+    async def start_bot(self):
+        """Start the bot."""
+        self.application = self.build_application()
 
-        # Initialize and start polling
         await self.application.initialize()
         await self.application.start()
-        await self.application.updater.start_polling()
 
-        print(f"🤖 Bot @{settings.telegram_bot_username} is running...")
+        if self.mode == "webhook":
+            if not settings.bot_webhook_url:
+                raise RuntimeError("BOT_WEBHOOK_URL is required when BOT_MODE=webhook")
+            secret = get_webhook_secret()
+            webhook_url = settings.bot_webhook_url.rstrip("/") + WEBHOOK_PATH.format(secret=secret)
+            # Idempotent: every worker registers the same URL
+            await self.application.bot.set_webhook(url=webhook_url, secret_token=secret)
+            logger.info("🤖 Bot @%s webhook rejimida ishlayapti...", settings.telegram_bot_username)
+        else:
+            await self.application.updater.start_polling()
+            logger.info("🤖 Bot @%s is running...", settings.telegram_bot_username)
+
+    async def process_webhook_update(self, payload: dict) -> None:
+        """Feed a raw update received on the webhook route into the application."""
+        if not self.application:
+            raise RuntimeError("Bot is not running")
+        update = Update.de_json(payload, self.application.bot)
+        await self.application.process_update(update)
 
     async def stop_bot(self):
         """Stop the bot."""
         if self.application:
-            await self.application.updater.stop()
+            if self.application.updater and self.application.updater.running:
+                await self.application.updater.stop()
             await self.application.stop()
             await self.application.shutdown()
-            print("🤖 Bot stopped.")
+            self.application = None
+            logger.info("🤖 Bot stopped.")
 
 
 # Global bot instance
@@ -63,7 +114,7 @@ async def run_bot():
         while True:
             await asyncio.sleep(1)
     except KeyboardInterrupt:
-        print("\n🛑 Shutting down bot...")
+        logger.info("🛑 Shutting down bot...")
         await bot_instance.stop_bot()
 
 
@@ -73,4 +124,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
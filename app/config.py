@@ -2,12 +2,15 @@ try:
     from pydantic_settings import BaseSettings
 except ImportError:
     from pydantic import BaseSettings
+from functools import lru_cache
 from typing import Optional
 
 
 class Settings(BaseSettings):
     # Database
     database_url: str
+    database_replica_urls: Optional[str] = None  # Comma-separated read replicas for GET routes
+    replica_retry_interval: float = 10.0  # Seconds a failed replica is skipped before retrying
 
     # JWT
     secret_key: str
@@ -17,6 +20,10 @@ class Settings(BaseSettings):
     # Telegram Bot
     telegram_bot_token: str
     telegram_bot_username: str
+    bot_mode: str = "polling"  # "polling" or "webhook"
+    bot_webhook_url: Optional[str] = None  # Public base URL, e.g. https://api.inbazar.uz
+    bot_webhook_secret: Optional[str] = None  # Defaults to a hash of the bot token
+    telegram_api_base_url: Optional[str] = None  # Point the bot at a fake Bot API for local tests
 
     # Supabase
     supabase_url: str
@@ -30,9 +37,77 @@ class Settings(BaseSettings):
     app_name: str = "Clothing Shop API"
     debug: bool = False
     enable_bot: bool = True  # Control bot startup
+    enable_metrics: bool = True  # Prometheus metrics at /metrics
+    cold_start_budget_ms: float = 3000  # Warn (and fail benchmarks.coldstart) above this
+    product_batch_max: int = 100  # Ids per GET /products/batch
+    admin_count_cache_ttl: float = 60  # Seconds an admin list total is reused
+
+    # Logging (written by a background thread)
+    log_level: str = "INFO"
+    log_format: str = "text"  # "text" or "json"
+    log_queue_size: int = 10000  # Records beyond this are dropped, never waited on
+
+    # SQL query profiler (development only; adds X-DB-Queries/X-DB-Time headers)
+    enable_query_profiler: bool = False
+    query_profiler_repeat_threshold: int = 2  # Same statement this often = N+1 suspect
+    query_profiler_history: int = 200  # Request reports kept for /debug/queries
+
+    # Traffic capture for replay load tests (sanitized, gzip JSONL)
+    enable_traffic_capture: bool = False
+    traffic_capture_dir: str = "traffic"
+    traffic_capture_sample_rate: float = 1.0
+    traffic_capture_max_bytes: int = 50 * 1024 * 1024  # Per file, before rotation
+    traffic_capture_max_files: int = 20
+
+    # Leader election between workers (singleton background work)
+    leader_lock_file: Optional[str] = None  # File lock path when not on Postgres
+    leader_check_interval: float = 5.0  # Seconds between acquire/health checks
+
+    # Periodic jobs (run by the leader only)
+    enable_scheduler: bool = True
+    scheduler_max_workers: int = 2
+    otp_purge_interval: float = 600  # Seconds
+    counter_reconcile_cron: str = "30 3 * * *"  # UTC
+    analytics_snapshot_interval: float = 900  # Seconds
+    view_retention_cron: str = "0 4 * * *"  # UTC
+    view_history_retention_days: int = 90
+    view_history_per_user: int = 50  # Newest views kept per user
+    feed_refresh_interval: float = 3600  # Seconds
+    feed_size: int = 200  # Candidates materialized per user
+    feed_batch_size: int = 128  # Users scored per NumPy batch
+    feed_history_days: int = 90  # Views older than this don't count
+    feed_active_days: int = 7  # Only users active this recently are rescored
+    feed_candidate_pool: int = 5000  # Most popular products scored, plus FEED_SIZE per category
+    trending_days: int = 7
+    catalog_compaction_cron: str = "45 4 * * *"  # UTC
+    catalog_change_retention_days: int = 30  # Older sync tokens must reload the catalog
+    catalog_snapshot_dir: str = "snapshots"  # Shared by the workers of a host
+    catalog_snapshot_interval: float = 60  # Seconds between catalog version checks
+    catalog_snapshot_max_age: float = 6 * 3600  # Rebuild anyway, for writes outside the API
+
+    # Typeahead and search indexes, rebuilt in every worker
+    suggest_rebuild_interval: float = 1800  # Seconds
+    search_rebuild_interval: float = 1800  # Seconds; in-process index, only without Postgres
+    search_similarity_threshold: float = 0.5  # Share of the query's trigrams a match must contain
+    search_sync_interval: float = 3600  # Seconds between backfills of missing search documents
+    search_cache_size: int = 2000  # Cached result pages per worker
+    search_cache_ttl: float = 60  # Seconds; bounds staleness after writes through other workers
+    search_popular_queries_tracked: int = 1000
 
     class Config:
         env_file = ".env"
 
 
-settings = Settings()
\ No newline at end of file
+@lru_cache()
+def get_settings() -> Settings:
+    return Settings()
+
+
+class _LazySettings:
+    """Reads the environment on first attribute access, not at import"""
+
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
+
+settings: Settings = _LazySettings()  # type: ignore[assignment]
@@ -0,0 +1,63 @@
+"""
+Per-worker cache of product counts by filter, for the admin list's
+X-Total-Count.
+
+Most filters make counting a scan of the products table, and the admin panel
+asks for the same few totals on every page turn. A count lives ``ttl``
+seconds; admin writes through this worker clear them all (app.core.index).
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Hashable, Tuple
+from uuid import UUID
+from app.config import settings
+from app.core.index import register
+
+
+class CountCache:
+    def __init__(self, ttl: float = 60.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._counts: Dict[Hashable, Tuple[float, int]] = {}
+        self._version = 0
+
+    def get(self, key: Hashable, count: Callable[[], int]) -> int:
+        """The cached count for the key, or ``count()`` stored for next time"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+            version = self._version
+        value = count()
+        with self._lock:
+            # A write while counting makes the value stale; return it but don't keep it
+            if version == self._version:
+                if len(self._counts) >= self.max_entries:
+                    self._counts.clear()
+                self._counts[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._counts.clear()
+
+    # Catalog write hooks (app.core.index)
+
+    def upsert_product(self, product) -> None:
+        self.invalidate()
+
+    def remove_product(self, product_id: UUID) -> None:
+        self.invalidate()
+
+    def set_category(self, category) -> None:
+        pass
+
+    def remove_category(self, category_id: UUID) -> None:
+        pass
+
+
+product_counts = register(CountCache(ttl=settings.admin_count_cache_ttl))
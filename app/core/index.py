@@ -0,0 +1,160 @@
+"""
+Per-worker in-memory catalog indexes.
+
+An index is built from the database in a background thread at startup and
+rebuilt every ``interval`` seconds, which picks up counter changes and
+writes made through other workers. Admin writes in this worker reach every
+registered index at once through ``product_saved`` / ``product_deleted`` /
+``category_saved`` / ``category_deleted``; a write landing while a rebuild
+is loading is replayed onto the new index. Anything else that must follow
+catalog writes (e.g. the search result cache) can register with the same
+four methods.
+"""
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+import time
+from typing import Optional
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+_indexes: list = []
+
+
+class InMemoryIndex(ABC):
+    name = "index"
+
+    # Attributes holding the indexed data, swapped in wholesale by build()
+    _STATE: tuple = ()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ready = False
+        self._pending: Optional[list] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Subclasses implement
+
+    @abstractmethod
+    def _load(self, db):
+        """Read what the index needs; runs without the lock"""
+
+    @abstractmethod
+    def _fill(self, data) -> None:
+        """Index the loaded data into this (fresh, private) instance"""
+
+    def _refresh(self) -> None:
+        """Called under the lock after every change"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Entries indexed"""
+
+    def upsert_product(self, product) -> None:
+        pass
+
+    def remove_product(self, product_id: UUID) -> None:
+        pass
+
+    def set_category(self, category) -> None:
+        pass
+
+    def remove_category(self, category_id: UUID) -> None:
+        pass
+
+    # Changes
+
+    def _apply(self, change: str, *args) -> None:
+        with self._lock:
+            if not self.ready and self._pending is None:
+                # Never built (not started in this process); the first build reads the write
+                return
+            # A rebuild in progress read the database before this write; replay it afterwards
+            if self._pending is not None:
+                self._pending.append((change, args))
+            getattr(self, change)(*args)
+            self._refresh()
+
+    # Building
+
+    def build(self, db) -> int:
+        """Replace the index with the current catalog; returns its size"""
+        with self._lock:
+            self._pending = []
+        try:
+            data = self._load(db)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        fresh = type(self)()
+        fresh._fill(data)
+
+        with self._lock:
+            pending, self._pending = self._pending, None
+            for change, args in pending:
+                getattr(fresh, change)(*args)
+            fresh._refresh()
+            for name in self._STATE:
+                setattr(self, name, getattr(fresh, name))
+            self.ready = True
+            return len(self)
+
+    def start(self, interval: float) -> None:
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name=f"{self.name}-index", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, interval: float) -> None:
+        from app.database import SessionLocal
+
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            db = SessionLocal()
+            try:
+                size = self.build(db)
+                logger.info(
+                    "🔎 %s index built: %d entries in %.0fms", self.name, size, (time.perf_counter() - started) * 1000
+                )
+            except Exception:
+                logger.exception("❌ %s index build failed", self.name)
+            finally:
+                db.close()
+            self._stop.wait(interval)
+
+
+def register(index):
+    _indexes.append(index)
+    return index
+
+
+def product_saved(product) -> None:
+    for index in _indexes:
+        index.upsert_product(product)
+
+
+def product_deleted(product_id: UUID) -> None:
+    for index in _indexes:
+        index.remove_product(product_id)
+
+
+def category_saved(category) -> None:
+    for index in _indexes:
+        index.set_category(category)
+
+
+def category_deleted(category_id: UUID) -> None:
+    for index in _indexes:
+        index.remove_category(category_id)
@@ -0,0 +1,198 @@
+"""
+Periodic maintenance jobs run by the scheduler on the leader worker, and
+per-host jobs run by every worker's host scheduler.
+
+Each job opens its own session so it can run in any thread or process.
+"""
+
+import os
+import time
+from app.config import settings
+from app import database
+from app.core.scheduler import Scheduler
+
+
+def purge_expired_otp_codes() -> int:
+    from app.crud.bot_user import delete_expired_otp_codes
+
+    db = database.SessionLocal()
+    try:
+        return delete_expired_otp_codes(db)
+    finally:
+        db.close()
+
+
+def reconcile_product_counters() -> int:
+    from app.crud.product import reconcile_interaction_counts
+
+    db = database.SessionLocal()
+    try:
+        return reconcile_interaction_counts(db)
+    finally:
+        db.close()
+
+
+def refresh_analytics_snapshot() -> dict:
+    from app.crud.analytics import create_snapshot, delete_old_snapshots
+
+    db = database.SessionLocal()
+    try:
+        snapshot = create_snapshot(db)
+        delete_old_snapshots(db)
+        return snapshot.data
+    finally:
+        db.close()
+
+
+def prune_product_views() -> int:
+    from app.crud.product_view import migrate_click_history, prune_views
+
+    db = database.SessionLocal()
+    try:
+        migrate_click_history(db)
+        return prune_views(
+            db,
+            max_age_days=settings.view_history_retention_days,
+            keep_per_user=settings.view_history_per_user
+        )
+    finally:
+        db.close()
+
+
+def refresh_feeds() -> int:
+    from app.crud.feed import build_feeds, create_trending_snapshot
+
+    db = database.SessionLocal()
+    try:
+        create_trending_snapshot(db, days=settings.trending_days, limit=settings.feed_size)
+        return build_feeds(
+            db,
+            size=settings.feed_size,
+            batch_size=settings.feed_batch_size,
+            history_days=settings.feed_history_days,
+            active_days=settings.feed_active_days,
+            pool_size=settings.feed_candidate_pool
+        )
+    finally:
+        db.close()
+
+
+def sync_search_documents() -> int:
+    from app.crud.product import sync_search_documents as sync
+
+    db = database.SessionLocal()
+    try:
+        return sync(db)
+    finally:
+        db.close()
+
+
+def compact_catalog_changes() -> int:
+    from app.crud.catalog import compact_changes
+
+    db = database.SessionLocal()
+    try:
+        return compact_changes(db, retention_days=settings.catalog_change_retention_days)
+    finally:
+        db.close()
+
+
+def build_catalog_snapshot() -> int:
+    """
+    Write a new catalog snapshot when the catalog changed; returns its size
+    in bytes, 0 if unchanged. Every host keeps its own snapshot directory; the
+    workers of a host take turns through a lock file in it.
+    """
+    from app.core.leader import FileLock, get_worker_id
+    from app.core.snapshot import build_snapshot, latest_snapshot, remove_old_snapshots
+    from app.crud.catalog import latest_change_id
+
+    os.makedirs(settings.catalog_snapshot_dir, exist_ok=True)
+    lock = FileLock(os.path.join(settings.catalog_snapshot_dir, ".build.lock"), get_worker_id())
+    if not lock.try_acquire():
+        return 0  # Another worker of this host is building it
+    db = database.SessionLocal()
+    try:
+        version = latest_change_id(db)
+        current = latest_snapshot(settings.catalog_snapshot_dir)
+        if (
+            current and current.version == version
+            and time.time() - current.built_at < settings.catalog_snapshot_max_age
+        ):
+            return 0
+        snapshot = build_snapshot(db, settings.catalog_snapshot_dir, version)
+        remove_old_snapshots(settings.catalog_snapshot_dir, snapshot)
+        return snapshot.size
+    finally:
+        db.close()
+        lock.release()
+
+
+def register_default_jobs(scheduler: Scheduler) -> None:
+    scheduler.add_job(
+        "purge_expired_otp_codes",
+        purge_expired_otp_codes,
+        interval=settings.otp_purge_interval,
+        jitter=30,
+        timeout=60
+    )
+    scheduler.add_job(
+        "reconcile_product_counters",
+        reconcile_product_counters,
+        cron=settings.counter_reconcile_cron,
+        jitter=60,
+        timeout=1800,
+        executor="process"
+    )
+    scheduler.add_job(
+        "refresh_analytics_snapshot",
+        refresh_analytics_snapshot,
+        interval=settings.analytics_snapshot_interval,
+        jitter=30,
+        timeout=300,
+        run_on_start=True
+    )
+    scheduler.add_job(
+        "prune_product_views",
+        prune_product_views,
+        cron=settings.view_retention_cron,
+        jitter=60,
+        timeout=1800
+    )
+    scheduler.add_job(
+        "refresh_feeds",
+        refresh_feeds,
+        interval=settings.feed_refresh_interval,
+        jitter=60,
+        timeout=1800,
+        executor="process",
+        run_on_start=True
+    )
+    scheduler.add_job(
+        "sync_search_documents",
+        sync_search_documents,
+        interval=settings.search_sync_interval,
+        jitter=60,
+        timeout=1800,
+        run_on_start=True
+    )
+    scheduler.add_job(
+        "compact_catalog_changes",
+        compact_catalog_changes,
+        cron=settings.catalog_compaction_cron,
+        jitter=60,
+        timeout=1800
+    )
+
+
+def register_host_jobs(scheduler: Scheduler) -> None:
+    """Jobs producing files on local disk, so every host runs them, not just the leader's"""
+    scheduler.add_job(
+        "build_catalog_snapshot",
+        build_catalog_snapshot,
+        interval=settings.catalog_snapshot_interval,
+        jitter=10,
+        timeout=1800,
+        executor="process",
+        run_on_start=True
+    )
@@ -0,0 +1,263 @@
+"""
+Leader election between worker processes.
+
+Exactly one worker holds the leader lock at a time and runs the singleton
+tasks (bot polling, sweepers, rollups). On Postgres the lock is a session
+level advisory lock held on a dedicated connection; everywhere else it is an
+exclusive ``flock`` on a local file. Both are released by the database or
+the OS when the holder dies, so a follower picks leadership up on its next
+attempt.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import tempfile
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Arbitrary, but stable across deployments: every worker must use the same key
+ADVISORY_LOCK_KEY = 0x696E62617A6172  # "inbazar"
+APPLICATION_NAME_PREFIX = "inbazar-leader:"
+
+SingletonTask = Callable[[], Awaitable[None]]
+
+
+def get_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class PostgresAdvisoryLock:
+    """pg_try_advisory_lock on a connection kept open while leading"""
+
+    def __init__(self, engine: Engine, worker_id: str, key: int = ADVISORY_LOCK_KEY):
+        self.engine = engine
+        self.worker_id = worker_id
+        self.key = key
+        self._connection: Optional[Connection] = None
+
+    def try_acquire(self) -> bool:
+        if self._connection is not None:
+            return self.is_held()
+
+        connection = self.engine.connect()
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}
+            ).scalar()
+            if acquired:
+                # Lets followers see who the leader is via pg_stat_activity
+                connection.execute(
+                    text("SELECT set_config('application_name', :name, false)"),
+                    {"name": APPLICATION_NAME_PREFIX + self.worker_id}
+                )
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+
+        if not acquired:
+            connection.close()
+            return False
+
+        self._connection = connection
+        return True
+
+    def is_held(self) -> bool:
+        """The lock lives as long as its connection; check it is still there"""
+        if self._connection is None:
+            return False
+        try:
+            self._connection.execute(text("SELECT 1"))
+            self._connection.commit()
+            return True
+        except Exception:
+            self._discard()
+            return False
+
+    def release(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            self._connection.commit()
+        except Exception:
+            pass
+        self._discard()
+
+    def current_leader(self) -> Optional[str]:
+        if self._connection is not None:
+            return self.worker_id
+        with self.engine.connect() as connection:
+            name = connection.execute(
+                text(
+                    "SELECT a.application_name FROM pg_locks l "
+                    "JOIN pg_stat_activity a ON a.pid = l.pid "
+                    "WHERE l.locktype = 'advisory' AND l.granted AND l.objsubid = 1 "
+                    "AND ((l.classid::bigint << 32) | l.objid::bigint) = :key"
+                ),
+                {"key": self.key}
+            ).scalar()
+        if name and name.startswith(APPLICATION_NAME_PREFIX):
+            return name[len(APPLICATION_NAME_PREFIX):]
+        return name
+
+    def _discard(self) -> None:
+        # Closing returns the connection to the pool; invalidate it so the
+        # session (and with it the advisory lock) really ends
+        try:
+            self._connection.invalidate()
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+
+class FileLock:
+    """Exclusive flock on a local file, for SQLite and single-node runs"""
+
+    def __init__(self, path: str, worker_id: str):
+        self.path = path
+        self.worker_id = worker_id
+        self._fd: Optional[int] = None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            # No flock available: every worker behaves as the only one
+            return True
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, self.worker_id.encode())
+        os.fsync(fd)
+        self._fd = fd
+        return True
+
+    def is_held(self) -> bool:
+        return self._fd is not None or fcntl is None
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            os.ftruncate(self._fd, 0)
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def current_leader(self) -> Optional[str]:
+        if self.is_held():
+            return self.worker_id
+        try:
+            with open(self.path) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+
+def create_leader_lock(engine: Engine, lock_file: Optional[str] = None, worker_id: Optional[str] = None):
+    """Advisory lock on Postgres, file lock otherwise"""
+    worker_id = worker_id or get_worker_id()
+    if engine.dialect.name == "postgresql":
+        return PostgresAdvisoryLock(engine, worker_id)
+    return FileLock(lock_file or os.path.join(tempfile.gettempdir(), "inbazar-leader.lock"), worker_id)
+
+
+class LeaderElector:
+    """Keeps trying to become leader and runs singleton tasks while leading"""
+
+    def __init__(self, lock, check_interval: float = 5.0):
+        self.lock = lock
+        self.check_interval = check_interval
+        self.is_leader = False
+        self._start_callbacks: List[SingletonTask] = []
+        self._stop_callbacks: List[SingletonTask] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def worker_id(self) -> str:
+        return self.lock.worker_id
+
+    def add_singleton(self, start: SingletonTask, stop: Optional[SingletonTask] = None) -> None:
+        """Register work that only the leader runs; stop is called on demotion"""
+        self._start_callbacks.append(start)
+        if stop:
+            self._stop_callbacks.append(stop)
+
+    async def start(self) -> None:
+        await self._check()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            await self._demote()
+        await asyncio.to_thread(self.lock.release)
+        # Registered again by the next start (another lifespan in the same process)
+        self._start_callbacks.clear()
+        self._stop_callbacks.clear()
+
+    async def current_leader(self) -> Optional[str]:
+        try:
+            return await asyncio.to_thread(self.lock.current_leader)
+        except Exception as e:
+            logger.warning("⚠️  Leader aniqlanmadi: %s", e)
+            return None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self._check()
+
+    async def _check(self) -> None:
+        try:
+            if self.is_leader:
+                if not await asyncio.to_thread(self.lock.is_held):
+                    logger.warning("⚠️  %s leader lock'ni yo'qotdi", self.worker_id)
+                    await self._demote()
+            elif await asyncio.to_thread(self.lock.try_acquire):
+                await self._promote()
+        except Exception:
+            logger.exception("❌ Leader election xatosi")
+
+    async def _promote(self) -> None:
+        self.is_leader = True
+        logger.info("👑 %s leader bo'ldi", self.worker_id)
+        for start in self._start_callbacks:
+            try:
+                await start()
+            except Exception:
+                logger.exception("❌ Singleton task ishga tushmadi")
+
+    async def _demote(self) -> None:
+        self.is_leader = False
+        for stop in reversed(self._stop_callbacks):
+            try:
+                await stop()
+            except Exception:
+                logger.exception("❌ Singleton task to'xtatilmadi")
@@ -0,0 +1,321 @@
+"""
+Prometheus-format metrics.
+
+Counters and histograms keep one shard per thread: a thread only ever
+writes to its own shard, so recording a sample takes no lock. Shards are
+summed when ``/metrics`` is scraped. Gauges are callbacks evaluated at
+scrape time (e.g. connection pool state).
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Sharded:
+    """Base for metrics whose state is split into per-thread shards"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            self._local.shard = shard
+            # Only taken once per thread
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshot_shards(self) -> List[dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        # Copy each shard so a writer growing it doesn't break iteration
+        return [dict(shard) for shard in shards]
+
+
+class Counter(_Sharded):
+    type_name = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def collect(self) -> Dict[Tuple[str, ...], float]:
+        totals: Dict[Tuple[str, ...], float] = {}
+        for shard in self._snapshot_shards():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def render(self) -> Iterable[str]:
+        for labels, value in sorted(self.collect().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram(_Sharded):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # [per-bucket counts..., +Inf count, sum]
+            state = [0] * (len(self.buckets) + 1) + [0.0]
+            shard[labels] = state
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def collect(self) -> Dict[Tuple[str, ...], list]:
+        totals: Dict[Tuple[str, ...], list] = {}
+        for shard in self._snapshot_shards():
+            for labels, state in shard.items():
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = list(state)
+                else:
+                    for i, value in enumerate(state):
+                        total[i] += value
+        return totals
+
+    def render(self) -> Iterable[str]:
+        for labels, state in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = 'le="%s"' % _format_value(bound)
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(state[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Gauge:
+    """Value read from a callback at scrape time"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Optional[float]]):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self) -> Iterable[str]:
+        try:
+            value = self.callback()
+        except Exception:
+            return
+        if value is not None:
+            yield f"{self.name} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, callback: Callable[[], Optional[float]]) -> Gauge:
+        return self.register(Gauge(name, documentation, callback))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.counter(
+    "inbazar_http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "inbazar_http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+)
+db_queries_per_request = registry.histogram(
+    "inbazar_db_queries_per_request", "SQL statements executed per HTTP request", ("route",), COUNT_BUCKETS
+)
+db_time_per_request = registry.histogram(
+    "inbazar_db_time_per_request_seconds", "Time spent in SQL per HTTP request", ("route",), DB_QUERY_BUCKETS
+)
+db_query_duration = registry.histogram(
+    "inbazar_db_query_duration_seconds", "SQL statement latency", (), DB_QUERY_BUCKETS
+)
+bot_update_duration = registry.histogram(
+    "inbazar_bot_update_duration_seconds", "Telegram update handling latency by handler", ("handler",)
+)
+bot_update_errors = registry.counter(
+    "inbazar_bot_update_errors_total", "Telegram updates whose handler raised", ("handler",)
+)
+
+
+# Per-request DB accounting. The middleware puts a fresh [count, seconds]
+# list in the context; sync routes run in a threadpool with a copy of the
+# context, which still points at the same list.
+_request_db_stats: ContextVar[Optional[list]] = ContextVar("request_db_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    db_query_duration.observe(elapsed)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+def instrument_engine(engine: Engine, export_pool: bool = True) -> None:
+    """Hook query timing into an engine and optionally export its pool state"""
+    if getattr(engine, "_inbazar_instrumented", False):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    engine._inbazar_instrumented = True
+
+    if not export_pool:
+        return
+    pool = engine.pool
+    for suffix, attribute, documentation in (
+        ("size", "size", "Configured connection pool size"),
+        ("checked_out", "checkedout", "Connections currently in use"),
+        ("checked_in", "checkedin", "Idle connections in the pool"),
+        ("overflow", "overflow", "Connections opened beyond the pool size"),
+    ):
+        method = getattr(pool, attribute, None)
+        if method is not None:
+            registry.gauge(f"inbazar_db_pool_{suffix}", documentation, method)
+
+
+def route_template(scope) -> str:
+    """Path template of the route that handled the request, e.g. /products/{product_id}"""
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is not None and app is not None:
+        templates = getattr(app.state, "metrics_route_templates", None)
+        if templates is None:
+            templates = {
+                getattr(r, "endpoint", None): r.path
+                for r in app.routes
+                if getattr(r, "endpoint", None) is not None
+            }
+            app.state.metrics_route_templates = templates
+        if endpoint in templates:
+            return templates[endpoint]
+
+    # Unmatched paths would blow up label cardinality
+    return "__unmatched__"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and DB usage per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        db_stats = [0, 0.0]
+        token = _request_db_stats.set(db_stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_db_stats.reset(token)
+            route = route_template(scope)
+            method = scope.get("method", "")
+            http_requests_total.inc(method, route, str(status_holder[0]))
+            http_request_duration.observe(elapsed, method, route)
+            db_queries_per_request.observe(db_stats[0], route)
+            db_time_per_request.observe(db_stats[1], route)
+
+
+def track_bot_handler(name: str, handler):
+    """Wrap a python-telegram-bot callback to record its latency"""
+
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        try:
+            return await handler(update, context)
+        except Exception:
+            bot_update_errors.inc(name)
+            raise
+        finally:
+            bot_update_duration.observe(time.perf_counter() - started, name)
+
+    wrapper.__name__ = getattr(handler, "__name__", name)
+    wrapper.__doc__ = handler.__doc__
+    return wrapper
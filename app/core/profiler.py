@@ -0,0 +1,198 @@
+"""
+Opt-in per-request SQL profiler.
+
+Every statement a request executes is recorded with its normalized SQL and
+duration. Statements whose normalized text repeats within one request are
+reported as N+1 suspects. Totals go out in the ``X-DB-Queries`` and
+``X-DB-Time`` response headers and the last few reports are kept in memory
+for the ``/debug/queries`` endpoints.
+"""
+
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Deque, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\$\d+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Replace literals and bind parameters with ? so equal shapes compare equal"""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.route = path
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.status: Optional[int] = None
+        self.statements: List[dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, parameters, duration: float) -> None:
+        entry = {
+            "sql": normalize_sql(statement),
+            # repr() keeps identical-parameter detection cheap without
+            # holding on to the parameter objects
+            "params_key": hash(repr(parameters)),
+            "duration": duration,
+        }
+        with self._lock:
+            self.statements.append(entry)
+
+    @property
+    def query_count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def db_time(self) -> float:
+        return sum(entry["duration"] for entry in self.statements)
+
+    def report(self, repeat_threshold: int = 2) -> dict:
+        groups: "OrderedDict[str, dict]" = OrderedDict()
+        for entry in self.statements:
+            group = groups.get(entry["sql"])
+            if group is None:
+                group = {"sql": entry["sql"], "count": 0, "total_time": 0.0, "identical": 0, "_params": set()}
+                groups[entry["sql"]] = group
+            group["count"] += 1
+            group["total_time"] += entry["duration"]
+            if entry["params_key"] in group["_params"]:
+                group["identical"] += 1
+            group["_params"].add(entry["params_key"])
+
+        statements = []
+        suspects = []
+        for group in groups.values():
+            group.pop("_params")
+            group["total_time_ms"] = round(group.pop("total_time") * 1000, 3)
+            statements.append(group)
+            if group["count"] >= repeat_threshold:
+                suspects.append(group)
+
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "query_count": self.query_count,
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "n_plus_one_suspects": sorted(suspects, key=lambda g: g["count"], reverse=True),
+            "statements": statements,
+        }
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+# Most recent request profiles, newest last
+recent_profiles: Deque[RequestProfile] = deque(maxlen=200)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profiler_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is None:
+        return
+    starts = conn.info.get("profiler_start_time")
+    if not starts:
+        return
+    profile.record(statement, parameters, time.perf_counter() - starts.pop())
+
+
+def instrument_engine(engine: Engine) -> None:
+    if getattr(engine, "_inbazar_profiled", False):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    engine._inbazar_profiled = True
+
+
+def set_history_size(size: int) -> None:
+    global recent_profiles
+    if recent_profiles.maxlen != size:
+        recent_profiles = deque(recent_profiles, maxlen=size)
+
+
+def list_profiles(limit: int = 50) -> List[RequestProfile]:
+    """Newest first"""
+    return list(reversed(recent_profiles))[:limit]
+
+
+def get_profile(profile_id: str) -> Optional[RequestProfile]:
+    for profile in reversed(recent_profiles):
+        if profile.id == profile_id:
+            return profile
+    return None
+
+
+class QueryProfilerMiddleware:
+    """Pure ASGI middleware collecting every SQL statement of a request"""
+
+    def __init__(self, app, repeat_threshold: int = 2, history_size: int = 200, exclude_prefixes=("/debug/queries",)):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.exclude_prefixes = tuple(exclude_prefixes)
+        set_history_size(history_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope.get("method", ""), scope["path"])
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(profile.query_count).encode()))
+                headers.append((b"x-db-time", f"{profile.db_time * 1000:.3f}ms".encode()))
+                headers.append((b"x-db-profile-id", profile.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            profile.route = route_template(scope)
+            profile.duration = time.perf_counter() - started
+            recent_profiles.append(profile)
+
+            suspects = profile.report(self.repeat_threshold)["n_plus_one_suspects"]
+            if suspects:
+                worst = suspects[0]
+                logger.warning(
+                    "⚠️  N+1 gumon: %s %s - %dx %s",
+                    profile.method, profile.path, worst["count"], worst["sql"][:120]
+                )
@@ -0,0 +1,309 @@
+"""
+Small asyncio scheduler for periodic maintenance jobs.
+
+Jobs are plain synchronous functions. The scheduler only decides *when* to
+run them; the work itself happens in a thread or process pool so it never
+blocks the event loop serving requests. Each job keeps its own run metrics
+(last duration, failures, timeouts) for the admin API.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import random
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class IntervalSchedule:
+    """Run every N seconds"""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+
+    def next_after(self, moment: datetime) -> datetime:
+        return moment + timedelta(seconds=self.seconds)
+
+    def __str__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+class CronSchedule:
+    """Classic 5-field cron expression (minute hour day month weekday), in UTC.
+
+    Supports ``*``, single values, ranges ``a-b``, steps ``*/n`` / ``a-b/n``
+    and comma separated lists. Weekday 0 (or 7) is Sunday.
+    """
+
+    _RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        parsed = [self._parse_field(field, low, high) for field, (low, high) in zip(fields, self._RANGES)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = parsed
+        # Standard cron: if both day fields are restricted either may match
+        self._day_or = fields[2] != "*" and fields[4] != "*"
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                step = int(step_text)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start_text, end_text = part.split("-", 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = end = int(part)
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field {field!r}")
+            values.update(range(start, end + 1, step))
+        if high == 7:  # weekday: 7 is Sunday as well
+            values = {value % 7 for value in values}
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        # Python: Monday=0; cron: Sunday=0
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._day_or:
+            return day_ok or weekday_ok
+        return (self._any_day or day_ok) and (self._any_weekday or weekday_ok)
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year = candidate.year + (candidate.month == 12)
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+    def __str__(self) -> str:
+        return f"cron {self.expression}"
+
+
+class Job:
+    def __init__(
+            self,
+            name: str,
+            func: Callable[[], Any],
+            schedule,
+            jitter: float = 0.0,
+            timeout: Optional[float] = None,
+            executor: str = "thread",
+            run_on_start: bool = False
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError("executor must be 'thread' or 'process'")
+        self.name = name
+        self.func = func
+        self.schedule = schedule
+        self.jitter = jitter
+        self.timeout = timeout
+        self.executor = executor
+        self.run_on_start = run_on_start
+
+        # Metrics
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.running = False
+        self.last_duration: Optional[float] = None
+        self.last_started_at: Optional[datetime] = None
+        self.last_finished_at: Optional[datetime] = None
+        self.last_result: Any = None
+        self.last_error: Optional[str] = None
+        self.next_run_at: Optional[datetime] = None
+        self._future: Optional[Future] = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "schedule": str(self.schedule),
+            "executor": self.executor,
+            "timeout": self.timeout,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "last_duration": self.last_duration,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_finished_at": self.last_finished_at.isoformat() if self.last_finished_at else None,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+            "next_run_at": self.next_run_at.isoformat() if self.next_run_at else None,
+        }
+
+
+class Scheduler:
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self.jobs: Dict[str, Job] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def add_job(
+            self,
+            name: str,
+            func: Callable[[], Any],
+            interval: Optional[float] = None,
+            cron: Optional[str] = None,
+            jitter: float = 0.0,
+            timeout: Optional[float] = None,
+            executor: str = "thread",
+            run_on_start: bool = False
+    ) -> Job:
+        """Register a job with either an interval (seconds) or a cron expression.
+
+        Process-pool jobs must be module-level functions so they can be pickled.
+        """
+        if (interval is None) == (cron is None):
+            raise ValueError("Give exactly one of interval or cron")
+        if name in self.jobs:
+            raise ValueError(f"Job {name!r} already registered")
+        schedule = IntervalSchedule(interval) if interval is not None else CronSchedule(cron)
+        job = Job(name, func, schedule, jitter, timeout, executor, run_on_start)
+        self.jobs[name] = job
+        return job
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scheduler")
+        self._tasks = [asyncio.create_task(self._job_loop(job)) for job in self.jobs.values()]
+        logger.info("⏱  Scheduler ishga tushdi: %d ta job", len(self.jobs))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in self.jobs.values():
+            # running is cleared when a job's work actually ends (see _execute)
+            job.next_run_at = None
+        # Don't wait for stuck jobs; their results are no longer wanted
+        if self._thread_pool:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+        if self._process_pool:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    async def run_job(self, name: str) -> Job:
+        """Run a job once right now, outside its schedule"""
+        job = self.jobs[name]
+        await self._execute(job)
+        return job
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        return [job.metrics() for job in self.jobs.values()]
+
+    def _get_executor(self, job: Job) -> Executor:
+        if job.executor == "process":
+            if self._process_pool is None:
+                # spawn: children must not inherit the event loop or pooled DB connections
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._process_pool
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scheduler")
+        return self._thread_pool
+
+    async def _job_loop(self, job: Job) -> None:
+        now = datetime.now(timezone.utc)
+        next_run = now if job.run_on_start else job.schedule.next_after(now)
+        while True:
+            # Jitter spreads jobs that share a schedule across the interval
+            delay = (next_run - datetime.now(timezone.utc)).total_seconds() + random.uniform(0, job.jitter)
+            job.next_run_at = datetime.now(timezone.utc) + timedelta(seconds=max(delay, 0))
+            await asyncio.sleep(max(delay, 0))
+            await self._execute(job)
+            next_run = job.schedule.next_after(datetime.now(timezone.utc))
+
+    async def _execute(self, job: Job) -> None:
+        if job.running:
+            return
+        loop = asyncio.get_running_loop()
+        job.running = True
+        job.runs += 1
+        job.last_started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        future = None
+        try:
+            future = job._future = self._get_executor(job).submit(job.func)
+            # A timed out thread (or process) can't be killed and keeps working;
+            # the job stays running until it ends so no second run overlaps it
+            future.add_done_callback(lambda done: self._release(loop, job, done))
+            job.last_result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=job.timeout)
+            job.last_error = None
+        except asyncio.TimeoutError:
+            job.timeouts += 1
+            job.failures += 1
+            job.last_error = f"Timed out after {job.timeout}s"
+            logger.warning("⚠️  Job %s vaqt tugadi (%ss)", job.name, job.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            job.last_error = f"{type(e).__name__}: {e}"
+            logger.error("❌ Job %s xatosi: %s", job.name, job.last_error, exc_info=e)
+        finally:
+            if future is None or future.done():
+                job.running = False
+            job.last_duration = time.perf_counter() - started
+            job.last_finished_at = datetime.now(timezone.utc)
+
+    @staticmethod
+    def _release(loop: asyncio.AbstractEventLoop, job: Job, future: Future) -> None:
+        """Done callback of a job's future, called from the pool's thread"""
+        def release():
+            # A later run may already own the job
+            if job._future is future:
+                job.running = False
+
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:  # Loop closed
+            release()
+
+
+# Global scheduler instance, running on the leader only
+scheduler = Scheduler(max_workers=settings.scheduler_max_workers)
+# Runs in every worker; its jobs coordinate between the workers of a host themselves
+host_scheduler = Scheduler(max_workers=1)
@@ -0,0 +1,106 @@
+"""
+In-process trigram index for product search where pg_trgm isn't available.
+
+Does what Postgres does with the GIN index on product_search_documents: a
+product matches when at least ``threshold`` of the query's trigrams occur
+in its search document, and matches are ranked by that share. Each trigram
+has a NumPy array of the products containing it; a search counts matches
+with one bincount over the query's arrays, so it only touches products
+sharing a trigram with the query, never the whole catalog.
+
+Products are numbered in the arrays. A changed product gets a new number
+and the old one is marked dead until the next rebuild.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from app.core.index import InMemoryIndex, register
+from app.utils.text import search_document, trigrams
+
+# Ranked matches are checked against the SQL filters this many ids per query
+MAX_MATCHES = 1000
+
+
+class TrigramIndex(InMemoryIndex):
+    name = "search"
+    _STATE = ("_ids", "_numbers", "_postings", "_alive")
+
+    def __init__(self):
+        super().__init__()
+        self._ids: List[Optional[UUID]] = []
+        self._numbers: Dict[UUID, int] = {}
+        self._postings: Dict[str, object] = {}  # trigram -> int32 array of numbers (lists while filling)
+        self._alive = None  # bool array by number
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def search(self, query: str, threshold: float, limit: Optional[int] = None) -> List[Tuple[UUID, float]]:
+        """(product id, similarity) of the best ``limit`` matches (all by default), best first"""
+        import numpy as np
+
+        wanted = trigrams(query)
+        if not wanted:
+            return []
+        needed = max(1, math.ceil(threshold * len(wanted)))
+        with self._lock:
+            arrays = [self._postings[gram] for gram in wanted if gram in self._postings]
+            if len(arrays) < needed:
+                return []
+            counts = np.bincount(np.concatenate(arrays), minlength=len(self._ids))
+            counts[~self._alive] = 0
+            hits = np.flatnonzero(counts >= needed)
+            if limit is not None and len(hits) > limit:
+                hits = hits[np.argpartition(-counts[hits], limit - 1)[:limit]]
+            hits = hits[np.argsort(-counts[hits], kind="stable")]
+            return [(self._ids[number], float(counts[number]) / len(wanted)) for number in hits]
+
+    # Changes; callers hold the lock
+
+    def _put(self, product_id: UUID, document: str) -> None:
+        import numpy as np
+
+        self._drop(product_id)
+        number = len(self._ids)
+        self._ids.append(product_id)
+        self._numbers[product_id] = number
+        self._alive = np.append(self._alive, True)
+        added = np.array([number], dtype=np.int32)
+        for gram in trigrams(document):
+            posting = self._postings.get(gram)
+            self._postings[gram] = added if posting is None else np.concatenate([posting, added])
+
+    def _drop(self, product_id: UUID) -> None:
+        number = self._numbers.pop(product_id, None)
+        if number is not None:
+            self._ids[number] = None
+            self._alive[number] = False
+
+    def upsert_product(self, product) -> None:
+        self._apply("_put", product.id, search_document(product.name, product.tags, product.colors))
+
+    def remove_product(self, product_id: UUID) -> None:
+        self._apply("_drop", product_id)
+
+    # Building; inactive products are indexed too, callers filter
+
+    def _load(self, db):
+        from app.models.product import Product
+
+        return db.query(Product.id, Product.name, Product.tags, Product.colors).all()
+
+    def _fill(self, rows) -> None:
+        import numpy as np
+
+        postings: Dict[str, List[int]] = {}
+        for number, row in enumerate(rows):
+            self._ids.append(row.id)
+            self._numbers[row.id] = number
+            for gram in trigrams(search_document(row.name, row.tags, row.colors)):
+                postings.setdefault(gram, []).append(number)
+        self._postings = {gram: np.array(numbers, dtype=np.int32) for gram, numbers in postings.items()}
+        self._alive = np.ones(len(self._ids), dtype=bool)
+
+
+search_index = register(TrigramIndex())
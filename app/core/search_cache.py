@@ -0,0 +1,106 @@
+"""
+Result cache for ``GET /products?search=``.
+
+Maps (folded query, gender, category, page) to the product ids found, so a
+repeated search is a dict lookup plus a primary-key fetch. Entries are
+evicted least recently used beyond ``max_entries`` and expire after
+``ttl`` seconds. Catalog writes through this worker bump ``version`` and
+drop every entry; writes through other workers show up within the TTL.
+
+Also counts searches per folded query for the admin popular-queries
+report. Both are per worker.
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Hashable, List, Optional
+from uuid import UUID
+from app.config import settings
+from app.core.index import register
+
+
+class SearchCache:
+    def __init__(self, max_entries: int = 1000, ttl: float = 60.0, max_tracked_queries: int = 1000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_tracked_queries = max_tracked_queries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.version = 0
+        self._queries: Counter = Counter()
+        self.hits = 0
+        self.misses = 0
+        self.since = datetime.now(timezone.utc)
+
+    def lookup(self, key: Hashable, query: str) -> Optional[List[UUID]]:
+        """Cached ids for the key, or None; counts the search either way"""
+        now = time.monotonic()
+        with self._lock:
+            self._count(query)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def store(self, key: Hashable, product_ids: List[UUID], version: int) -> None:
+        """Cache ids computed while ``version`` was current; dropped if the catalog changed meanwhile"""
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, product_ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def _count(self, query: str) -> None:
+        self._queries[query] += 1
+        # Bounded: keep the most searched half when the tail grows too long
+        if len(self._queries) > 2 * self.max_tracked_queries:
+            self._queries = Counter(dict(self._queries.most_common(self.max_tracked_queries)))
+
+    def report(self, limit: int = 20) -> dict:
+        with self._lock:
+            searches = self.hits + self.misses
+            return {
+                "since": self.since.isoformat(),
+                "searches": searches,
+                "cache_hit_rate": round(self.hits / searches, 3) if searches else None,
+                "cached_entries": len(self._entries),
+                "catalog_version": self.version,
+                "queries": [
+                    {"query": query, "count": count} for query, count in self._queries.most_common(limit)
+                ],
+            }
+
+    # Catalog write hooks (app.core.index)
+
+    def upsert_product(self, product) -> None:
+        self.invalidate()
+
+    def remove_product(self, product_id: UUID) -> None:
+        self.invalidate()
+
+    def set_category(self, category) -> None:
+        self.invalidate()
+
+    def remove_category(self, category_id: UUID) -> None:
+        self.invalidate()
+
+
+search_cache = register(SearchCache(
+    max_entries=settings.search_cache_size,
+    ttl=settings.search_cache_ttl,
+    max_tracked_queries=settings.search_popular_queries_tracked
+))
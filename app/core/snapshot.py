@@ -0,0 +1,94 @@
+"""
+Gzipped NDJSON snapshot of the active catalog behind ``GET /catalog/snapshot``.
+
+Each line is a catalog change (app.schemas.catalog.CatalogChangeResponse)
+upserting one category or active product, so clients load a snapshot with
+the same code that applies ``/catalog/changes``. A snapshot file is named
+after the change log position it was built at; the build_catalog_snapshot
+job writes a new one when that position moves and removes the older ones.
+"""
+
+import gzip
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+_NAME = re.compile(r"^catalog-(\d+)-(\d+)\.ndjson\.gz$")
+
+
+@dataclass
+class Snapshot:
+    path: Path
+    version: int  # Change log position
+    built_at: int  # Unix time
+    size: int
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}-{self.built_at}"'
+
+
+def latest_snapshot(directory: str) -> Optional[Snapshot]:
+    latest = None
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return None
+    with entries:
+        for entry in entries:
+            match = _NAME.match(entry.name)
+            if match:
+                version, built_at = int(match.group(1)), int(match.group(2))
+                if latest is None or (version, built_at) > (latest.version, latest.built_at):
+                    latest = Snapshot(Path(entry.path), version, built_at, entry.stat().st_size)
+    return latest
+
+
+def build_snapshot(db, directory: str, version: int, batch_size: int = 1000) -> Snapshot:
+    """
+    Stream categories and active products into a new snapshot file. Read
+    ``version`` before calling: writes landing during the build may already
+    be in the file, and clients then get them again as changes (upserts are
+    idempotent), but none can be missed.
+    """
+    from app.models.category import Category
+    from app.models.product import Product
+    from app.schemas.catalog import CatalogChangeResponse
+
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    built_at = int(time.time())
+    path = Path(directory) / f"catalog-{version}-{built_at}.ndjson.gz"
+    # Written aside and renamed, so readers only ever see complete files
+    fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as out:
+            for category in db.query(Category).order_by(Category.name):
+                line = CatalogChangeResponse(entity="category", id=category.id, op="upsert", category=category)
+                out.write(line.model_dump_json(exclude_none=True).encode() + b"\n")
+            products = db.query(Product).filter(Product.is_active == True).order_by(Product.id).yield_per(batch_size)
+            for product in products:
+                line = CatalogChangeResponse(entity="product", id=product.id, op="upsert", product=product)
+                out.write(line.model_dump_json(exclude_none=True).encode() + b"\n")
+        os.chmod(temporary, 0o644)  # mkstemp creates it private
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return Snapshot(path, version, built_at, path.stat().st_size)
+
+
+def remove_old_snapshots(directory: str, keep: Snapshot) -> int:
+    """
+    Delete every snapshot but ``keep``. GET /catalog/snapshot opens the file
+    before answering, so downloads already being served keep reading it.
+    """
+    removed = 0
+    for entry in os.scandir(directory):
+        if _NAME.match(entry.name) and entry.path != str(keep.path):
+            os.unlink(entry.path)
+            removed += 1
+    return removed
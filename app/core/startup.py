@@ -0,0 +1,74 @@
+"""
+Cold-start timing.
+
+``timer.mark(name)`` records when a milestone is reached, counted from
+process creation, and ``timer.phase(name)`` times one startup step.
+``timer.finish()`` runs once the app can serve requests: it logs the report
+and warns when the total exceeds the budget. ``python -m benchmarks.coldstart`` adds per-module
+import times and fails when a fresh process goes over budget.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _process_age() -> Optional[float]:
+    """Seconds since this process was created (Linux only)"""
+    try:
+        with open(f"/proc/{os.getpid()}/stat") as f:
+            # Field 22, counted after the parenthesised command name
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(uptime - started_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupTimer:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.before_origin = _process_age()
+        self.phases: Dict[str, float] = {}
+        self.marks: Dict[str, float] = {}
+        self.ready_at: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def _since_process_start(self, at: float) -> float:
+        return (self.before_origin or 0.0) + at - self.origin
+
+    def mark(self, name: str) -> None:
+        """Record how long after process start a milestone was reached"""
+        self.marks[name] = self._since_process_start(time.perf_counter())
+
+    def report(self) -> dict:
+        end = self.ready_at if self.ready_at is not None else time.perf_counter()
+        return {
+            "total_ms": round(self._since_process_start(end) * 1000, 1),
+            "marks_ms": {name: round(seconds * 1000, 1) for name, seconds in self.marks.items()},
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+        }
+
+    def finish(self, budget_ms: Optional[float] = None) -> dict:
+        if self.ready_at is None:
+            self.ready_at = time.perf_counter()
+        report = self.report()
+        logger.info("🚀 Startup %.0fms", report["total_ms"], extra={"startup": report})
+        if budget_ms and report["total_ms"] > budget_ms:
+            logger.warning("⚠️  Cold start %.0fms exceeds budget %.0fms", report["total_ms"], budget_ms)
+        return report
+
+
+timer = StartupTimer()
@@ -0,0 +1,302 @@
+"""
+Typeahead index behind ``GET /products/suggest``.
+
+Product names, tags and category names live in one sorted list of
+``(key, ref)`` pairs, so every suggestion starting with a prefix is a
+contiguous range found with bisect. Names are indexed from each word, so
+"ko" also finds "Qora ko'ylak". Results are ranked by popularity (clicks,
+likes and bookmarks; summed over the products of a tag or category).
+
+Keys are folded (app.utils.text.fold), so "ку" finds "Kurtka" and "kuylak"
+or "ko'y" find "Ko‘ylak". Rebuilt every SUGGEST_REBUILD_INTERVAL seconds
+and kept current between rebuilds as described in app.core.index.
+"""
+
+import heapq
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+from app.core.index import InMemoryIndex, register
+from app.utils.text import fold
+
+CACHED_RESULTS = 20
+# Prefixes up to this length are ranked ahead of time, not on first use
+SHORT_PREFIX = 2
+# Other one/two-word prefixes are cached when they match, least recently used beyond this
+MAX_CACHED_PREFIXES = 10_000
+# Multi-word prefixes are cached too, up to this many before the cache is cleared
+MAX_CACHED_PHRASES = 10_000
+
+Ref = Tuple[str, object]
+
+
+def _word_starts(text: str) -> Set[str]:
+    """The text from the start of each of its words"""
+    words = text.split(" ")
+    return {" ".join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+def _heads(key: str) -> Set[str]:
+    """First word and first two words of a key"""
+    words = key.split(" ", 2)
+    return {words[0], " ".join(words[:2])}
+
+
+def popularity(click_count: int, like_count: int, bookmark_count: int) -> float:
+    # +1 so a brand new product still outranks nothing
+    return 1.0 + (click_count or 0) + 3 * (like_count or 0) + 2 * (bookmark_count or 0)
+
+
+@dataclass
+class Suggestion:
+    text: str
+    kind: str  # "product", "tag" or "category"
+    id: Optional[UUID]
+    weight: float
+
+
+@dataclass
+class _ProductTerms:
+    tags: List[str]
+    category_id: UUID
+    weight: float
+
+
+class SuggestIndex(InMemoryIndex):
+    """
+    Keys are also grouped by their first word and first two words ("heads"),
+    each keeping its top results. A prefix of one or two words merges the
+    tops of the (few) heads it covers, which is cheap however many products
+    share a word; longer prefixes are a bisect range over the full keys.
+    """
+
+    name = "suggest"
+    _STATE = ("_keys", "_entries", "_entry_keys", "_words", "_pairs", "_head_refs", "_head_top",
+              "_top", "_phrases", "_products", "_tag_products")
+
+    def __init__(self):
+        super().__init__()
+        self._keys: List[Tuple[str, Ref]] = []  # Sorted (key, ref)
+        self._entries: Dict[Ref, Suggestion] = {}
+        self._entry_keys: Dict[Ref, Set[str]] = {}
+        self._words: List[str] = []  # Sorted one-word heads
+        self._pairs: List[str] = []  # Sorted two-word heads
+        self._head_refs: Dict[str, Dict[Ref, int]] = {}
+        self._head_top: Dict[str, List[Ref]] = {}
+        self._top: "OrderedDict[str, List[Ref]]" = OrderedDict()
+        self._phrases: Dict[str, List[Ref]] = {}
+        self._products: Dict[UUID, _ProductTerms] = {}
+        self._tag_products: Dict[str, int] = {}
+        self._dirty: Set[str] = set()
+        self._bulk = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Queries
+
+    def search(self, query: str, limit: int = 10) -> List[Suggestion]:
+        prefix = fold(query)
+        if not prefix:
+            return []
+        with self._lock:
+            if prefix.count(" ") > 1:
+                refs = self._phrases.get(prefix)
+                if refs is None:
+                    if len(self._phrases) >= MAX_CACHED_PHRASES:
+                        self._phrases.clear()
+                    refs = self._phrases[prefix] = self._rank_phrase(prefix)
+            else:
+                refs = self._top.get(prefix)
+                if refs is None:
+                    refs = self._rank_heads(prefix)
+                    self._cache_top(prefix, refs)
+                else:
+                    self._top.move_to_end(prefix)
+            return [self._entries[ref] for ref in refs[:limit]]
+
+    def _cache_top(self, prefix: str, refs: List[Ref]) -> None:
+        # Misses aren't cached, so random input can't grow the cache
+        if refs:
+            self._top[prefix] = refs
+            if len(self._top) > MAX_CACHED_PREFIXES:
+                self._top.popitem(last=False)
+
+    def _best(self, refs: Iterable[Ref]) -> List[Ref]:
+        return heapq.nlargest(CACHED_RESULTS, set(refs), key=lambda ref: self._entries[ref].weight)
+
+    def _rank_heads(self, prefix: str) -> List[Ref]:
+        heads = self._pairs if " " in prefix else self._words
+        position = bisect_left(heads, prefix)
+        candidates = []
+        while position < len(heads) and heads[position].startswith(prefix):
+            candidates.extend(self._head_top[heads[position]])
+            position += 1
+        return self._best(candidates)
+
+    def _rank_phrase(self, prefix: str) -> List[Ref]:
+        keys = self._keys
+        position = bisect_left(keys, (prefix,))
+        candidates = []
+        while position < len(keys) and keys[position][0].startswith(prefix):
+            candidates.append(keys[position][1])
+            position += 1
+        return self._best(candidates)
+
+    # Changes; callers hold the lock and call _refresh() afterwards
+
+    def _put(self, ref: Ref, text: str, kind: str, entry_id: Optional[UUID], weight: float, keys: Set[str]) -> None:
+        self._drop(ref)
+        self._entries[ref] = Suggestion(text=text, kind=kind, id=entry_id, weight=weight)
+        self._entry_keys[ref] = keys
+        for key in keys:
+            if self._bulk:
+                self._keys.append((key, ref))
+            else:
+                insort(self._keys, (key, ref))
+            for head in _heads(key):
+                refs = self._head_refs.get(head)
+                if refs is None:
+                    refs = self._head_refs[head] = {}
+                    if not self._bulk:
+                        insort(self._pairs if " " in head else self._words, head)
+                refs[ref] = refs.get(ref, 0) + 1
+                self._dirty.add(head)
+
+    def _drop(self, ref: Ref) -> None:
+        keys = self._entry_keys.pop(ref, None)
+        if keys is None:
+            return
+        del self._entries[ref]
+        for key in keys:
+            position = bisect_left(self._keys, (key, ref))
+            if position < len(self._keys) and self._keys[position] == (key, ref):
+                del self._keys[position]
+            for head in _heads(key):
+                refs = self._head_refs[head]
+                refs[ref] -= 1
+                if not refs[ref]:
+                    del refs[ref]
+                if not refs:
+                    del self._head_refs[head]
+                    heads = self._pairs if " " in head else self._words
+                    del heads[bisect_left(heads, head)]
+                self._dirty.add(head)
+
+    def _reweigh(self, ref: Ref, delta: float) -> None:
+        entry = self._entries.get(ref)
+        if entry:
+            entry.weight += delta
+            for key in self._entry_keys[ref]:
+                self._dirty.update(_heads(key))
+
+    def _refresh(self) -> None:
+        """Re-rank the heads touched since the last call and the prefixes covering them"""
+        if not self._dirty:
+            return
+        self._phrases = {}
+        prefixes = set()
+        for head in self._dirty:
+            refs = self._head_refs.get(head)
+            if refs:
+                self._head_top[head] = self._best(refs)
+            else:
+                self._head_top.pop(head, None)
+            for length in range(1, len(head) + 1):
+                self._top.pop(head[:length], None)
+            if " " not in head:
+                prefixes.update(head[:length] for length in range(1, min(len(head), SHORT_PREFIX) + 1))
+        self._dirty = set()
+        for prefix in prefixes:
+            self._cache_top(prefix, self._rank_heads(prefix))
+
+    def _add_product(self, product_id: UUID, name: str, tags: List[str], category_id: UUID, weight: float) -> None:
+        self._put(("product", product_id), name, "product", product_id, weight, _word_starts(fold(name)))
+        # Folded tag -> the spelling shown
+        spellings = {}
+        for tag in tags or []:
+            if fold(tag):
+                spellings.setdefault(fold(tag), tag)
+        terms = _ProductTerms(tags=sorted(spellings), category_id=category_id, weight=weight)
+        self._products[product_id] = terms
+        for tag in terms.tags:
+            self._tag_products[tag] = self._tag_products.get(tag, 0) + 1
+            if ("tag", tag) in self._entries:
+                self._reweigh(("tag", tag), weight)
+            else:
+                self._put(("tag", tag), spellings[tag], "tag", None, weight, {tag})
+        self._reweigh(("category", category_id), weight)
+
+    def _remove_product(self, product_id: UUID) -> None:
+        terms = self._products.pop(product_id, None)
+        if terms is None:
+            return
+        self._drop(("product", product_id))
+        for tag in terms.tags:
+            self._tag_products[tag] -= 1
+            if self._tag_products[tag] == 0:
+                del self._tag_products[tag]
+                self._drop(("tag", tag))
+            else:
+                self._reweigh(("tag", tag), -terms.weight)
+        self._reweigh(("category", terms.category_id), -terms.weight)
+
+    def _set_category(self, category_id: UUID, name: str) -> None:
+        entry = self._entries.get(("category", category_id))
+        weight = entry.weight if entry else sum(
+            terms.weight for terms in self._products.values() if terms.category_id == category_id
+        )
+        self._put(("category", category_id), name, "category", category_id, weight, _word_starts(fold(name)))
+
+    # Admin write hooks
+
+    def upsert_product(self, product) -> None:
+        self._apply("_remove_product", product.id)
+        if product.is_active:
+            self._apply(
+                "_add_product", product.id, product.name, list(product.tags or []), product.category_id,
+                popularity(product.click_count, product.like_count, product.bookmark_count)
+            )
+
+    def remove_product(self, product_id: UUID) -> None:
+        self._apply("_remove_product", product_id)
+
+    def set_category(self, category) -> None:
+        self._apply("_set_category", category.id, category.name)
+
+    def remove_category(self, category_id: UUID) -> None:
+        self._apply("_drop", ("category", category_id))
+
+    # Building
+
+    def _load(self, db):
+        from app.models.category import Category
+        from app.models.product import Product
+
+        categories = db.query(Category.id, Category.name).all()
+        products = db.query(
+            Product.id, Product.name, Product.tags, Product.category_id,
+            Product.click_count, Product.like_count, Product.bookmark_count
+        ).filter(Product.is_active == True).all()
+        return categories, products
+
+    def _fill(self, data) -> None:
+        categories, products = data
+        # Keys are appended unsorted and sorted once
+        self._bulk = True
+        for category in categories:
+            self._set_category(category.id, category.name)
+        for product in products:
+            self._add_product(
+                product.id, product.name, product.tags, product.category_id,
+                popularity(product.click_count, product.like_count, product.bookmark_count)
+            )
+        self._keys.sort()
+        self._words = sorted(head for head in self._head_refs if " " not in head)
+        self._pairs = sorted(head for head in self._head_refs if " " in head)
+        self._bulk = False
+
+
+suggest_index = register(SuggestIndex())
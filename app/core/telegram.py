@@ -1,9 +1,13 @@
+import logging
 from typing import Optional
 from app.config import settings
+from app.core.log import mask_phone
+
+logger = logging.getLogger(__name__)
 
 # Try to import bot database functions
 try:
-    from app.database import SessionLocal
+    from app import database
     from app.crud.bot_user import verify_otp_code as verify_otp_db, get_bot_user_by_phone
 
     BOT_DB_AVAILABLE = True
@@ -14,22 +18,19 @@ except ImportError:
 def verify_otp_code_sync(phone_number: str, code: str) -> bool:
     """Verify OTP code using PostgreSQL database"""
     if not BOT_DB_AVAILABLE:
-        print("Bot DB not available, using fallback")
+        logger.warning("Bot DB not available, using fallback OTP check")
         # Fallback: accept any 6-digit code for testing
         return code.isdigit() and len(code) == 6
 
-    db = SessionLocal()
+    db = database.SessionLocal()
     try:
         # Format phone number
         if not phone_number.startswith('+'):
             phone_number = '+' + phone_number
 
-        print(f"Verifying OTP for {phone_number} with code {code}")
-        result = verify_otp_db(db, phone_number, code)
-        print(f"OTP verification result: {result}")
-        return result
-    except Exception as e:
-        print(f"Error in sync OTP verification: {e}")
+        return verify_otp_db(db, phone_number, code)
+    except Exception:
+        logger.exception("OTP verification failed")
         return False
     finally:
         db.close()
@@ -40,30 +41,27 @@ def get_user_by_phone_sync(phone_number: str) -> Optional[dict]:
     if not BOT_DB_AVAILABLE:
         return None
 
-    db = SessionLocal()
+    db = database.SessionLocal()
     try:
         if not phone_number.startswith('+'):
             phone_number = '+' + phone_number
 
-        print(f"Looking up user by phone: {phone_number}")
         bot_user = get_bot_user_by_phone(db, phone_number)
 
         if bot_user:
-            user_data = {
+            return {
                 'telegram_id': bot_user.telegram_id,
                 'username': bot_user.username,
                 'first_name': bot_user.first_name,
                 'last_name': bot_user.last_name,
                 'phone_number': bot_user.phone_number
             }
-            print(f"Found user: {user_data}")
-            return user_data
         else:
-            print("No user found for phone number")
+            logger.info("No bot user for phone", extra={"phone": mask_phone(phone_number)})
             return None
 
-    except Exception as e:
-        print(f"Error getting user by phone: {e}")
+    except Exception:
+        logger.exception("Bot user lookup failed")
         return None
     finally:
         db.close()
@@ -71,4 +69,4 @@ def get_user_by_phone_sync(phone_number: str) -> Optional[dict]:
 
 def get_telegram_bot_url() -> str:
     """Get Telegram bot URL for user to start conversation"""
-    return f"https://t.me/{settings.telegram_bot_username}"
\ No newline at end of file
+    return f"https://t.me/{settings.telegram_bot_username}"
@@ -0,0 +1,162 @@
+"""
+Optional traffic capture for realistic load tests.
+
+Each request becomes one sanitized JSON line: route template, path and query
+parameters, status and timing. Bodies, tokens and OTP codes are never
+written; an authenticated caller only appears as a keyed hash so the
+replayer can keep one user's requests together. Lines are handed to a
+writer thread, which appends them to gzip files that rotate by size and
+keeps the newest few.
+"""
+
+import glob
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from app.core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that must never reach the capture files
+SENSITIVE_PARAMS = {"token", "access_token", "code", "otp", "secret", "password", "phone_number", "phone"}
+# Routes whose parameters are dropped entirely
+SENSITIVE_PREFIXES = ("/auth", "/debug", "/bot/webhook")
+
+
+class TrafficLogWriter:
+    """Background thread appending records to rotating gzip JSONL files"""
+
+    def __init__(self, directory: str, max_bytes: int = 50 * 1024 * 1024, max_files: int = 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._queue: "queue.SimpleQueue[Optional[dict]]" = queue.SimpleQueue()
+        self._file = None
+        self._written = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="traffic-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def write(self, record: dict) -> None:
+        if self._thread is None:
+            self.start()
+        self._queue.put(record)
+
+    def _open(self) -> None:
+        name = datetime.now(timezone.utc).strftime("traffic-%Y%m%dT%H%M%S%fZ") + f"-{os.getpid()}.jsonl.gz"
+        self._file = gzip.open(os.path.join(self.directory, name), "wt", encoding="utf-8")
+        self._written = 0
+        self._prune()
+
+    def _prune(self) -> None:
+        files = sorted(glob.glob(os.path.join(self.directory, "traffic-*.jsonl.gz")))
+        for path in files[:-self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _rotate(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+        self._open()
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            try:
+                if self._file is None or self._written >= self.max_bytes:
+                    self._rotate()
+                line = json.dumps(record, separators=(",", ":")) + "\n"
+                self._file.write(line)
+                # Uncompressed size; rotation is approximate by design
+                self._written += len(line)
+                if self._queue.empty():
+                    self._file.flush()
+            except Exception:
+                logger.exception("❌ Traffic yozishda xatolik")
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def _sanitize_query(query_string: bytes) -> dict:
+    params = {}
+    for key, value in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True):
+        if key.lower() in SENSITIVE_PARAMS:
+            continue
+        params.setdefault(key, []).append(value)
+    return {key: values[0] if len(values) == 1 else values for key, values in params.items()}
+
+
+class TrafficCaptureMiddleware:
+    """Pure ASGI middleware recording one sanitized trace per request"""
+
+    def __init__(self, app, writer: TrafficLogWriter, secret_key: str, sample_rate: float = 1.0):
+        self.app = app
+        self.writer = writer
+        self.secret_key = secret_key.encode()
+        self.sample_rate = sample_rate
+
+    def _user_key(self, scope) -> Optional[str]:
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                # Keyed hash: stable per caller, useless as a credential
+                return hmac.new(self.secret_key, value, hashlib.sha256).hexdigest()[:16]
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        timestamp = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            path = scope["path"]
+            sensitive = path.startswith(SENSITIVE_PREFIXES)
+            self.writer.write({
+                "ts": round(timestamp, 6),
+                "method": scope.get("method", ""),
+                "route": route_template(scope),
+                "path_params": {} if sensitive else {k: str(v) for k, v in scope.get("path_params", {}).items()},
+                "query": {} if sensitive else _sanitize_query(scope.get("query_string", b"")),
+                "user": self._user_key(scope),
+                "status": status_holder[0],
+                "duration_ms": round(duration * 1000, 3),
+            })
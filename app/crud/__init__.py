@@ -2,6 +2,9 @@
 from . import user
 from . import product
 from . import category
+from . import analytics
+from . import product_view
+from . import feed
 
 # Import bot CRUD if available
 try:
@@ -0,0 +1,60 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import Optional
+from app.models.analytics import AnalyticsSnapshot
+from app.models.category import Category
+from app.models.product import Product
+from app.models.user import User
+
+
+def compute_analytics(db: Session) -> dict:
+    # Basic counts
+    total_users = db.query(func.count(User.id)).scalar()
+    total_categories = db.query(func.count(Category.id)).scalar()
+
+    # Product counts and stats in a single pass over products
+    product_stats = db.query(
+        func.count(Product.id),
+        func.count(Product.id).filter(Product.is_active == True),
+        func.coalesce(func.sum(Product.click_count), 0),
+        func.coalesce(func.sum(Product.like_count), 0),
+        func.coalesce(func.sum(Product.bookmark_count), 0)
+    ).one()
+
+    return {
+        "total_users": total_users,
+        "total_products": product_stats[0],
+        "active_products": product_stats[1],
+        "total_categories": total_categories,
+        "total_clicks": int(product_stats[2]),
+        "total_likes": int(product_stats[3]),
+        "total_bookmarks": int(product_stats[4])
+    }
+
+
+def get_latest_snapshot(db: Session) -> Optional[AnalyticsSnapshot]:
+    return db.query(AnalyticsSnapshot).order_by(AnalyticsSnapshot.created_at.desc()).first()
+
+
+def create_snapshot(db: Session) -> AnalyticsSnapshot:
+    snapshot = AnalyticsSnapshot(data=compute_analytics(db))
+    db.add(snapshot)
+    db.commit()
+    db.refresh(snapshot)
+    return snapshot
+
+
+def delete_old_snapshots(db: Session, keep: int = 100) -> int:
+    """Keep only the newest `keep` snapshots"""
+    cutoff = (
+        db.query(AnalyticsSnapshot.id)
+        .order_by(AnalyticsSnapshot.created_at.desc())
+        .offset(keep)
+        .limit(1)
+        .scalar()
+    )
+    if cutoff is None:
+        return 0
+    deleted = db.query(AnalyticsSnapshot).filter(AnalyticsSnapshot.id <= cutoff).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -1,8 +1,14 @@
+import logging
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime, timedelta, timezone
+from app.core.log import mask_phone
 from app.models.bot_user import BotUser, OTPCode
 
+logger = logging.getLogger(__name__)
+
 
 def get_bot_user_by_telegram_id(db: Session, telegram_id: str) -> Optional[BotUser]:
     return db.query(BotUser).filter(BotUser.telegram_id == telegram_id).first()
@@ -69,8 +75,8 @@ def store_otp_code(db: Session, phone_number: str, code: str, expires_minutes: i
         db.commit()
         return True
 
-    except Exception as e:
-        print(f"Error storing OTP: {e}")
+    except Exception:
+        logger.exception("Storing OTP failed", extra={"phone": mask_phone(phone_number)})
         db.rollback()
         return False
 
@@ -84,7 +90,7 @@ def verify_otp_code(db: Session, phone_number: str, code: str) -> bool:
         ).first()
 
         if not otp_record:
-            print(f"No OTP found for {phone_number} with code {code}")
+            logger.info("OTP rejected: no match", extra={"phone": mask_phone(phone_number)})
             return False
 
         # Use timezone-aware datetime for comparison
@@ -92,19 +98,128 @@ def verify_otp_code(db: Session, phone_number: str, code: str) -> bool:
 
         # Check if expired
         if now > otp_record.expires_at:
-            print(f"OTP expired for {phone_number}")
+            logger.info("OTP rejected: expired", extra={"phone": mask_phone(phone_number)})
             # Clean up expired code
             db.delete(otp_record)
             db.commit()
             return False
 
-        print(f"OTP verified successfully for {phone_number}")
+        logger.info("OTP verified", extra={"phone": mask_phone(phone_number)})
         # Valid OTP - remove it
         db.delete(otp_record)
         db.commit()
         return True
 
-    except Exception as e:
-        print(f"Error verifying OTP: {e}")
+    except Exception:
+        logger.exception("Verifying OTP failed", extra={"phone": mask_phone(phone_number)})
         db.rollback()
-        return False
\ No newline at end of file
+        return False
+
+
+def delete_expired_otp_codes(db: Session) -> int:
+    deleted = db.query(OTPCode).filter(
+        OTPCode.expires_at < datetime.now(timezone.utc)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+# Async variants used by the Telegram bot handlers. They never commit on their
+# own so a handler can group several of them into a single transaction.
+
+async def get_bot_user_by_telegram_id_async(db: AsyncSession, telegram_id: str) -> Optional[BotUser]:
+    result = await db.execute(select(BotUser).where(BotUser.telegram_id == telegram_id))
+    return result.scalars().first()
+
+
+async def get_bot_user_by_phone_async(db: AsyncSession, phone_number: str) -> Optional[BotUser]:
+    result = await db.execute(select(BotUser).where(BotUser.phone_number == phone_number))
+    return result.scalars().first()
+
+
+async def get_active_otp_code_async(db: AsyncSession, phone_number: str) -> Optional[OTPCode]:
+    result = await db.execute(
+        select(OTPCode).where(
+            OTPCode.phone_number == phone_number,
+            OTPCode.expires_at > datetime.now(timezone.utc)
+        )
+    )
+    return result.scalars().first()
+
+
+async def create_or_update_bot_user_async(
+        db: AsyncSession,
+        telegram_id: str,
+        username: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        phone_number: Optional[str] = None
+) -> BotUser:
+    bot_user = await get_bot_user_by_telegram_id_async(db, telegram_id)
+
+    if bot_user:
+        # Update existing user
+        if username is not None:
+            bot_user.username = username
+        if first_name is not None:
+            bot_user.first_name = first_name
+        if last_name is not None:
+            bot_user.last_name = last_name
+        if phone_number is not None:
+            bot_user.phone_number = phone_number
+    else:
+        # Create new user
+        bot_user = BotUser(
+            telegram_id=telegram_id,
+            username=username,
+            first_name=first_name,
+            last_name=last_name,
+            phone_number=phone_number
+        )
+        db.add(bot_user)
+
+    await db.flush()
+    return bot_user
+
+
+async def store_otp_code_async(db: AsyncSession, phone_number: str, code: str, expires_minutes: int = 5) -> OTPCode:
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes)
+
+    # Delete any existing OTP for this phone number
+    await db.execute(delete(OTPCode).where(OTPCode.phone_number == phone_number))
+
+    otp_code = OTPCode(
+        phone_number=phone_number,
+        code=code,
+        expires_at=expires_at
+    )
+    db.add(otp_code)
+    await db.flush()
+    return otp_code
+
+
+async def register_contact_async(
+        db: AsyncSession,
+        telegram_id: str,
+        phone_number: str,
+        code: str,
+        username: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None
+) -> BotUser:
+    """Store the OTP and upsert the bot user in one transaction"""
+    try:
+        await store_otp_code_async(db, phone_number, code)
+        bot_user = await create_or_update_bot_user_async(
+            db=db,
+            telegram_id=telegram_id,
+            username=username,
+            first_name=first_name,
+            last_name=last_name,
+            phone_number=phone_number
+        )
+        await db.commit()
+        return bot_user
+    except Exception:
+        await db.rollback()
+        raise
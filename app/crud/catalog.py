@@ -0,0 +1,59 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, select
+from datetime import datetime, timedelta, timezone
+from typing import List
+from uuid import UUID
+from app.models.catalog import CatalogChange, CatalogCompaction
+
+# Serializes change log writes on Postgres so ids become visible in order: a
+# reader that has seen id N can never later find a committed id below N
+CHANGE_LOCK_KEY = 0x696E62617A6163  # "inbazac"
+
+
+def record_change(db: Session, entity: str, entity_id: UUID, op: str = "upsert") -> None:
+    """Stage a change log entry; committed with the write it describes"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(CHANGE_LOCK_KEY)))
+    db.add(CatalogChange(entity=entity, entity_id=entity_id, op=op))
+
+
+def latest_change_id(db: Session) -> int:
+    """The catalog version: position of the newest change, 0 before the first"""
+    return db.query(func.max(CatalogChange.id)).scalar() or 0
+
+
+def get_changes(db: Session, since: int, limit: int = 100) -> List[CatalogChange]:
+    return (
+        db.query(CatalogChange)
+        .filter(CatalogChange.id > since)
+        .order_by(CatalogChange.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def compacted_through(db: Session) -> int:
+    """Highest change id removed as expired; positions below it may have missed changes"""
+    return db.query(func.max(CatalogCompaction.compacted_through)).scalar() or 0
+
+
+def compact_changes(db: Session, retention_days: int = 30) -> int:
+    """
+    Drop changes superseded by a newer one for the same entity (a reader
+    still gets the newer one), then changes older than the retention, whose
+    highest id is recorded so sync positions below it are refused. The
+    newest change always stays so the version never goes back. Returns how
+    many were removed.
+    """
+    newest = select(func.max(CatalogChange.id)).group_by(CatalogChange.entity, CatalogChange.entity_id)
+    superseded = db.execute(delete(CatalogChange).where(CatalogChange.id.not_in(newest)))
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    expired = (CatalogChange.changed_at < cutoff, CatalogChange.id < latest_change_id(db))
+    through = db.query(func.max(CatalogChange.id)).filter(*expired).scalar()
+    removed = 0
+    if through is not None:
+        # Same transaction as the delete, so readers never see one without the other
+        removed = db.execute(delete(CatalogChange).where(*expired, CatalogChange.id <= through)).rowcount
+        db.add(CatalogCompaction(compacted_through=through))
+    db.commit()
+    return superseded.rowcount + removed
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
+from app.crud.catalog import record_change
 from app.models.category import Category
 from app.schemas.category import CategoryCreate, CategoryUpdate
 
@@ -20,6 +21,8 @@ def get_categories(db: Session) -> List[Category]:
 def create_category(db: Session, category: CategoryCreate) -> Category:
     db_category = Category(**category.dict())
     db.add(db_category)
+    db.flush()
+    record_change(db, "category", db_category.id)
     db.commit()
     db.refresh(db_category)
     return db_category
@@ -30,6 +33,7 @@ def update_category(db: Session, category_id: UUID, category_update: CategoryUpd
     if db_category:
         for field, value in category_update.dict(exclude_unset=True).items():
             setattr(db_category, field, value)
+        record_change(db, "category", db_category.id)
         db.commit()
         db.refresh(db_category)
     return db_category
@@ -39,6 +43,7 @@ def delete_category(db: Session, category_id: UUID) -> bool:
     db_category = get_category_by_id(db, category_id)
     if db_category:
         db.delete(db_category)
+        record_change(db, "category", category_id, "delete")
         db.commit()
         return True
     return False
\ No newline at end of file
@@ -0,0 +1,308 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, delete, exists, select
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+from uuid import UUID
+from app.models.feed import UserFeed, TrendingSnapshot
+from app.models.product import Product
+from app.models.product_view import UserProductView
+from app.models.user import User
+
+# How much each kind of attribute counts towards a product's profile
+FEATURE_WEIGHTS = {"category": 1.0, "gender": 1.0, "tag": 0.5, "color": 0.5}
+# Most frequent tags/colors kept as features; rare ones add width, not signal
+MAX_VALUES_PER_FEATURE = 200
+LIKE_WEIGHT = 3.0
+BOOKMARK_WEIGHT = 2.0
+# Share of the score coming from global popularity rather than the user's taste
+POPULARITY_WEIGHT = 0.15
+
+
+def get_feed_product_ids(db: Session, user_id: UUID, limit: int = 200) -> List[UUID]:
+    """The user's materialized feed; trending (then newest) when there is none yet"""
+    feed = db.query(UserFeed.product_ids).filter(UserFeed.user_id == user_id).scalar()
+    if feed:
+        return feed
+    trending = (
+        db.query(TrendingSnapshot.product_ids)
+        .order_by(TrendingSnapshot.created_at.desc())
+        .limit(1)
+        .scalar()
+    )
+    if trending:
+        return trending
+    return [
+        product_id for (product_id,) in
+        db.query(Product.id).filter(Product.is_active == True)
+        .order_by(Product.created_at.desc()).limit(limit)
+    ]
+
+
+def compute_trending(db: Session, days: int = 7, limit: int = 200) -> List[UUID]:
+    """Active products with the most views in the last ``days``, topped up with all-time favourites"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    ids = [
+        product_id for (product_id,) in
+        db.query(UserProductView.product_id)
+        .join(Product, Product.id == UserProductView.product_id)
+        .filter(UserProductView.viewed_at >= cutoff, Product.is_active == True)
+        .group_by(UserProductView.product_id)
+        .order_by(func.sum(UserProductView.view_count).desc())
+        .limit(limit)
+    ]
+    if len(ids) < limit:
+        seen = set(ids)
+        popular = (
+            db.query(Product.id)
+            .filter(Product.is_active == True)
+            .order_by((Product.like_count + Product.bookmark_count + Product.click_count).desc())
+            .limit(limit)
+        )
+        ids += [product_id for (product_id,) in popular if product_id not in seen][:limit - len(ids)]
+    return ids
+
+
+def create_trending_snapshot(db: Session, days: int = 7, limit: int = 200, keep: int = 24) -> TrendingSnapshot:
+    snapshot = TrendingSnapshot(product_ids=compute_trending(db, days=days, limit=limit))
+    db.add(snapshot)
+    db.commit()
+    db.refresh(snapshot)
+    db.query(TrendingSnapshot).filter(TrendingSnapshot.id <= snapshot.id - keep).delete(synchronize_session=False)
+    db.commit()
+    return snapshot
+
+
+@dataclass
+class _Catalog:
+    """
+    Active products with their features in CSR form: product i has weights
+    ``values[indptr[i]:indptr[i + 1]]`` (L2-normalized) at feature columns
+    ``indices[...]``; memory grows with the features products have (a
+    handful each), not with products x features.
+    """
+    product_ids: List[UUID]
+    indptr: object
+    indices: object
+    values: object
+    width: int  # Number of feature columns
+    popularity: object  # 0..1 prior per product
+    category: object  # Category column of each product
+
+
+def _product_features(db: Session) -> _Catalog:
+    import numpy as np
+
+    rows = (
+        db.query(
+            Product.id, Product.category_id, Product.gender, Product.tags, Product.colors,
+            Product.click_count, Product.like_count, Product.bookmark_count
+        )
+        .filter(Product.is_active == True)
+        .order_by(Product.id)
+        .all()
+    )
+
+    tag_counts = Counter(tag for row in rows for tag in row.tags or [])
+    color_counts = Counter(color for row in rows for color in row.colors or [])
+    columns: Dict[Tuple[str, object], int] = {}
+    for key in (
+        [("category", row.category_id) for row in rows]
+        + [("gender", row.gender) for row in rows]
+        + [("tag", tag) for tag, _ in tag_counts.most_common(MAX_VALUES_PER_FEATURE)]
+        + [("color", color) for color, _ in color_counts.most_common(MAX_VALUES_PER_FEATURE)]
+    ):
+        columns.setdefault(key, len(columns))
+
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indices: List[int] = []
+    values: List[float] = []
+    popularity = np.zeros(len(rows), dtype=np.float32)
+    category = np.zeros(len(rows), dtype=np.int32)
+    for i, row in enumerate(rows):
+        keys = [("category", row.category_id), ("gender", row.gender)]
+        keys += [("tag", tag) for tag in row.tags or []]
+        keys += [("color", color) for color in row.colors or []]
+        found = {columns[key]: FEATURE_WEIGHTS[key[0]] for key in keys if key in columns}
+        indices.extend(found)
+        values.extend(found.values())
+        indptr[i + 1] = len(indices)
+        category[i] = columns[("category", row.category_id)]
+        popularity[i] = (row.click_count or 0) + 3 * (row.like_count or 0) + 2 * (row.bookmark_count or 0)
+
+    values = np.array(values, dtype=np.float32)
+    owner = np.repeat(np.arange(len(rows)), np.diff(indptr))
+    norms = np.sqrt(np.bincount(owner, weights=values ** 2, minlength=len(rows))).astype(np.float32)
+    values /= np.maximum(norms, 1e-9)[owner]
+    popularity = np.log1p(popularity)
+    if len(popularity) and popularity.max() > 0:
+        popularity /= popularity.max()
+    return _Catalog(
+        [row.id for row in rows], indptr, np.array(indices, dtype=np.int32), values,
+        max(len(columns), 1), popularity, category
+    )
+
+
+def _feature_entries(catalog: _Catalog, products):
+    """For product positions ``products``: (which of them, feature column, weight) of every feature"""
+    import numpy as np
+
+    starts = catalog.indptr[products]
+    lengths = catalog.indptr[products + 1] - starts
+    owner = np.repeat(np.arange(len(products)), lengths)
+    # Positions of each product's run in indices/values, concatenated
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = np.repeat(starts, lengths) + offsets
+    return owner, catalog.indices[positions], catalog.values[positions]
+
+
+def _candidate_pool(catalog: _Catalog, pool_size: int, per_category: int):
+    """Positions of the ``pool_size`` most popular products plus the ``per_category`` most popular of each category"""
+    import numpy as np
+
+    by_popularity = np.argsort(-catalog.popularity, kind="stable")
+    by_category = np.lexsort((-catalog.popularity, catalog.category))
+    grouped = catalog.category[by_category]
+    group_start = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+    rank = np.arange(len(by_category)) - np.repeat(group_start, np.diff(np.r_[group_start, len(by_category)]))
+    return np.union1d(by_popularity[:pool_size], by_category[rank < per_category])
+
+
+def _active_user_ids(db: Session, since: datetime) -> List[UUID]:
+    """Users who viewed a product, or changed likes, bookmarks or profile, since ``since``; sorted"""
+    updated = db.scalars(select(User.id).where(User.updated_at >= since))
+    # Probes ix_user_product_views_user_viewed_at once per user
+    viewed = db.scalars(select(User.id).where(
+        exists().where(UserProductView.user_id == User.id, UserProductView.viewed_at >= since)
+    ))
+    return sorted(set(updated) | set(viewed))
+
+
+def _upsert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(UserFeed)
+
+
+def build_feeds(
+        db: Session,
+        size: int = 200,
+        batch_size: int = 128,
+        history_days: int = 90,
+        active_days: int = 7,
+        pool_size: int = 5000
+) -> int:
+    """Rebuild the feeds of recently active users from likes, bookmarks and recent views.
+
+    A user's affinity vector is the weighted sum of the feature rows of the
+    products they interacted with; candidates are ranked by cosine similarity
+    to it plus a popularity prior, with already seen products left out.
+    Candidates are a pool of the ``pool_size`` most popular products plus the
+    ``size`` most popular of each category, and only users active in the last
+    ``active_days`` are scored, ``batch_size`` at a time, so memory is about
+    batch_size x pool floats. Other users keep their feed until it is
+    ``history_days`` old; feeds of active users with no signal left are
+    deleted. Returns the number of feeds written.
+    """
+    # Imported here: only the scheduler needs NumPy, workers start without it
+    import numpy as np
+
+    started = datetime.now(timezone.utc)
+    cutoff = started - timedelta(days=history_days)
+    active = _active_user_ids(db, started - timedelta(days=active_days))
+    catalog = _product_features(db)
+    if not catalog.product_ids:
+        return 0
+    index = {product_id: i for i, product_id in enumerate(catalog.product_ids)}
+    pool = _candidate_pool(catalog, pool_size, size)
+    pool_position = np.full(len(catalog.product_ids), -1)
+    pool_position[pool] = np.arange(len(pool))
+    owner, feature, value = _feature_entries(catalog, pool)
+    candidates = np.zeros((len(pool), catalog.width), dtype=np.float32)
+    candidates[owner, feature] = value
+    prior = POPULARITY_WEIGHT * catalog.popularity[pool]
+    size = min(size, len(pool))
+
+    written = 0
+    for start in range(0, len(active), batch_size):
+        batch = active[start:start + batch_size]
+        users = (
+            db.query(User.id, User.liked_products, User.bookmarked_products)
+            .filter(User.id.in_(batch))
+            .order_by(User.id)
+            .all()
+        )
+        row_of = {user.id: r for r, user in enumerate(users)}
+
+        rows: List[int] = []
+        products: List[int] = []
+        weights: List[float] = []
+
+        def add(row: int, product_id: UUID, weight: float) -> None:
+            position = index.get(product_id)
+            if position is not None:
+                rows.append(row)
+                products.append(position)
+                weights.append(weight)
+
+        for r, user in enumerate(users):
+            for product_id in user.liked_products or []:
+                add(r, product_id, LIKE_WEIGHT)
+            for product_id in user.bookmarked_products or []:
+                add(r, product_id, BOOKMARK_WEIGHT)
+        views = db.query(UserProductView.user_id, UserProductView.product_id, UserProductView.view_count).filter(
+            UserProductView.user_id.in_(list(row_of)), UserProductView.viewed_at >= cutoff
+        )
+        for user_id, product_id, view_count in views:
+            add(row_of[user_id], product_id, float(np.log1p(view_count or 1)))
+        if not rows:
+            # No signal left
+            db.execute(delete(UserFeed).where(UserFeed.user_id.in_(batch)))
+            db.commit()
+            continue
+
+        row_index = np.array(rows)
+        product_index = np.array(products)
+        owner, feature, value = _feature_entries(catalog, product_index)
+        affinity = np.zeros((len(users), catalog.width), dtype=np.float32)
+        np.add.at(affinity, (row_index[owner], feature), value * np.array(weights, dtype=np.float32)[owner])
+        affinity /= np.maximum(np.linalg.norm(affinity, axis=1, keepdims=True), 1e-9)
+
+        scores = (1 - POPULARITY_WEIGHT) * (affinity @ candidates.T) + prior
+        seen = pool_position[product_index] >= 0
+        scores[row_index[seen], pool_position[product_index[seen]]] = -np.inf
+        top = np.argpartition(-scores, size - 1, axis=1)[:, :size]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        ranked = np.take_along_axis(top, order, axis=1)
+        ranked_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        feeds = [
+            {
+                "user_id": users[r].id,
+                "product_ids": [catalog.product_ids[pool[i]] for i in ranked[r][np.isfinite(ranked_scores[r])]],
+                "generated_at": started,
+            }
+            for r in np.unique(row_index)
+        ]
+        scored = {feed["user_id"] for feed in feeds}
+        unscored = [user_id for user_id in batch if user_id not in scored]
+        if unscored:  # No signal left
+            db.execute(delete(UserFeed).where(UserFeed.user_id.in_(unscored)))
+        stmt = _upsert(db)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserFeed.user_id],
+                set_={"product_ids": stmt.excluded.product_ids, "generated_at": stmt.excluded.generated_at}
+            ),
+            feeds
+        )
+        db.commit()
+        written += len(feeds)
+
+    db.execute(delete(UserFeed).where(UserFeed.generated_at < cutoff))
+    db.commit()
+    return written
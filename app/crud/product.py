@@ -1,13 +1,32 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_
-from typing import List, Optional
+from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy import or_, and_, bindparam, cast, String, func, literal, select
+from collections import Counter
+from itertools import groupby
+from typing import List, Optional, Sequence, Tuple
 from uuid import UUID
+from app.crud.catalog import record_change
+from app.models.category import Category
 from app.models.product import Product, GenderEnum
+from app.models.product_search import ProductSearchDocument
+from app.models.user import User
 from app.schemas.product import ProductCreate, ProductUpdate
+from app.utils.text import fold, search_document
 
 
-def get_product_by_id(db: Session, product_id: UUID, include_category: bool = False) -> Optional[Product]:
-    query = db.query(Product)
+# ``columns``: load only these Product columns (plus the primary key) for a
+# projected response; reading any other attribute afterwards costs a query
+
+def _only(query, columns: Optional[Sequence]):
+    return query.options(load_only(*columns)) if columns else query
+
+
+def get_product_by_id(
+        db: Session,
+        product_id: UUID,
+        include_category: bool = False,
+        columns: Optional[Sequence] = None
+) -> Optional[Product]:
+    query = _only(db.query(Product), columns)
     if include_category:
         query = query.options(joinedload(Product.category))
     return query.filter(Product.id == product_id).first()
@@ -20,8 +39,14 @@ def get_products(
         gender: Optional[GenderEnum] = None,
         category_id: Optional[UUID] = None,
         search: Optional[str] = None,
-        include_inactive: bool = False
+        include_inactive: bool = False,
+        similarity_threshold: float = 0.5,
+        columns: Optional[Sequence] = None
 ) -> List[Product]:
+    """
+    Products newest first; with ``search``, the ones whose name, tags or
+    colors resemble it (transliterated, typo-tolerant), most similar first.
+    """
     query = db.query(Product)
 
     if not include_inactive:
@@ -33,26 +58,229 @@ def get_products(
     if category_id:
         query = query.filter(Product.category_id == category_id)
 
-    if search:
+    if search and fold(search):
+        if db.get_bind().dialect.name == "postgresql":
+            return _trigram_search(db, _only(query, columns), fold(search), similarity_threshold, skip, limit)
+
+        from app.core.search import search_index
+
+        if search_index.ready:
+            return _indexed_search(
+                db, query, search_index.search(search, similarity_threshold), skip, limit, columns
+            )
+
+        # Index not built in this process (scripts, first moments after startup).
+        # Same fields as the search document (not the description), so results
+        # don't change once the index is ready
         search_filter = f"%{search}%"
         query = query.filter(
             or_(
                 Product.name.ilike(search_filter),
-                Product.description.ilike(search_filter),
-                Product.tags.any(search_filter)
+                # Tags and colors are JSON arrays outside Postgres
+                cast(Product.tags, String).ilike(search_filter),
+                cast(Product.colors, String).ilike(search_filter)
             )
         )
 
-    return query.order_by(Product.created_at.desc()).offset(skip).limit(limit).all()
+    return _only(query, columns).order_by(Product.created_at.desc()).offset(skip).limit(limit).all()
+
+
+def _trigram_search(db: Session, query, folded: str, threshold: float, skip: int, limit: int) -> List[Product]:
+    # <% is served by the GIN trigram index and compares against this threshold
+    db.execute(select(func.set_config("pg_trgm.word_similarity_threshold", str(threshold), True)))
+    document = ProductSearchDocument.document
+    return (
+        query.join(ProductSearchDocument, ProductSearchDocument.product_id == Product.id)
+        .filter(literal(folded).op("<%")(document))
+        .order_by(func.word_similarity(folded, document).desc(), Product.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+def _indexed_search(
+        db: Session,
+        query,
+        matches: List[Tuple[UUID, float]],
+        skip: int,
+        limit: int,
+        columns: Optional[Sequence] = None
+) -> List[Product]:
+    """
+    Apply the query's filters to in-process matches (best first), then page
+    by similarity, newest first among equals. Matches are filtered one
+    similarity level at a time, MAX_MATCHES ids per query, until the page is
+    covered, so the cut comes after filtering.
+    """
+    from app.core.search import MAX_MATCHES
+
+    wanted = skip + limit
+    ranked: List[UUID] = []
+    for _, level in groupby(matches, key=lambda match: match[1]):
+        ids = [product_id for product_id, _ in level]
+        rows = []
+        for start in range(0, len(ids), MAX_MATCHES):
+            rows.extend(
+                query.filter(Product.id.in_(ids[start:start + MAX_MATCHES]))
+                .with_entities(Product.id, Product.created_at)
+                .order_by(Product.created_at.desc())
+                .limit(wanted - len(ranked))
+                .all()
+            )
+        rows.sort(key=lambda row: row.created_at, reverse=True)
+        ranked.extend(row.id for row in rows[:wanted - len(ranked)])
+        if len(ranked) >= wanted:
+            break
+    page = ranked[skip:]
+    if not page:
+        return []
+    products = {product.id: product for product in _only(query, columns).filter(Product.id.in_(page))}
+    return [products[product_id] for product_id in page]
+
 
+# Sort keys of the admin product list
+ADMIN_SORTS = {
+    "created_at": Product.created_at,
+    "price": Product.price,
+    "click_count": Product.click_count,
+    "like_count": Product.like_count,
+    "bookmark_count": Product.bookmark_count,
+}
+
+
+def _admin_filters(
+        query,
+        is_active: Optional[bool],
+        category_id: Optional[UUID],
+        gender: Optional[GenderEnum],
+        search: Optional[str]
+):
+    if is_active is not None:
+        query = query.filter(Product.is_active == is_active)
+    if category_id:
+        query = query.filter(Product.category_id == category_id)
+    if gender:
+        query = query.filter(Product.gender == gender)
+    if search and fold(search):
+        # Substring of the folded name/tags/colors; the GIN trigram index serves LIKE on Postgres
+        matching = select(ProductSearchDocument.product_id).where(
+            ProductSearchDocument.document.contains(fold(search), autoescape=True)
+        )
+        query = query.filter(Product.id.in_(matching))
+    return query
 
-def get_products_by_ids(db: Session, product_ids: List[UUID]) -> List[Product]:
-    return db.query(Product).filter(Product.id.in_(product_ids)).all()
+
+def get_admin_products(
+        db: Session,
+        skip: int = 0,
+        limit: int = 50,
+        sort: str = "-created_at",
+        is_active: Optional[bool] = None,
+        category_id: Optional[UUID] = None,
+        gender: Optional[GenderEnum] = None,
+        search: Optional[str] = None
+) -> List[Tuple[Product, Optional[str]]]:
+    """
+    One page of products of any status with their category names (one join),
+    ordered by an ADMIN_SORTS key, descending with a "-" prefix.
+    """
+    column = ADMIN_SORTS[sort.lstrip("-")]
+    # Id breaks ties so pages don't overlap
+    order = (column.desc(), Product.id.desc()) if sort.startswith("-") else (column.asc(), Product.id.asc())
+    query = db.query(Product, Category.name).outerjoin(Category, Category.id == Product.category_id)
+    query = _admin_filters(query, is_active, category_id, gender, search)
+    return [tuple(row) for row in query.order_by(*order).offset(skip).limit(limit)]
+
+
+def count_products(
+        db: Session,
+        is_active: Optional[bool] = None,
+        category_id: Optional[UUID] = None,
+        gender: Optional[GenderEnum] = None,
+        search: Optional[str] = None
+) -> int:
+    """How many products get_admin_products pages through"""
+    query = _admin_filters(db.query(func.count(Product.id)), is_active, category_id, gender, search)
+    return query.scalar()
+
+
+def save_search_document(db: Session, product: Product) -> None:
+    """Stage the product's search document; committed with the product"""
+    db.merge(ProductSearchDocument(
+        product_id=product.id,
+        document=search_document(product.name, product.tags, product.colors)
+    ))
+
+
+def sync_search_documents(db: Session, batch_size: int = 1000) -> int:
+    """Create missing search documents (products loaded outside the CRUD layer); returns how many"""
+    created = 0
+    while True:
+        products = (
+            db.query(Product.id, Product.name, Product.tags, Product.colors)
+            .outerjoin(ProductSearchDocument, ProductSearchDocument.product_id == Product.id)
+            .filter(ProductSearchDocument.product_id == None)
+            .limit(batch_size)
+            .all()
+        )
+        if not products:
+            return created
+        db.add_all([
+            ProductSearchDocument(
+                product_id=product.id,
+                document=search_document(product.name, product.tags, product.colors)
+            )
+            for product in products
+        ])
+        db.commit()
+        created += len(products)
+
+
+def get_products_by_ids(db: Session, product_ids: List[UUID], columns: Optional[Sequence] = None) -> List[Product]:
+    return _only(db.query(Product), columns).filter(Product.id.in_(product_ids)).all()
+
+
+def get_active_products_page(
+        db: Session,
+        product_ids: List[UUID],
+        start: int = 0,
+        limit: int = 20,
+        max_scan: Optional[int] = None,
+        columns: Optional[Sequence] = None
+) -> Tuple[List[Product], Optional[int]]:
+    """
+    Active products from an ordered id list, in list order, starting at index
+    ``start``. Ids are looked up a page-sized slice at a time and at most
+    ``max_scan`` ids (default 10 pages) are examined, so the work depends on
+    the page, not on the length of the list; a run of inactive products can
+    make a page short, or empty. Returns the page and the index to continue
+    from (None when the list is exhausted).
+    """
+    max_scan = max_scan or limit * 10
+    page: List[Product] = []
+    position = start
+    while position < len(product_ids) and len(page) < limit and position - start < max_scan:
+        chunk = product_ids[position:position + limit]
+        found = {
+            product.id: product for product in
+            _only(db.query(Product), columns).filter(Product.id.in_(chunk), Product.is_active == True)
+        }
+        for product_id in chunk:
+            position += 1
+            if product_id in found:
+                page.append(found[product_id])
+                if len(page) == limit:
+                    break
+    return page, (position if position < len(product_ids) else None)
 
 
 def create_product(db: Session, product: ProductCreate) -> Product:
     db_product = Product(**product.dict())
     db.add(db_product)
+    db.flush()
+    save_search_document(db, db_product)
+    record_change(db, "product", db_product.id)
     db.commit()
     db.refresh(db_product)
     return db_product
@@ -63,6 +291,8 @@ def update_product(db: Session, product_id: UUID, product_update: ProductUpdate)
     if db_product:
         for field, value in product_update.dict(exclude_unset=True).items():
             setattr(db_product, field, value)
+        save_search_document(db, db_product)
+        record_change(db, "product", db_product.id)
         db.commit()
         db.refresh(db_product)
     return db_product
@@ -71,7 +301,10 @@ def update_product(db: Session, product_id: UUID, product_update: ProductUpdate)
 def delete_product(db: Session, product_id: UUID) -> bool:
     db_product = get_product_by_id(db, product_id)
     if db_product:
+        # ON DELETE CASCADE isn't enforced by SQLite
+        db.query(ProductSearchDocument).filter(ProductSearchDocument.product_id == product_id).delete()
         db.delete(db_product)
+        record_change(db, "product", product_id, "delete")
         db.commit()
         return True
     return False
@@ -109,4 +342,45 @@ def decrement_bookmark_count(db: Session, product_id: UUID) -> None:
     db_product = get_product_by_id(db, product_id)
     if db_product and db_product.bookmark_count > 0:
         db_product.bookmark_count -= 1
-        db.commit()
\ No newline at end of file
+        db.commit()
+
+
+def reconcile_interaction_counts(db: Session, batch_size: int = 1000) -> int:
+    """Recompute like/bookmark counters from users' saved products.
+
+    The arrays and the counters are read from one snapshot and the drift is
+    applied as a delta to the current counters, so likes and bookmarks
+    landing meanwhile are kept. Returns the number of products corrected.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # Must be set before the session's transaction starts
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    likes = Counter()
+    bookmarks = Counter()
+    users = db.query(User.liked_products, User.bookmarked_products).yield_per(batch_size)
+    for liked_products, bookmarked_products in users:
+        likes.update(liked_products or [])
+        bookmarks.update(bookmarked_products or [])
+
+    fixes = []
+    products = db.query(Product.id, Product.like_count, Product.bookmark_count).yield_per(batch_size)
+    for product_id, like_count, bookmark_count in products:
+        like_delta = likes.get(product_id, 0) - (like_count or 0)
+        bookmark_delta = bookmarks.get(product_id, 0) - (bookmark_count or 0)
+        if like_delta or bookmark_delta:
+            fixes.append({"product_id": product_id, "like_delta": like_delta, "bookmark_delta": bookmark_delta})
+    db.commit()  # Ends the snapshot
+
+    table = Product.__table__
+    stmt = (
+        table.update()
+        .where(table.c.id == bindparam("product_id"))
+        .values(
+            like_count=table.c.like_count + bindparam("like_delta"),
+            bookmark_count=table.c.bookmark_count + bindparam("bookmark_delta")
+        )
+    )
+    for start in range(0, len(fixes), batch_size):
+        db.execute(stmt, fixes[start:start + batch_size])
+        db.commit()
+    return len(fixes)
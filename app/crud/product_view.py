@@ -0,0 +1,148 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, delete, tuple_
+from datetime import datetime, timedelta, timezone
+from typing import List
+from uuid import UUID
+from app.models.product import Product
+from app.models.product_view import UserProductView
+from app.models.user import User
+
+
+def _upsert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(UserProductView)
+
+
+def record_view(db: Session, user_id: UUID, product_id: UUID) -> None:
+    """Insert the view, or move an existing one to now; never touches the users row"""
+    stmt = _upsert(db).values(
+        user_id=user_id,
+        product_id=product_id,
+        viewed_at=datetime.now(timezone.utc),
+        view_count=1
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserProductView.user_id, UserProductView.product_id],
+        set_={
+            "viewed_at": stmt.excluded.viewed_at,
+            "view_count": UserProductView.view_count + 1
+        }
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def get_recently_viewed_products(db: Session, user_id: UUID, limit: int = 10) -> List[Product]:
+    """Most recently viewed active products, newest first, in one indexed query"""
+    return (
+        db.query(Product)
+        .join(UserProductView, UserProductView.product_id == Product.id)
+        .filter(UserProductView.user_id == user_id, Product.is_active == True)
+        .order_by(UserProductView.viewed_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _delete_keys(db: Session, keys: list) -> int:
+    result = db.execute(
+        delete(UserProductView).where(
+            tuple_(UserProductView.user_id, UserProductView.product_id).in_(keys)
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def prune_views(db: Session, max_age_days: int = 90, keep_per_user: int = 50, batch_size: int = 5000) -> int:
+    """Delete views older than max_age_days or beyond each user's newest keep_per_user.
+
+    Deletes run in committed batches so no lock is held for long, and no
+    step reads more than a batch of keys. Returns the rows deleted.
+    """
+    deleted = 0
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+    while True:
+        keys = db.execute(
+            select(UserProductView.user_id, UserProductView.product_id)
+            .where(UserProductView.viewed_at < cutoff)
+            .limit(batch_size)
+        ).all()
+        if not keys:
+            break
+        deleted += _delete_keys(db, [tuple(key) for key in keys])
+
+    # Users over the cap, walked by id a few at a time (about batch_size kept
+    # rows each round); their excess goes at most batch_size keys per delete
+    users_per_round = max(1, batch_size // max(keep_per_user, 1))
+    last_user_id = None
+    while True:
+        over_cap = (
+            select(UserProductView.user_id)
+            .group_by(UserProductView.user_id)
+            .having(func.count() > keep_per_user)
+            .order_by(UserProductView.user_id)
+            .limit(users_per_round)
+        )
+        if last_user_id is not None:
+            over_cap = over_cap.where(UserProductView.user_id > last_user_id)
+        user_ids = db.scalars(over_cap).all()
+        if not user_ids:
+            break
+        last_user_id = user_ids[-1]
+
+        ranked = select(
+            UserProductView.user_id,
+            UserProductView.product_id,
+            func.row_number().over(
+                partition_by=UserProductView.user_id,
+                order_by=UserProductView.viewed_at.desc()
+            ).label("rank")
+        ).where(UserProductView.user_id.in_(user_ids)).subquery()
+        while True:
+            keys = db.execute(
+                select(ranked.c.user_id, ranked.c.product_id).where(ranked.c.rank > keep_per_user).limit(batch_size)
+            ).all()
+            if not keys:
+                break
+            deleted += _delete_keys(db, [tuple(key) for key in keys])
+
+    return deleted
+
+
+def migrate_click_history(db: Session, batch_size: int = 500) -> int:
+    """Move legacy users.click_history arrays into user_product_views.
+
+    Order is kept by spacing viewed_at one second apart. Returns the users migrated.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        has_history = func.cardinality(User.click_history) > 0
+    else:
+        has_history = func.json_array_length(User.click_history) > 0
+
+    existing_products = select(Product.id)
+    migrated = 0
+    while True:
+        users = db.query(User).filter(has_history).limit(batch_size).all()
+        if not users:
+            break
+        now = datetime.now(timezone.utc)
+        rows = [
+            {"user_id": user.id, "product_id": product_id,
+             "viewed_at": now - timedelta(seconds=position), "view_count": 1}
+            for user in users
+            for position, product_id in enumerate(user.click_history or [])
+        ]
+        live = set(db.scalars(existing_products.where(Product.id.in_({row["product_id"] for row in rows}))))
+        rows = [row for row in rows if row["product_id"] in live]
+        if rows:
+            db.execute(_upsert(db).on_conflict_do_nothing(), rows)
+        for user in users:
+            user.click_history = []
+        db.commit()
+        migrated += len(users)
+    return migrated
@@ -78,18 +78,3 @@ def remove_from_bookmarked_products(db: Session, user_id: UUID, product_id: UUID
         db.commit()
         return True
     return False
-
-
-def add_to_click_history(db: Session, user_id: UUID, product_id: UUID) -> None:
-    db_user = get_user_by_id(db, user_id)
-    if db_user:
-        history = list(db_user.click_history or [])
-        # Remove if already exists to move to front
-        if product_id in history:
-            history.remove(product_id)
-        # Add to front
-        history.insert(0, product_id)
-        # Keep only last 50 clicks
-        history = history[:50]
-        db_user.click_history = history
-        db.commit()
\ No newline at end of file
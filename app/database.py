@@ -1,22 +1,147 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import settings
 
-# Create database engine
-engine = create_engine(settings.database_url)
+logger = logging.getLogger(__name__)
+
+
+def _async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver"""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+class ReplicaRouter:
+    """Round-robin over read replicas, skipping any that recently failed to connect"""
+
+    def __init__(self, urls: List[str], retry_interval: float = 10.0):
+        self.urls = urls
+        # pre_ping turns a dead server into a connect error at checkout
+        self.engines = [create_engine(url, pool_pre_ping=True) for url in urls]
+        self.retry_interval = retry_interval
+        self._down_until: Dict[int, float] = {}
+        self._counter = itertools.count()
+
+    def connect(self) -> Optional[Connection]:
+        """Connection to the next healthy replica, or None if none is reachable"""
+        start = next(self._counter)
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if self._down_until.get(index, 0.0) > time.monotonic():
+                continue
+            try:
+                connection = self.engines[index].connect()
+            except exc.DBAPIError as e:
+                self._down_until[index] = time.monotonic() + self.retry_interval
+                logger.warning("⚠️  Replica %d ishlamayapti, primary/boshqa replica ishlatiladi: %s", index, e.orig)
+                continue
+            self._down_until.pop(index, None)
+            return connection
+        return None
+
+    def status(self) -> List[dict]:
+        now = time.monotonic()
+        return [
+            {"replica": index, "healthy": self._down_until.get(index, 0.0) <= now}
+            for index in range(len(self.engines))
+        ]
+
+
+class ReplicaSession(Session):
+    """Session for read-only routes; refuses to write to a replica"""
+
+    def flush(self, objects=None):
+        if self.new or self.dirty or self.deleted:
+            raise RuntimeError("Read replica session cannot write; use get_db")
+        super().flush(objects)
+
+
+_lock = threading.RLock()
+
+
+def _create(name: str):
+    # Engines import their DB driver; build them on first use so that tools
+    # and workers which never touch a database (or the bot's async engine)
+    # don't pay for it at import time
+    if name == "engine":
+        return create_engine(settings.database_url)
+    if name == "SessionLocal":
+        return sessionmaker(autocommit=False, autoflush=False, bind=__getattr__("engine"))
+    if name == "async_engine":
+        # Async engine for code running on the event loop (Telegram bot handlers)
+        return create_async_engine(_async_database_url(settings.database_url))
+    if name == "AsyncSessionLocal":
+        return async_sessionmaker(__getattr__("async_engine"), class_=AsyncSession, expire_on_commit=False)
+    if name == "replica_router":
+        urls = [url.strip() for url in (settings.database_replica_urls or "").split(",") if url.strip()]
+        return ReplicaRouter(urls, settings.replica_retry_interval) if urls else None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __getattr__(name: str):
+    """Lazily create engine, SessionLocal, async_engine, AsyncSessionLocal and replica_router"""
+    with _lock:
+        if name not in globals():
+            globals()[name] = _create(name)
+        return globals()[name]
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create base class for models
 Base = declarative_base()
 
 
+def create_schema(engine=None) -> None:
+    """create_all, plus indexes added to the models after their tables were created"""
+    import app.models  # Registers every table on Base
+
+    engine = engine or __getattr__("engine")
+    Base.metadata.create_all(engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
 # Dependency to get database session
 def get_db():
-    db = SessionLocal()
+    # Plain global lookups skip the module __getattr__; only the first call locks
+    session_factory = globals().get("SessionLocal") or __getattr__("SessionLocal")
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db():
+    """
+    Session for read-only routes: a healthy replica when DATABASE_REPLICA_URLS
+    is set, the primary otherwise. Anything that writes, or must see the
+    caller's own just-committed writes, keeps using get_db.
+    """
+    router = globals().get("replica_router", False)
+    if router is False:
+        router = __getattr__("replica_router")
+    connection = router.connect() if router else None
+    if connection is None:
+        yield from get_db()
+        return
+
+    db = ReplicaSession(bind=connection, autoflush=False)
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+        connection.close()
@@ -1,53 +1,158 @@
 import asyncio
+import importlib.util
+import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends, HTTPException
+from typing import Optional
+from fastapi import FastAPI, Depends, HTTPException, Header, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from app.config import settings
+from app import database
 from app.database import get_db
-from app.api.routes import auth, users, products, categories, admin
-
-# Try to import bot
-try:
-    from app.bot.main import bot_instance
-
-    BOT_AVAILABLE = True
-    print("✅ Bot fayllari topildi")
-except ImportError as e:
-    print(f"⚠️  Bot fayllari topilmadi: {e}")
-    print("📝 Bot yaratish uchun: python simple_setup_bot.py")
-    BOT_AVAILABLE = False
-    bot_instance = None
+from app.core import metrics
+from app.core.log import RequestIdMiddleware, setup_logging
+from app.core.leader import LeaderElector, create_leader_lock
+from app.core.startup import timer as startup_timer
+from app.core.search import search_index
+from app.core.suggest import suggest_index
+from app.api.routes import auth, users, products, categories, catalog, admin
+
+setup_logging(settings.log_level, json_output=settings.log_format == "json", queue_size=settings.log_queue_size)
+logger = logging.getLogger(__name__)
+
+# python-telegram-bot is heavy; the bot package is imported only once it is needed
+BOT_AVAILABLE = importlib.util.find_spec("telegram") is not None
+_bot_module = None
+
+
+def get_bot_module():
+    """Import app.bot.main on first use"""
+    global _bot_module
+    if _bot_module is None:
+        with startup_timer.phase("import bot"):
+            from app.bot import main as bot_main
+        if settings.enable_metrics:
+            from app.database import async_engine
+
+            metrics.instrument_engine(async_engine.sync_engine, export_pool=False)
+        _bot_module = bot_main
+    return _bot_module
+
+
+traffic_writer = None
+if settings.enable_traffic_capture:
+    from app.core import traffic
+
+    traffic_writer = traffic.TrafficLogWriter(
+        settings.traffic_capture_dir,
+        max_bytes=settings.traffic_capture_max_bytes,
+        max_files=settings.traffic_capture_max_files
+    )
+
+# Needs the engine, so it is created at startup rather than at import
+leader_elector: Optional[LeaderElector] = None
+
+
+def instrument_engines() -> None:
+    """Hook metrics/profiling into the engines; both hooks skip an engine seen before"""
+    replicas = database.replica_router.engines if database.replica_router else []
+    if settings.enable_metrics:
+        metrics.instrument_engine(database.engine)
+        for replica_engine in replicas:
+            metrics.instrument_engine(replica_engine, export_pool=False)
+    if settings.enable_query_profiler:
+        from app.core import profiler
+
+        for engine in [database.engine, *replicas]:
+            profiler.instrument_engine(engine)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("🚀 InBazar API ishga tushirilmoqda...")
+    global leader_elector
+    logger.info("🚀 InBazar API ishga tushirilmoqda...")
 
-    # Only start bot if enabled and available
-    should_start_bot = (
-        BOT_AVAILABLE and
-        bot_instance and
-        getattr(settings, 'enable_bot', True)  # Default to True if not set
-    )
+    with startup_timer.phase("lifespan: database engines"):
+        instrument_engines()
+    if leader_elector is None:
+        leader_elector = LeaderElector(
+            create_leader_lock(database.engine, settings.leader_lock_file),
+            check_interval=settings.leader_check_interval
+        )
 
+    # Only start bot if enabled and available
+    should_start_bot = BOT_AVAILABLE and settings.enable_bot
+    bot_instance = None
     if should_start_bot:
         try:
-            print("🤖 Starting Telegram bot...")
+            bot_instance = get_bot_module().bot_instance
+        except ImportError as e:
+            logger.warning("⚠️  Bot fayllari topilmadi: %s", e)
+            logger.warning("📝 Bot yaratish uchun: python simple_setup_bot.py")
+            should_start_bot = False
+
+    async def start_bot():
+        try:
+            logger.info("🤖 Starting Telegram bot...")
             await bot_instance.start_bot()
-        except Exception as e:
-            print(f"❌ Bot ishga tushmadi: {e}")
-            print("💡 Bot conflicts can happen if another instance is running")
+        except Exception:
+            logger.exception("❌ Bot ishga tushmadi (another instance may be running)")
+
+    async def stop_bot():
+        try:
+            await bot_instance.stop_bot()
+        except Exception:
+            logger.exception("❌ Bot to'xtatishda xatolik")
+
+    # Webhook mode serves updates in every worker; a poller must be unique
+    bot_is_singleton = should_start_bot and bot_instance.mode != "webhook"
+    if bot_is_singleton:
+        leader_elector.add_singleton(start_bot, stop_bot)
+    elif should_start_bot:
+        with startup_timer.phase("lifespan: bot"):
+            await start_bot()
+
+    # Maintenance jobs must run once per deployment, not once per worker;
+    # host jobs (local files) run in every worker and take turns per host
+    if settings.enable_scheduler:
+        from app.core.jobs import register_default_jobs, register_host_jobs
+        from app.core.scheduler import host_scheduler, scheduler
+
+        if not scheduler.jobs:  # Registered once per process, not once per lifespan
+            register_default_jobs(scheduler)
+            register_host_jobs(host_scheduler)
+        leader_elector.add_singleton(scheduler.start, scheduler.stop)
+        await host_scheduler.start()
+
+    with startup_timer.phase("lifespan: leader election"):
+        await leader_elector.start()
+
+    if traffic_writer:
+        traffic_writer.start()
+
+    # Built in the background; suggestions are empty for the first moments
+    suggest_index.start(settings.suggest_rebuild_interval)
+    # Postgres searches with pg_trgm; elsewhere search falls back to ILIKE until this is built
+    if database.engine.dialect.name != "postgresql":
+        search_index.start(settings.search_rebuild_interval)
+
+    startup_timer.mark("lifespan started")
+    startup_timer.finish(settings.cold_start_budget_ms)
 
     yield
 
     # Shutdown
-    if should_start_bot and bot_instance:
-        try:
-            await bot_instance.stop_bot()
-        except Exception as e:
-            print(f"❌ Bot to'xtatishda xatolik: {e}")
+    await leader_elector.stop()
+    if settings.enable_scheduler:
+        await host_scheduler.stop()
+    suggest_index.stop()
+    search_index.stop()
+    if traffic_writer:
+        traffic_writer.stop()
+    if should_start_bot and not bot_is_singleton:
+        await stop_bot()
 
 
 # Create FastAPI app
@@ -55,7 +160,7 @@ app = FastAPI(
     title="InBazar API",
     description="InBazar Kiyim Do'koni API",
     version="1.0.0",
-    lifespan=lifespan if BOT_AVAILABLE else None
+    lifespan=lifespan
 )
 
 # CORS
@@ -65,14 +170,45 @@ app.add_middleware(
     allow_credentials=False, # required for `*` to work
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],
 )
 
+if settings.enable_metrics:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+if traffic_writer:
+    app.add_middleware(
+        traffic.TrafficCaptureMiddleware,
+        writer=traffic_writer,
+        secret_key=settings.secret_key,
+        sample_rate=settings.traffic_capture_sample_rate
+    )
+
+if settings.enable_query_profiler:
+    from app.core import profiler
+
+    app.add_middleware(
+        profiler.QueryProfilerMiddleware,
+        repeat_threshold=settings.query_profiler_repeat_threshold,
+        history_size=settings.query_profiler_history
+    )
+
+# Outermost, so every log line of a request carries its id
+app.add_middleware(RequestIdMiddleware)
+
 # Routes
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(products.router, prefix="/products", tags=["Products"])
 app.include_router(categories.router, prefix="/categories", tags=["Categories"])
+app.include_router(catalog.router, prefix="/catalog", tags=["Catalog"])
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+if settings.enable_query_profiler:
+    from app.api.routes import debug
+
+    app.include_router(debug.router, prefix="/debug", tags=["Debug"])
+
+startup_timer.mark("app.main imported")
 
 
 @app.get("/")
@@ -86,20 +222,63 @@ def root():
 
 @app.get("/health")
 def health():
+    if database.replica_router:
+        return {"status": "sog'lom", "replicas": database.replica_router.status()}
     return {"status": "sog'lom"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/bot/status")
-def bot_status():
+async def bot_status():
+    leader = {
+        "worker": leader_elector.worker_id if leader_elector else None,
+        "is_leader": leader_elector.is_leader if leader_elector else False,
+        "leader": await leader_elector.current_leader() if leader_elector else None
+    }
+
     if not BOT_AVAILABLE:
-        return {"bot": "mavjud_emas", "setup": "python simple_setup_bot.py"}
+        return {"bot": "mavjud_emas", "setup": "python simple_setup_bot.py", **leader}
 
+    bot_instance = _bot_module.bot_instance if _bot_module else None
     return {
         "bot": "ishlayapti" if (bot_instance and bot_instance.application) else "to'xtagan",
-        "username": settings.telegram_bot_username
+        "mode": settings.bot_mode,
+        "username": settings.telegram_bot_username,
+        **leader
     }
 
 
+@app.post("/bot/webhook/{secret}")
+async def bot_webhook(
+        secret: str,
+        request: Request,
+        x_telegram_bot_api_secret_token: Optional[str] = Header(None)
+):
+    """Receive Telegram updates when the bot runs in webhook mode"""
+    if not BOT_AVAILABLE or not settings.enable_bot:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    bot_module = get_bot_module()
+    is_valid_webhook_secret = bot_module.is_valid_webhook_secret
+    if not is_valid_webhook_secret(secret):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    # Telegram echoes the secret_token given to setWebhook in this header
+    if x_telegram_bot_api_secret_token is not None and not is_valid_webhook_secret(x_telegram_bot_api_secret_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid secret token")
+
+    if not bot_module.bot_instance.application:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Bot is not running")
+
+    payload = await request.json()
+    await bot_module.bot_instance.process_webhook_update(payload)
+    return {"ok": True}
+
+
 @app.get("/debug/otp/{phone_number}")
 def debug_otp(phone_number: str, db: Session = Depends(get_db)):
     """Debug endpoint to check OTP codes"""
@@ -2,6 +2,11 @@
 from .user import User
 from .product import Product
 from .category import Category
+from .analytics import AnalyticsSnapshot
+from .product_view import UserProductView
+from .feed import UserFeed, TrendingSnapshot
+from .product_search import ProductSearchDocument
+from .catalog import CatalogChange, CatalogCompaction
 
 # Import bot models if they exist
 try:
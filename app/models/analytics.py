@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, DateTime, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class AnalyticsSnapshot(Base):
+    __tablename__ = "analytics_snapshots"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    data = Column(JSON, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,33 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, Uuid
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class CatalogChange(Base):
+    """One admin write to a product or category; ids only grow, so an id is a sync position"""
+
+    __tablename__ = "catalog_changes"
+
+    # SQLite only autoincrements INTEGER primary keys
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    entity = Column(String, nullable=False)  # "product" or "category"
+    entity_id = Column(Uuid(as_uuid=True), nullable=False)
+    op = Column(String, nullable=False)  # "upsert" or "delete"
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+
+    __table_args__ = (
+        # Compaction keeps the newest change per entity
+        Index("ix_catalog_changes_entity", entity, entity_id),
+        # Never reuse the id of a deleted newest row
+        {"sqlite_autoincrement": True},
+    )
+
+
+class CatalogCompaction(Base):
+    """One expiry pass of the change log; positions up to ``compacted_through`` may have lost changes"""
+
+    __tablename__ = "catalog_compactions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    compacted_through = Column(BigInteger, nullable=False)  # Highest change id removed as expired
+    compacted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, Uuid
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.types import uuid_array
+
+
+class UserFeed(Base):
+    """Ranked "for you" candidates, rebuilt by the feed job"""
+
+    __tablename__ = "user_feeds"
+
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    product_ids = Column(uuid_array(), nullable=False, default=list)
+    generated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+
+
+class TrendingSnapshot(Base):
+    """Most viewed products of the recent past; the feed for users without history"""
+
+    __tablename__ = "trending_snapshots"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    product_ids = Column(uuid_array(), nullable=False, default=list)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
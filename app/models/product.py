@@ -1,8 +1,8 @@
-from sqlalchemy import Column, String, DateTime, Integer, Boolean, DECIMAL, ARRAY, ForeignKey, Enum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Integer, Boolean, DECIMAL, ForeignKey, Enum, Index, Uuid
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import string_array
 import uuid
 import enum
 
@@ -16,18 +16,18 @@ class GenderEnum(str, enum.Enum):
 class Product(Base):
     __tablename__ = "products"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     description = Column(String, nullable=False)
-    category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id"), nullable=False)
+    category_id = Column(Uuid(as_uuid=True), ForeignKey("categories.id"), nullable=False)
     gender = Column(Enum(GenderEnum), nullable=False)
     price = Column(DECIMAL(10, 2), nullable=False)
 
     # Product details
-    sizes = Column(ARRAY(String), default=list)
-    images = Column(ARRAY(String), default=list)
-    colors = Column(ARRAY(String), default=list)
-    tags = Column(ARRAY(String), default=list)
+    sizes = Column(string_array(), default=list)
+    images = Column(string_array(), default=list)
+    colors = Column(string_array(), default=list)
+    tags = Column(string_array(), default=list)
 
     # Stats
     click_count = Column(Integer, default=0)
@@ -42,4 +42,16 @@ class Product(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationship
-    category = relationship("Category")
\ No newline at end of file
+    category = relationship("Category")
+
+    __table_args__ = (
+        # Active/category filters, newest first (storefront, and the admin
+        # list's default order with its id tie-breaker)
+        Index("ix_products_active_created_at_id", is_active, created_at, id),
+        Index("ix_products_category_created_at_id", category_id, created_at, id),
+        # Admin list sort keys, id breaking ties (app.crud.product.ADMIN_SORTS).
+        # Not the counters: every click, like and bookmark updates those, and
+        # an index on them would rule out HOT updates; they sort top-N instead
+        Index("ix_products_created_at_id", created_at, id),
+        Index("ix_products_price_id", price, id),
+    )
\ No newline at end of file
@@ -0,0 +1,25 @@
+from sqlalchemy import DDL, Column, ForeignKey, Index, String, Uuid, event
+from app.database import Base
+
+
+class ProductSearchDocument(Base):
+    """Folded search text of a product (app.utils.text.search_document), trigram-indexed on Postgres"""
+
+    __tablename__ = "product_search_documents"
+
+    product_id = Column(Uuid(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    document = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ix_product_search_documents_trgm", document,
+            postgresql_using="gin", postgresql_ops={"document": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+event.listen(
+    ProductSearchDocument.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
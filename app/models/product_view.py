@@ -0,0 +1,19 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Uuid
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class UserProductView(Base):
+    """One row per (user, product); a repeat view bumps viewed_at and view_count"""
+
+    __tablename__ = "user_product_views"
+
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    product_id = Column(Uuid(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    viewed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    view_count = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __table_args__ = (
+        # Serves "recent views of a user" straight from the index
+        Index("ix_user_product_views_user_viewed_at", user_id, viewed_at.desc()),
+    )
@@ -0,0 +1,29 @@
+import uuid
+from sqlalchemy import ARRAY, JSON, String, Uuid
+from sqlalchemy.types import TypeDecorator
+
+
+class JSONUUIDList(TypeDecorator):
+    """List of UUIDs stored as a JSON array of strings"""
+
+    impl = JSON
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return [str(item) for item in value]
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return [uuid.UUID(item) for item in value]
+
+
+# Native arrays on Postgres, JSON arrays on SQLite (local runs and tests)
+def string_array():
+    return ARRAY(String).with_variant(JSON(), "sqlite")
+
+
+def uuid_array():
+    return ARRAY(Uuid(as_uuid=True)).with_variant(JSONUUIDList(), "sqlite")
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from uuid import UUID
+from app.schemas.category import CategoryResponse
+from app.schemas.product import ProductResponse
+
+
+class CatalogChangeResponse(BaseModel):
+    entity: str  # "product" or "category"
+    id: UUID
+    op: str  # "upsert" or "delete"
+    # The current state, set for upserts
+    product: Optional[ProductResponse] = None
+    category: Optional[CategoryResponse] = None
+
+
+class CatalogChangesResponse(BaseModel):
+    changes: List[CatalogChangeResponse]
+    token: str  # Pass as since= next time
+    has_more: bool
@@ -39,17 +39,60 @@ class ProductResponse(ProductBase):
         from_attributes = True
 
 
+# is_liked / is_bookmarked are only set for an authenticated caller
+
+class ProductDetailResponse(ProductResponse):
+    is_liked: Optional[bool] = None
+    is_bookmarked: Optional[bool] = None
+
+
 class ProductListResponse(BaseModel):
     id: UUID
     name: str
     price: Decimal
     images: List[str]
     gender: GenderEnum
+    is_liked: Optional[bool] = None
+    is_bookmarked: Optional[bool] = None
 
     class Config:
         from_attributes = True
 
 
+class ProductFields(BaseModel):
+    """Any subset of a product's fields (fields= / view=); unset ones are left out"""
+    id: Optional[UUID] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    category_id: Optional[UUID] = None
+    gender: Optional[GenderEnum] = None
+    price: Optional[Decimal] = None
+    sizes: Optional[List[str]] = None
+    images: Optional[List[str]] = None
+    image: Optional[str] = None  # First image only
+    colors: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    click_count: Optional[int] = None
+    like_count: Optional[int] = None
+    bookmark_count: Optional[int] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    is_liked: Optional[bool] = None
+    is_bookmarked: Optional[bool] = None
+
+
+class ProductBatchResponse(BaseModel):
+    products: List[ProductListResponse]
+    missing: List[UUID]  # Unknown or inactive, in request order
+
+
+class SuggestionResponse(BaseModel):
+    text: str
+    kind: str  # "product", "tag" or "category"
+    id: Optional[UUID] = None
+
+
 class ProductAdminResponse(ProductResponse):
     category_name: Optional[str] = None
 
@@ -0,0 +1,39 @@
+import re
+from typing import Set
+
+# Uzbek and Russian Cyrillic to Uzbek Latin (apostrophes of o‘/g‘ are folded away below)
+_CYRILLIC = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo", "ж": "j",
+    "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "x", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "", "ы": "i", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya", "ў": "o", "қ": "q", "ғ": "g", "ҳ": "h",
+}
+# o‘ g‘ and the tutuq belgisi are typed with any of these, or not at all
+_APOSTROPHES = "'‘’ʻʼ`´"
+
+_FOLD_TABLE = str.maketrans({**_CYRILLIC, **{mark: "" for mark in _APOSTROPHES}})
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase Uzbek Latin with apostrophes removed and whitespace collapsed.
+
+    "Ko‘ylak", "ko'ylak", "koylak" and "КЎЙЛАК" all fold to "koylak".
+    """
+    return " ".join(text.casefold().translate(_FOLD_TABLE).split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of each word of the folded text, padded like pg_trgm"""
+    result = set()
+    for word in _NON_WORD.split(fold(text)):
+        if word:
+            padded = f"  {word} "
+            result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def search_document(name: str, tags=None, colors=None) -> str:
+    """What product search matches against: name, tags and colors, folded"""
+    return fold(" ".join([name or "", *(tags or []), *(colors or [])]))
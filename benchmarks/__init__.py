@@ -0,0 +1 @@
+"""Benchmark harness for the InBazar API"""
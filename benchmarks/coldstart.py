@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Cold-start check.
+
+Starts fresh interpreters that import ``app.main`` and run the lifespan
+startup, collects ``-X importtime`` per module plus the app's own startup
+report, and fails when the median startup exceeds the budget
+(COLD_START_BUDGET_MS) or a module that should load lazily was imported.
+
+    python -m benchmarks.coldstart --database-url sqlite:///./cold.db --runs 5
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Must not be imported by a worker with the bot disabled
+LAZY_MODULES = ("telegram", "app.bot.main", "app.bot.handlers")
+
+STARTUP_SCRIPT = """
+import asyncio, json, sys
+from app.main import app, startup_timer
+
+async def main():
+    async with app.router.lifespan_context(app):
+        pass
+
+asyncio.run(main())
+print("STARTUP " + json.dumps({"report": startup_timer.report(), "modules": sorted(sys.modules)}))
+"""
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _configure_environment(database_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = database_url
+    env.setdefault("ENABLE_BOT", "false")
+    env.setdefault("SECRET_KEY", "coldstart")
+    env.setdefault("TELEGRAM_BOT_TOKEN", "0:coldstart")
+    env.setdefault("TELEGRAM_BOT_USERNAME", "coldstart_bot")
+    env.setdefault("SUPABASE_URL", "http://localhost")
+    env.setdefault("SUPABASE_KEY", "coldstart")
+    env.setdefault("ADMIN_TELEGRAM_ID", "coldstart-admin")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    return env
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """module -> (self us, cumulative us) for top-level imports of each package"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return modules
+
+
+def run_once(env: Dict[str, str]) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+        env=env, capture_output=True, text=True, timeout=120
+    )
+    result_line = next((line for line in completed.stdout.splitlines() if line.startswith("STARTUP ")), None)
+    if completed.returncode != 0 or result_line is None:
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+        raise SystemExit("Startup failed:\n" + "\n".join(errors[-20:]))
+    result = json.loads(result_line[len("STARTUP "):])
+    result["imports"] = parse_importtime(completed.stderr)
+    return result
+
+
+def summarize(runs: List[dict], top: int) -> dict:
+    totals = [run["report"]["total_ms"] for run in runs]
+    cumulative: Dict[str, List[int]] = {}
+    for run in runs:
+        for module, (_, cumulative_us) in run["imports"].items():
+            cumulative.setdefault(module, []).append(cumulative_us)
+    app_modules = {
+        module: statistics.median(values) / 1000 for module, values in cumulative.items()
+        if module.startswith("app.")
+    }
+    packages = {
+        module: statistics.median(values) / 1000 for module, values in cumulative.items()
+        if "." not in module and not module.startswith(("_", "app"))
+    }
+    phases: Dict[str, List[float]] = {}
+    for run in runs:
+        for section in ("marks_ms", "phases_ms"):
+            for name, value in run["report"][section].items():
+                phases.setdefault(name, []).append(value)
+    return {
+        "total_ms": {"median": statistics.median(totals), "min": min(totals), "max": max(totals)},
+        "steps_ms": {name: statistics.median(values) for name, values in phases.items()},
+        "slowest_app_modules_ms": dict(sorted(app_modules.items(), key=lambda item: -item[1])[:top]),
+        "slowest_packages_ms": dict(sorted(packages.items(), key=lambda item: -item[1])[:top]),
+        "lazy_modules_imported": sorted({
+            module for run in runs for module in run["modules"]
+            if module in LAZY_MODULES or module.split(".")[0] in LAZY_MODULES
+        }),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start timing and budget check")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL", "sqlite:///./coldstart.db"))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, help="Default: COLD_START_BUDGET_MS from the settings")
+    parser.add_argument("--top", type=int, default=10, help="Modules listed per section")
+    parser.add_argument("--output", help="Write the summary JSON here")
+    args = parser.parse_args()
+
+    env = _configure_environment(args.database_url)
+    budget_ms = args.budget_ms
+    if budget_ms is None:
+        os.environ.update(env)
+        from app.config import settings
+
+        budget_ms = settings.cold_start_budget_ms
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    summary = summarize(runs, args.top)
+    summary["budget_ms"] = budget_ms
+
+    total = summary["total_ms"]
+    print(f"🧊 Cold start: median {total['median']:.0f}ms (min {total['min']:.0f}, max {total['max']:.0f}), budget {budget_ms:.0f}ms")
+    for title, key in (("Steps", "steps_ms"), ("App modules", "slowest_app_modules_ms"), ("Packages", "slowest_packages_ms")):
+        print(f"\n{title}:")
+        for name, value in summary[key].items():
+            print(f"  {name:<45} {value:>8.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    failed = False
+    if total["median"] > budget_ms:
+        print(f"\n❌ Over budget by {total['median'] - budget_ms:.0f}ms")
+        failed = True
+    if summary["lazy_modules_imported"] and env.get("ENABLE_BOT", "").lower() in ("false", "0", "no"):
+        print(f"\n❌ Imported although the bot is disabled: {', '.join(summary['lazy_modules_imported'])}")
+        failed = True
+    if not failed:
+        print("\n✅ Within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Query-plan snapshots for the hot CRUD queries.
+
+Runs every query shape produced by the ``app/crud`` functions (all filter
+combinations of ``get_products`` and the lookups behind auth, likes and
+analytics) against a seeded local database. For each statement it captures
+``EXPLAIN (ANALYZE, BUFFERS)`` on Postgres, or ``EXPLAIN QUERY PLAN`` on
+SQLite, and reduces it to a normalized plan without costs or timings.
+
+    # once, on a known-good tree
+    python -m benchmarks.plans --database-url postgresql://postgres@localhost/inbazar_bench --update-baseline
+    # afterwards, e.g. in CI; exits 1 on new seq scans, sorts or row-estimate blowups
+    python -m benchmarks.plans --database-url postgresql://postgres@localhost/inbazar_bench
+
+Seed the database first with ``generate_data.py`` or ``python -m benchmarks.run``.
+"""
+
+import argparse
+import inspect
+import json
+import os
+import sys
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import urlparse
+
+LOCAL_HOSTS = {"", "localhost", "127.0.0.1", "::1", "db", "postgres"}
+
+# CRUD functions that only write, or whose queries are covered by another shape
+NOT_PLANNED = {
+    "create_user", "create_product", "create_category", "create_snapshot",
+    "store_otp_code", "create_or_update_bot_user", "update_user", "update_product",
+    "update_category", "delete_product", "delete_category", "delete_old_snapshots",
+    "delete_expired_otp_codes", "reconcile_interaction_counts",
+    "increment_click_count", "increment_like_count", "decrement_like_count",
+    "increment_bookmark_count", "decrement_bookmark_count",
+    "add_to_liked_products", "remove_from_liked_products",
+    "add_to_bookmarked_products", "remove_from_bookmarked_products",
+    "verify_otp_code", "record_view", "prune_views", "migrate_click_history",
+    "create_trending_snapshot", "build_feeds", "save_search_document", "sync_search_documents",
+    "record_change", "compact_changes",
+}
+
+
+def _configure_environment(database_url: str) -> None:
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["ENABLE_BOT"] = "false"
+    os.environ.setdefault("SECRET_KEY", "plans")
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:plans")
+    os.environ.setdefault("TELEGRAM_BOT_USERNAME", "plans_bot")
+    os.environ.setdefault("SUPABASE_URL", "http://localhost")
+    os.environ.setdefault("SUPABASE_KEY", "plans")
+    os.environ.setdefault("ADMIN_TELEGRAM_ID", "bench-admin")
+
+
+class Samples:
+    """Real ids from the seeded database to bind into the queries"""
+
+    def __init__(self, db):
+        from app.models.bot_user import BotUser
+        from app.models.category import Category
+        from app.models.product import Product
+        from app.models.user import User
+
+        self.category_id = db.query(Category.id).order_by(Category.name).limit(1).scalar()
+        self.category_name = db.query(Category.name).order_by(Category.name).limit(1).scalar()
+        self.product_ids = [row[0] for row in db.query(Product.id).order_by(Product.id).limit(50)]
+        user = db.query(User).order_by(User.telegram_id).first()
+        self.telegram_id = user.telegram_id if user else "0"
+        self.phone_number = user.phone_number if user else "+998000000000"
+        self.user_id = user.id if user else None
+        self.bot_telegram_id = db.query(BotUser.telegram_id).order_by(BotUser.telegram_id).limit(1).scalar() or "0"
+        if not self.category_id or not self.product_ids:
+            raise SystemExit("Database is empty; seed it with generate_data.py first")
+
+
+def build_shapes(samples: Samples) -> Dict[str, Tuple[str, Callable[[Any], Any]]]:
+    """shape name -> (crud function name, callable running it)"""
+    from app.crud import analytics, bot_user, catalog, category, feed, product, product_view, user
+    from app.models.product import GenderEnum
+
+    shapes: Dict[str, Tuple[str, Callable[[Any], Any]]] = {}
+
+    for gender in (None, GenderEnum.male):
+        for category_id in (None, samples.category_id):
+            for search in (None, "sport"):
+                for include_inactive in (False, True):
+                    name = "get_products[{}]".format(",".join(filter(None, [
+                        "gender" if gender else "",
+                        "category" if category_id else "",
+                        "search" if search else "",
+                        "inactive" if include_inactive else "",
+                    ])) or "all")
+                    shapes[name] = ("get_products", lambda db, g=gender, c=category_id, s=search, i=include_inactive:
+                                    product.get_products(db, gender=g, category_id=c, search=s, include_inactive=i))
+    shapes["get_products[deep_page]"] = ("get_products", lambda db: product.get_products(db, skip=5000, limit=20))
+    shapes["get_products[admin_page]"] = ("get_products", lambda db: product.get_products(db, include_inactive=True, limit=1000))
+
+    shapes["get_admin_products"] = ("get_admin_products", lambda db: product.get_admin_products(db))
+    shapes["get_admin_products[filtered]"] = (
+        "get_admin_products", lambda db: product.get_admin_products(
+            db, sort="price", is_active=True, category_id=samples.category_id, gender=GenderEnum.male, search="sport"
+        )
+    )
+    # Every sort key both ways; created_at and price walk their (key, id)
+    # index, the counters (unindexed, updated on every interaction) sort top-N
+    for sort in product.ADMIN_SORTS:
+        for prefix in ("", "-"):
+            if prefix + sort != "-created_at":  # The default, above
+                shapes[f"get_admin_products[{prefix}{sort}]"] = (
+                    "get_admin_products", lambda db, s=prefix + sort: product.get_admin_products(db, sort=s)
+                )
+    shapes["get_admin_products[inactive]"] = (
+        "get_admin_products", lambda db: product.get_admin_products(db, is_active=False)
+    )
+    shapes["get_admin_products[category]"] = (
+        "get_admin_products", lambda db: product.get_admin_products(db, category_id=samples.category_id)
+    )
+    shapes["count_products"] = ("count_products", lambda db: product.count_products(db))
+    shapes["count_products[category]"] = (
+        "count_products", lambda db: product.count_products(db, category_id=samples.category_id)
+    )
+    shapes["count_products[filtered]"] = (
+        "count_products", lambda db: product.count_products(db, is_active=True, search="sport")
+    )
+
+    shapes["get_product_by_id"] = ("get_product_by_id", lambda db: product.get_product_by_id(db, samples.product_ids[0]))
+    shapes["get_product_by_id[category]"] = (
+        "get_product_by_id", lambda db: product.get_product_by_id(db, samples.product_ids[0], include_category=True)
+    )
+    shapes["get_products_by_ids"] = ("get_products_by_ids", lambda db: product.get_products_by_ids(db, samples.product_ids))
+    shapes["get_active_products_page"] = (
+        "get_active_products_page", lambda db: product.get_active_products_page(db, samples.product_ids, 0, 20)
+    )
+
+    shapes["get_user_by_id"] = ("get_user_by_id", lambda db: user.get_user_by_id(db, samples.user_id))
+    shapes["get_recently_viewed_products"] = (
+        "get_recently_viewed_products", lambda db: product_view.get_recently_viewed_products(db, samples.user_id)
+    )
+    shapes["get_feed_product_ids"] = ("get_feed_product_ids", lambda db: feed.get_feed_product_ids(db, samples.user_id))
+    shapes["compute_trending"] = ("compute_trending", lambda db: feed.compute_trending(db))
+    shapes["get_user_by_telegram_id"] = ("get_user_by_telegram_id", lambda db: user.get_user_by_telegram_id(db, samples.telegram_id))
+    shapes["get_user_by_phone"] = ("get_user_by_phone", lambda db: user.get_user_by_phone(db, samples.phone_number))
+
+    shapes["latest_change_id"] = ("latest_change_id", lambda db: catalog.latest_change_id(db))
+    shapes["get_changes"] = ("get_changes", lambda db: catalog.get_changes(db, 0))
+    shapes["compacted_through"] = ("compacted_through", lambda db: catalog.compacted_through(db))
+
+    shapes["get_categories"] = ("get_categories", lambda db: category.get_categories(db))
+    shapes["get_category_by_id"] = ("get_category_by_id", lambda db: category.get_category_by_id(db, samples.category_id))
+    shapes["get_category_by_name"] = ("get_category_by_name", lambda db: category.get_category_by_name(db, samples.category_name))
+
+    shapes["get_bot_user_by_telegram_id"] = (
+        "get_bot_user_by_telegram_id", lambda db: bot_user.get_bot_user_by_telegram_id(db, samples.bot_telegram_id)
+    )
+    shapes["get_bot_user_by_phone"] = ("get_bot_user_by_phone", lambda db: bot_user.get_bot_user_by_phone(db, samples.phone_number))
+
+    shapes["compute_analytics"] = ("compute_analytics", lambda db: analytics.compute_analytics(db))
+    shapes["get_latest_snapshot"] = ("get_latest_snapshot", lambda db: analytics.get_latest_snapshot(db))
+    return shapes
+
+
+def uncovered_functions(shapes: Dict[str, Tuple[str, Callable]]) -> List[str]:
+    """Public sync CRUD functions neither planned nor explicitly skipped"""
+    import app.crud as crud_package
+
+    covered = {function_name for function_name, _ in shapes.values()}
+    missing = []
+    for module_name in ("user", "product", "product_view", "feed", "catalog", "category", "bot_user", "analytics"):
+        module = getattr(crud_package, module_name, None)
+        if module is None:
+            continue
+        for name, function in inspect.getmembers(module, inspect.isfunction):
+            if (
+                function.__module__ == module.__name__
+                and not name.startswith("_")
+                and not inspect.iscoroutinefunction(function)
+                and name not in covered
+                and name not in NOT_PLANNED
+            ):
+                missing.append(f"{module_name}.{name}")
+    return missing
+
+
+@contextmanager
+def captured_statements(engine):
+    from sqlalchemy import event
+
+    statements: List[Tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+# Plan normalization
+
+def _normalize_pg_node(node: dict) -> dict:
+    normalized = {"node": node["Node Type"]}
+    for source, target in (
+        ("Relation Name", "relation"), ("Index Name", "index"), ("Join Type", "join"),
+        ("Strategy", "strategy"), ("Sort Key", "sort_key"), ("Parent Relationship", "parent"),
+    ):
+        if source in node:
+            normalized[target] = node[source]
+    normalized["plan_rows"] = node.get("Plan Rows")
+    if "Actual Rows" in node:
+        normalized["actual_rows"] = node["Actual Rows"] * max(node.get("Actual Loops", 1), 1)
+        normalized["plan_rows"] = (node.get("Plan Rows") or 0) * max(node.get("Actual Loops", 1), 1)
+    if "Shared Hit Blocks" in node:
+        normalized["buffers"] = node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0)
+    children = [_normalize_pg_node(child) for child in node.get("Plans", [])]
+    if children:
+        normalized["children"] = children
+    return normalized
+
+
+def _sqlite_node(detail: str) -> dict:
+    words = detail.split()
+    if detail.startswith("SCAN"):
+        node = {"node": "Seq Scan", "relation": words[1]}
+        if "USING" in words and "INDEX" in words:
+            node = {"node": "Index Scan", "relation": words[1], "index": words[words.index("INDEX") + 1]}
+        return node
+    if detail.startswith("SEARCH"):
+        node = {"node": "Index Scan", "relation": words[1]}
+        if "INDEX" in words:
+            node["index"] = words[words.index("INDEX") + 1]
+        return node
+    if "TEMP B-TREE" in detail:
+        return {"node": "Sort", "detail": detail}
+    return {"node": detail}
+
+
+def explain(connection, statement: str, parameters, dialect: str) -> dict:
+    if dialect == "postgresql":
+        row = connection.exec_driver_sql(
+            "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters
+        ).scalar()
+        plan = row if isinstance(row, list) else json.loads(row)
+        return _normalize_pg_node(plan[0]["Plan"])
+
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    nodes: Dict[int, dict] = {}
+    root = {"node": "Query", "children": []}
+    for node_id, parent_id, _, detail in rows:
+        node = _sqlite_node(detail)
+        nodes[node_id] = node
+        parent = nodes.get(parent_id, root)
+        parent.setdefault("children", []).append(node)
+    return root
+
+
+def walk(node: dict):
+    yield node
+    for child in node.get("children", []):
+        yield from walk(child)
+
+
+def signature(node: dict) -> str:
+    """Plan structure without row counts"""
+    label = node["node"] + "".join(f" {key}={node[key]}" for key in ("relation", "index", "join", "strategy") if key in node)
+    children = node.get("children", [])
+    if not children:
+        return label
+    return label + "(" + ", ".join(signature(child) for child in children) + ")"
+
+
+def snapshot() -> dict:
+    from sqlalchemy.orm import Session
+    from app.core.profiler import normalize_sql
+    from app.database import engine
+
+    dialect = engine.dialect.name
+    with Session(engine) as db:
+        samples = Samples(db)
+    shapes = build_shapes(samples)
+
+    result = {"dialect": dialect, "shapes": {}, "uncovered": uncovered_functions(shapes)}
+    for name, (function_name, run_shape) in shapes.items():
+        with engine.connect() as connection:
+            transaction = connection.begin()
+            try:
+                with captured_statements(engine) as statements:
+                    with Session(bind=connection) as db:
+                        run_shape(db)
+                for index, (statement, parameters) in enumerate(statements):
+                    plan = explain(connection, statement, parameters, dialect)
+                    key = name if len(statements) == 1 else f"{name}#{index}"
+                    result["shapes"][key] = {
+                        "function": function_name,
+                        "sql": normalize_sql(statement),
+                        "signature": signature(plan),
+                        "plan": plan,
+                    }
+            finally:
+                # ANALYZE really executes; never keep side effects
+                transaction.rollback()
+    return result
+
+
+# Diffing
+
+def _estimate_blowups(plan: dict, factor: float) -> List[str]:
+    findings = []
+    for node in walk(plan):
+        if node.get("actual_rows") is None or node.get("plan_rows") is None:
+            continue
+        estimated, actual = max(node["plan_rows"], 1), max(node["actual_rows"], 1)
+        ratio = max(estimated / actual, actual / estimated)
+        if ratio >= factor:
+            findings.append(f"{node['node']} {node.get('relation', '')}".strip() + f" estimated {estimated:.0f} rows, got {actual:.0f}")
+    return findings
+
+
+def diff(baseline: dict, current: dict, blowup_factor: float = 10.0) -> Tuple[List[str], List[str]]:
+    """Returns (regressions, notes)"""
+    regressions: List[str] = []
+    notes: List[str] = []
+
+    for name, shape in current["shapes"].items():
+        previous = baseline["shapes"].get(name)
+        if previous is None:
+            notes.append(f"{name}: new shape")
+            continue
+        if shape["signature"] == previous["signature"]:
+            continue
+
+        notes.append(f"{name}: plan changed\n    was: {previous['signature']}\n    now: {shape['signature']}")
+        old_nodes = list(walk(previous["plan"]))
+        old_seq_scans = {node.get("relation") for node in old_nodes if node["node"] == "Seq Scan"}
+        old_sorts = sum(1 for node in old_nodes if node["node"] in ("Sort", "Incremental Sort"))
+        new_nodes = list(walk(shape["plan"]))
+        for node in new_nodes:
+            if node["node"] == "Seq Scan" and node.get("relation") not in old_seq_scans:
+                regressions.append(f"{name}: new Seq Scan on {node.get('relation')}")
+        new_sorts = sum(1 for node in new_nodes if node["node"] in ("Sort", "Incremental Sort"))
+        if new_sorts > old_sorts:
+            regressions.append(f"{name}: {new_sorts - old_sorts} new Sort node(s)")
+
+    for name, shape in current["shapes"].items():
+        old_blowups = set(_estimate_blowups(baseline["shapes"][name]["plan"], blowup_factor)) if name in baseline["shapes"] else set()
+        for finding in _estimate_blowups(shape["plan"], blowup_factor):
+            # Compare by node, not by the exact numbers
+            if not any(finding.split(" estimated")[0] == old.split(" estimated")[0] for old in old_blowups):
+                regressions.append(f"{name}: row estimate blowup: {finding}")
+
+    for name in baseline["shapes"]:
+        if name not in current["shapes"]:
+            notes.append(f"{name}: shape disappeared")
+    return regressions, notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query-plan snapshots for CRUD queries")
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"))
+    parser.add_argument("--baseline", help="Baseline snapshot (default benchmarks/plan_baselines/<dialect>.json)")
+    parser.add_argument("--output", help="Also write the current snapshot here")
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with this run")
+    parser.add_argument("--blowup-factor", type=float, default=10.0, help="Flag estimates off by this factor")
+    parser.add_argument("--allow-remote", action="store_true")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or BENCH_DATABASE_URL is required")
+    host = urlparse(args.database_url).hostname or ""
+    if host not in LOCAL_HOSTS and not args.allow_remote:
+        parser.error(f"Refusing to run EXPLAIN ANALYZE on non-local host {host!r} (use --allow-remote)")
+
+    _configure_environment(args.database_url)
+    current = snapshot()
+    baseline_path = args.baseline or os.path.join("benchmarks", "plan_baselines", f"{current['dialect']}.json")
+
+    for name in current["uncovered"]:
+        print(f"⚠️  {name} has no plan shape; add it to build_shapes() or NOT_PLANNED")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2, default=str)
+
+    if args.update_baseline or not os.path.exists(baseline_path):
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(current, f, indent=2, default=str)
+        print(f"📸 {len(current['shapes'])} plans saved to {baseline_path}")
+        return 0
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions, notes = diff(baseline, current, args.blowup_factor)
+    for note in notes:
+        print(f"ℹ️  {note}")
+    for regression in regressions:
+        print(f"❌ {regression}")
+    if not regressions:
+        print(f"✅ {len(current['shapes'])} plans, no regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
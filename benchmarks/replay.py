@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Replay captured traffic against a local instance.
+
+Reads the gzip JSONL files written by ``app.core.traffic`` (set
+ENABLE_TRAFFIC_CAPTURE=true), re-issues the requests at their original
+pacing (or scaled with --speed) and reports latency per route. Captured
+product/category ids are mapped onto ids that exist locally, and each
+captured caller is mapped onto a local user with a freshly signed token.
+
+    python -m benchmarks.replay traffic/*.jsonl.gz --base-url http://127.0.0.1:8000 \\
+        --secret-key $SECRET_KEY --users 2000 --speed 2 --concurrency 32 \\
+        --output replay.json --compare replay-before.json
+"""
+
+import argparse
+import asyncio
+import glob
+import gzip
+import hashlib
+import json
+import math
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+# Telegram ids created by generate_data.py: str(FIRST_TELEGRAM_ID + i)
+FIRST_TELEGRAM_ID = 100_000_000
+
+
+def read_records(patterns: List[str]) -> List[dict]:
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    records = []
+    for path in paths:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        records.append(json.loads(line))
+        except (EOFError, gzip.BadGzipFile):
+            # A file still being written ends without a gzip trailer
+            pass
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class IdMapper:
+    """Stable mapping from captured ids onto ids that exist on the target"""
+
+    def __init__(self, product_ids: List[str], category_ids: List[str]):
+        self.pools = {"product_id": product_ids, "category_id": category_ids}
+
+    @staticmethod
+    def _pick(value: str, pool: List[str]) -> str:
+        digest = int(hashlib.sha1(value.encode()).hexdigest(), 16)
+        return pool[digest % len(pool)]
+
+    def map(self, name: str, value: str) -> str:
+        pool = self.pools.get(name)
+        if not pool or not value:
+            return value
+        return self._pick(value, pool)
+
+
+async def load_id_pools(client: httpx.AsyncClient, pages: int = 20) -> IdMapper:
+    product_ids: List[str] = []
+    for page in range(pages):
+        response = await client.get("/products", params={"skip": page * 100, "limit": 100})
+        response.raise_for_status()
+        items = response.json()
+        product_ids.extend(item["id"] for item in items)
+        if len(items) < 100:
+            break
+    categories = (await client.get("/categories")).json()
+    return IdMapper(product_ids, [category["id"] for category in categories])
+
+
+class TokenMinter:
+    """Maps captured caller hashes onto local users and signs tokens for them"""
+
+    def __init__(self, secret_key: Optional[str], algorithm: str, users: int):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.users = users
+        self._tokens: Dict[str, str] = {}
+
+    def headers(self, user_key: Optional[str]) -> dict:
+        if not user_key or not self.secret_key or not self.users:
+            return {}
+        token = self._tokens.get(user_key)
+        if token is None:
+            from jose import jwt
+
+            index = int(user_key, 16) % self.users
+            token = jwt.encode(
+                {"sub": str(FIRST_TELEGRAM_ID + index), "exp": datetime.now(timezone.utc) + timedelta(days=1)},
+                self.secret_key,
+                algorithm=self.algorithm
+            )
+            self._tokens[user_key] = token
+        return {"Authorization": f"Bearer {token}"}
+
+
+def build_request(record: dict, mapper: IdMapper, minter: TokenMinter) -> Optional[dict]:
+    route = record["route"]
+    if route == "__unmatched__" or route.startswith(("/auth", "/debug", "/bot/webhook", "/metrics")):
+        return None
+    path = route
+    for name, value in record.get("path_params", {}).items():
+        path = path.replace("{" + name + "}", mapper.map(name, value))
+    query = {name: mapper.map(name, value) if isinstance(value, str) else value
+             for name, value in record.get("query", {}).items()}
+    return {
+        "method": record["method"],
+        "url": path,
+        "params": query,
+        "headers": minter.headers(record.get("user")),
+    }
+
+
+async def replay(records: List[dict], client: httpx.AsyncClient, mapper: IdMapper, minter: TokenMinter,
+                 speed: float, concurrency: int) -> Dict[str, dict]:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    captured: Dict[str, List[float]] = {}
+    lag: List[float] = []
+
+    async def issue(record: dict, request: dict):
+        key = f"{record['method']} {record['route']}"
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                failed = response.status_code >= 500
+            except httpx.HTTPError:
+                failed = True
+            elapsed = time.perf_counter() - started
+        samples.setdefault(key, []).append(elapsed * 1000)
+        captured.setdefault(key, []).append(record["duration_ms"])
+        if failed:
+            errors[key] = errors.get(key, 0) + 1
+
+    first_ts = records[0]["ts"]
+    replay_start = time.perf_counter()
+    tasks = []
+    for record in records:
+        request = build_request(record, mapper, minter)
+        if request is None:
+            continue
+        if speed > 0:
+            due = (record["ts"] - first_ts) / speed
+            delay = due - (time.perf_counter() - replay_start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                lag.append(-delay)
+        tasks.append(asyncio.create_task(issue(record, request)))
+    await asyncio.gather(*tasks)
+    wall_time = time.perf_counter() - replay_start
+
+    results = {}
+    for key, values in sorted(samples.items()):
+        values.sort()
+        reference = sorted(captured[key])
+        results[key] = {
+            "requests": len(values),
+            "errors": errors.get(key, 0),
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+            "captured_p95_ms": round(percentile(reference, 95), 3),
+        }
+    results["_summary"] = {
+        "requests": sum(len(values) for values in samples.values()),
+        "wall_time_s": round(wall_time, 3),
+        "max_schedule_lag_ms": round(max(lag) * 1000, 3) if lag else 0.0,
+    }
+    return results
+
+
+def report(results: Dict[str, dict], previous: Optional[Dict[str, dict]], threshold: float) -> int:
+    """Print the per-route table; returns the number of regressed routes"""
+    regressions = 0
+    print(f"{'route':<45} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'cap p95':>8} {'Δ p95':>8}")
+    for key, result in results.items():
+        if key.startswith("_"):
+            continue
+        change = ""
+        if previous and key in previous and previous[key]["p95_ms"]:
+            delta = (result["p95_ms"] - previous[key]["p95_ms"]) / previous[key]["p95_ms"] * 100
+            change = f"{delta:+.1f}%"
+            if delta > threshold:
+                change += " ⚠️"
+                regressions += 1
+        print(
+            f"{key[:45]:<45} {result['requests']:>6} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+            f"{result['p99_ms']:>8.1f} {result['captured_p95_ms']:>8.1f} {change:>8}"
+        )
+    summary = results["_summary"]
+    print(f"{summary['requests']} requests in {summary['wall_time_s']}s, max schedule lag {summary['max_schedule_lag_ms']}ms")
+    return regressions
+
+
+async def run(args) -> Dict[str, dict]:
+    records = read_records(args.files)
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        raise SystemExit("No traffic records found")
+    print(f"📼 {len(records)} records, {records[-1]['ts'] - records[0]['ts']:.0f}s of traffic")
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        mapper = await load_id_pools(client)
+        minter = TokenMinter(args.secret_key, args.algorithm, args.users)
+        return await replay(records, client, mapper, minter, args.speed, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured InBazar traffic")
+    parser.add_argument("files", nargs="+", help="Capture files or globs (traffic/*.jsonl.gz)")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = original pacing, 2 = twice as fast, 0 = no pacing")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--limit", type=int, help="Replay only the first N records")
+    parser.add_argument("--secret-key", help="Target's SECRET_KEY, to sign tokens for authenticated requests")
+    parser.add_argument("--algorithm", default="HS256")
+    parser.add_argument("--users", type=int, default=2000, help="Local users created by generate_data.py")
+    parser.add_argument("--output", help="Write per-route results to this JSON file")
+    parser.add_argument("--compare", help="Previous replay JSON; routes whose p95 grew more than --threshold are flagged")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    regressions = report(results, previous, args.threshold)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 {args.output}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+API benchmark suite.
+
+Seeds a local database with a deterministic catalog, drives the FastAPI app
+in-process through httpx's ASGI transport and writes p50/p95/p99 latency and
+throughput per scenario to a JSON file.
+
+    python -m benchmarks.run --database-url postgresql://postgres@localhost/inbazar_bench --size 100k
+    python -m benchmarks.run ... --compare benchmarks/results/previous.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+LOCAL_HOSTS = {"", "localhost", "127.0.0.1", "::1", "db", "postgres"}
+
+RequestSpec = Tuple[str, str, Optional[dict]]
+
+
+def _configure_environment(database_url: str) -> None:
+    """Must run before anything from app is imported: Settings reads the env once"""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["ENABLE_BOT"] = "false"
+    os.environ["ENABLE_SCHEDULER"] = "false"
+    os.environ["ENABLE_QUERY_PROFILER"] = "false"
+    os.environ["ADMIN_TELEGRAM_ID"] = "bench-admin"
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:benchmark")
+    os.environ.setdefault("TELEGRAM_BOT_USERNAME", "benchmark_bot")
+    os.environ.setdefault("SUPABASE_URL", "http://localhost")
+    os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Fixtures:
+    """Ids sampled from the seeded database that scenarios pick from"""
+
+    def __init__(self, engine, rng: random.Random, sample_size: int = 2000):
+        from sqlalchemy import func
+        from sqlalchemy.orm import Session
+        from app.core.auth import create_access_token
+        from app.models.category import Category
+        from app.models.product import Product
+        from app.models.user import User
+
+        with Session(engine) as db:
+            self.product_ids = [
+                str(row[0]) for row in
+                db.query(Product.id).filter(Product.is_active == True).order_by(Product.id).limit(sample_size)
+            ]
+            self.category_ids = [str(row[0]) for row in db.query(Category.id).order_by(Category.name)]
+            telegram_ids = [
+                row[0] for row in
+                db.query(User.telegram_id)
+                .filter(User.telegram_id != "bench-admin")
+                .order_by(User.telegram_id)
+                .limit(sample_size)
+            ]
+            self.active_products = db.query(func.count(Product.id)).filter(Product.is_active == True).scalar()
+
+        if not self.product_ids or not telegram_ids:
+            raise SystemExit("Database is empty; run with --reseed")
+
+        self.user_tokens = [create_access_token({"sub": telegram_id}) for telegram_id in telegram_ids]
+        self.admin_token = create_access_token({"sub": "bench-admin"})
+        self.rng = rng
+
+    def user_headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.rng.choice(self.user_tokens)}"}
+
+    def admin_headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.admin_token}"}
+
+
+def build_scenarios(fixtures: Fixtures) -> Dict[str, Callable[[random.Random], RequestSpec]]:
+    from benchmarks.seed import SEARCH_TERMS
+
+    deep_offset_max = max(min(fixtures.active_products - 20, 50_000), 0)
+    interaction_paths = ["click", "like", "bookmark"]
+
+    def interaction(rng: random.Random) -> RequestSpec:
+        product_id = rng.choice(fixtures.product_ids)
+        action = rng.choice(interaction_paths)
+        # Likes/bookmarks are toggled so the dataset stays stable across runs
+        method = "POST" if action == "click" or rng.random() < 0.5 else "DELETE"
+        return method, f"/products/{product_id}/{action}", fixtures.user_headers()
+
+    return {
+        "products_list": lambda rng: ("GET", "/products?limit=20", None),
+        "products_filtered": lambda rng: (
+            "GET",
+            f"/products?gender={rng.choice(['male', 'female'])}&category_id={rng.choice(fixtures.category_ids)}",
+            None,
+        ),
+        "products_search": lambda rng: ("GET", f"/products?search={rng.choice(SEARCH_TERMS)}", None),
+        "products_deep_page": lambda rng: ("GET", f"/products?skip={rng.randint(deep_offset_max // 2, deep_offset_max)}&limit=20", None),
+        "product_detail": lambda rng: ("GET", f"/products/{rng.choice(fixtures.product_ids)}", None),
+        "interactions": interaction,
+        "users_me_likes": lambda rng: ("GET", "/users/me/likes", fixtures.user_headers()),
+        "admin_analytics": lambda rng: ("GET", "/admin/analytics?fresh=true", fixtures.admin_headers()),
+    }
+
+
+async def run_scenario(client, make_request, requests: int, concurrency: int, warmup: int, rng: random.Random) -> dict:
+    for _ in range(warmup):
+        method, url, headers = make_request(rng)
+        await client.request(method, url, headers=headers)
+
+    specs = [make_request(rng) for _ in range(requests)]
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < len(specs):
+            method, url, headers = specs[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            response = await client.request(method, url, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_time = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / wall_time, 2) if wall_time else 0.0,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def print_results(results: Dict[str, dict], previous: Optional[Dict[str, dict]] = None) -> None:
+    header = f"{'scenario':<20} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'errors':>7}"
+    if previous:
+        header += f" {'p95 Δ':>9}"
+    print(header)
+    for name, result in results.items():
+        line = (
+            f"{name:<20} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+            f"{result['throughput_rps']:>9.1f} {sum(result['errors'].values()):>7}"
+        )
+        if previous and name in previous and previous[name]["p95_ms"]:
+            change = (result["p95_ms"] - previous[name]["p95_ms"]) / previous[name]["p95_ms"] * 100
+            line += f" {change:>+8.1f}%"
+        print(line)
+
+
+async def run(args) -> dict:
+    import httpx
+    from app.database import engine
+    from app.main import app
+    from benchmarks.seed import PRESETS, is_seeded, seed_catalog
+
+    sizes = dict(PRESETS[args.size])
+    if args.products:
+        sizes["products"] = args.products
+    if args.users:
+        sizes["users"] = args.users
+
+    if args.reseed or not is_seeded(engine, sizes["products"], sizes["users"]):
+        print(f"🌱 Seeding {sizes['products']} products, {sizes['users']} users (seed={args.seed})...")
+        started = time.perf_counter()
+        seed_catalog(engine, sizes["products"], sizes["users"], seed=args.seed)
+        print(f"🌱 Seeded in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(args.seed)
+    fixtures = Fixtures(engine, rng)
+    scenarios = build_scenarios(fixtures)
+    selected = args.scenarios or list(scenarios)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name in selected:
+            print(f"⏱  {name}...")
+            results[name] = await run_scenario(
+                client, scenarios[name], args.requests, args.concurrency, args.warmup, random.Random(f"{args.seed}-{name}")
+            )
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "dialect": engine.dialect.name,
+            "dataset": {**sizes, "seed": args.seed},
+            "requests_per_scenario": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="InBazar API benchmark")
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"),
+                        help="Local benchmark database (or BENCH_DATABASE_URL); it is dropped and reseeded")
+    parser.add_argument("--size", choices=["10k", "100k", "1m"], default="10k")
+    parser.add_argument("--products", type=int, help="Override the preset's product count")
+    parser.add_argument("--users", type=int, help="Override the preset's user count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reseed", action="store_true", help="Reseed even if the sizes already match")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="+", help="Subset of scenarios to run")
+    parser.add_argument("--output", help="Result JSON path (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous result JSON to compare against")
+    parser.add_argument("--allow-remote", action="store_true", help="Allow a non-local database host")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or BENCH_DATABASE_URL is required")
+    host = urlparse(args.database_url).hostname or ""
+    if host not in LOCAL_HOSTS and not args.allow_remote:
+        parser.error(f"Refusing to drop and reseed non-local database host {host!r} (use --allow-remote)")
+
+    _configure_environment(args.database_url)
+    report = asyncio.run(run(args))
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+    print_results(report["results"], previous)
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 {output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""
+Deterministic synthetic data for benchmarks and load tests.
+
+Rows are generated in batches and written straight to the database, so
+memory stays flat no matter how many rows are produced. On Postgres with
+psycopg2 batches go through ``COPY ... FROM STDIN``; everywhere else they
+use executemany inserts. The same ``seed`` and sizes always produce the
+same data, so numbers from different runs are comparable.
+"""
+
+import csv
+import io
+import random
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.crud.product import sync_search_documents
+from app.database import Base, create_schema
+from app.models.bot_user import BotUser, OTPCode
+from app.models.category import Category
+from app.models.product import GenderEnum, Product
+from app.models.product_view import UserProductView
+from app.models.user import User
+
+# Catalog presets
+PRESETS: Dict[str, Dict[str, int]] = {
+    "10k": {"products": 10_000, "users": 2_000, "bot_users": 2_500, "otp_codes": 500},
+    "100k": {"products": 100_000, "users": 20_000, "bot_users": 25_000, "otp_codes": 5_000},
+    "1m": {"products": 1_000_000, "users": 100_000, "bot_users": 120_000, "otp_codes": 20_000},
+}
+
+ADMIN_TELEGRAM_ID = "bench-admin"
+
+CATEGORY_NAMES = [
+    "Ko'ylaklar", "Shimlar", "Krossovkalar", "Kurtkalar", "Futbolkalar", "Paltolar",
+    "Yubkalar", "Sviterlar", "Kepkalar", "Etiklar", "Sport kiyimlar", "Aksessuarlar",
+    "Sumkalar", "Kostyumlar", "Jinsilar", "Xudilar", "Tuflilar", "Sharflar",
+]
+ITEM_WORDS = [
+    "ko'ylak", "shim", "krossovka", "kurtka", "futbolka", "palto", "yubka", "sviter",
+    "kepka", "etik", "xudi", "jinsi", "kostyum", "tufli", "sharf", "sumka",
+]
+ADJECTIVES = [
+    "klassik", "sport", "yozgi", "qishki", "bahorgi", "paxtali", "charm", "jun",
+    "oversize", "slim", "premium", "kundalik", "bayramona", "milliy", "zamonaviy",
+]
+COLORS = ["qora", "oq", "ko'k", "qizil", "yashil", "sariq", "kulrang", "jigarrang", "pushti", "bej"]
+SIZES = ["XS", "S", "M", "L", "XL", "XXL", "36", "38", "40", "42", "44"]
+TAGS = ["yangi", "chegirma", "hit", "trend", "eksklyuziv", "ommabop", "arzon", "sifatli", "import", "mahalliy"]
+FIRST_NAMES = ["Aziz", "Dilnoza", "Jasur", "Madina", "Sardor", "Nilufar", "Bekzod", "Malika", "Otabek", "Shahnoza"]
+LAST_NAMES = ["Karimov", "Rahimova", "Tursunov", "Yusupova", "Aliyev", "Qodirova", "Ergashev", "Nazarova"]
+
+# Words the benchmark searches for
+SEARCH_TERMS = ["ko'ylak", "krossovka", "kurtka", "sport", "premium", "qishki", "milliy", "jinsi"]
+
+# Product ids kept in memory for likes/bookmarks/clicks; bounds memory use
+POPULAR_POOL_SIZE = 20_000
+
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+class CatalogGenerator:
+    """Streams rows for every table; call the iterators in declaration order"""
+
+    def __init__(
+            self,
+            products: int,
+            users: int,
+            bot_users: int = 0,
+            otp_codes: int = 0,
+            seed: int = 42,
+            admin_telegram_id: Optional[str] = ADMIN_TELEGRAM_ID
+    ):
+        self.products = products
+        self.users = users
+        self.bot_users = bot_users
+        self.otp_codes = otp_codes
+        self.admin_telegram_id = admin_telegram_id
+        self.rng = random.Random(seed)
+        self.category_ids: List[uuid.UUID] = []
+        # Reservoir sample of product ids; position in the list is popularity rank
+        self.popular_ids: List[uuid.UUID] = []
+        self.like_counts: Counter = Counter()
+        self.bookmark_counts: Counter = Counter()
+        # Users that have viewed something, as (id, number of views to generate)
+        self.viewers: List[tuple] = []
+
+    def categories(self) -> List[dict]:
+        rows = [{"id": _uuid(self.rng), "name": name, "created_at": EPOCH} for name in CATEGORY_NAMES]
+        self.category_ids = [row["id"] for row in rows]
+        return rows
+
+    def iter_products(self, batch_size: int) -> Iterator[List[dict]]:
+        rng = self.rng
+        seen = 0
+        for start in range(0, self.products, batch_size):
+            batch = []
+            for _ in range(min(batch_size, self.products - start)):
+                item = rng.choice(ITEM_WORDS)
+                adjective = rng.choice(ADJECTIVES)
+                product_id = _uuid(rng)
+                batch.append({
+                    "id": product_id,
+                    "name": f"{adjective.capitalize()} {item} {rng.randint(1, 999)}",
+                    "description": f"{adjective} {item}, {rng.choice(COLORS)} rangda. {rng.choice(TAGS)} kolleksiya.",
+                    "category_id": rng.choice(self.category_ids),
+                    "gender": rng.choice(list(GenderEnum)).value,
+                    "price": round(rng.uniform(50_000, 2_000_000), -3),
+                    "sizes": rng.sample(SIZES, rng.randint(1, 5)),
+                    "images": [f"https://cdn.example.com/p/{product_id.hex}/{i}.jpg" for i in range(rng.randint(1, 5))],
+                    "colors": rng.sample(COLORS, rng.randint(1, 3)),
+                    "tags": rng.sample(TAGS, rng.randint(0, 4)),
+                    "click_count": int(rng.paretovariate(1.2) * 10),
+                    "like_count": 0,
+                    "bookmark_count": 0,
+                    "is_active": rng.random() > 0.05,
+                    "created_at": EPOCH - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+                })
+
+                # Reservoir sampling keeps the pool uniform over all products
+                seen += 1
+                if len(self.popular_ids) < POPULAR_POOL_SIZE:
+                    self.popular_ids.append(product_id)
+                else:
+                    slot = rng.randrange(seen)
+                    if slot < POPULAR_POOL_SIZE:
+                        self.popular_ids[slot] = product_id
+            yield batch
+
+    def _power_law_sample(self, alpha: float, cap: int) -> List[uuid.UUID]:
+        """A few users save hundreds of products, most save a handful"""
+        rng = self.rng
+        pool = self.popular_ids
+        count = min(int(rng.paretovariate(alpha)) - 1, cap, len(pool))
+        if count <= 0:
+            return []
+        # Pareto-distributed rank: the front of the pool gets most of the traffic
+        picks = {pool[min(int(rng.paretovariate(1.1)) - 1, len(pool) - 1)] for _ in range(count)}
+        return list(picks)
+
+    def iter_users(self, batch_size: int) -> Iterator[List[dict]]:
+        rng = self.rng
+        for start in range(0, self.users, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, self.users)):
+                liked = self._power_law_sample(0.9, 2000)
+                bookmarked = self._power_law_sample(1.2, 500)
+                self.like_counts.update(liked)
+                self.bookmark_counts.update(bookmarked)
+                user_id = _uuid(rng)
+                views = min(int(rng.paretovariate(1.0)) - 1, 50)
+                if views > 0:
+                    self.viewers.append((user_id, views))
+                batch.append({
+                    "id": user_id,
+                    "telegram_id": str(100_000_000 + i),
+                    "phone_number": f"+99890{i:07d}",
+                    "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    "telegram_username": f"user{i}" if rng.random() < 0.6 else None,
+                    "liked_products": liked,
+                    "bookmarked_products": bookmarked,
+                    "click_history": [],
+                    "created_at": EPOCH - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+                })
+            if start + batch_size >= self.users and self.admin_telegram_id:
+                batch.append({
+                    "id": _uuid(rng),
+                    "telegram_id": self.admin_telegram_id,
+                    "phone_number": "+998000000000",
+                    "full_name": "Admin",
+                    "telegram_username": None,
+                    "liked_products": [],
+                    "bookmarked_products": [],
+                    "click_history": [],
+                    "created_at": EPOCH,
+                })
+            yield batch
+
+    def iter_product_views(self, batch_size: int) -> Iterator[List[dict]]:
+        """Views over the last 90 days, popular products viewed most"""
+        rng = self.rng
+        pool = self.popular_ids
+        now = datetime.now(timezone.utc)
+        batch = []
+        for user_id, views in self.viewers:
+            picks = {pool[min(int(rng.paretovariate(1.1)) - 1, len(pool) - 1)] for _ in range(views)}
+            for product_id in picks:
+                batch.append({
+                    "user_id": user_id,
+                    "product_id": product_id,
+                    "viewed_at": now - timedelta(seconds=rng.randint(0, 90 * 24 * 3600)),
+                    "view_count": int(rng.paretovariate(1.5)),
+                })
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_bot_users(self, batch_size: int) -> Iterator[List[dict]]:
+        """Most bot users became app users (same telegram id and phone), the rest never verified"""
+        rng = self.rng
+        for start in range(0, self.bot_users, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, self.bot_users)):
+                batch.append({
+                    "id": _uuid(rng),
+                    "telegram_id": str(100_000_000 + i),
+                    "username": f"user{i}" if rng.random() < 0.6 else None,
+                    "first_name": rng.choice(FIRST_NAMES),
+                    "last_name": rng.choice(LAST_NAMES) if rng.random() < 0.7 else None,
+                    "phone_number": f"+99890{i:07d}",
+                    "created_at": EPOCH - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+                })
+            yield batch
+
+    def iter_otp_codes(self, batch_size: int) -> Iterator[List[dict]]:
+        """Mostly expired codes, like a table the purge job hasn't swept yet"""
+        rng = self.rng
+        now = datetime.now(timezone.utc)
+        for start in range(0, self.otp_codes, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, self.otp_codes)):
+                created_at = now - timedelta(seconds=rng.randint(0, 3 * 24 * 3600))
+                batch.append({
+                    # phone_number is the primary key; the first ones match bot users
+                    "phone_number": f"+99890{i:07d}",
+                    "code": f"{rng.randint(0, 999_999):06d}",
+                    "created_at": created_at,
+                    "expires_at": created_at + timedelta(minutes=5),
+                })
+            yield batch
+
+    def counter_updates(self) -> Iterator[dict]:
+        for product_id in set(self.like_counts) | set(self.bookmark_counts):
+            yield {
+                "id": product_id,
+                "like_count": self.like_counts.get(product_id, 0),
+                "bookmark_count": self.bookmark_counts.get(product_id, 0),
+            }
+
+
+# Loading
+
+def _pg_array(values) -> str:
+    escaped = ('"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _copy_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return _pg_array(value)
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _copy_rows(raw_connection, table, rows: List[dict]) -> None:
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+    cursor = raw_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def supports_copy(engine: Engine) -> bool:
+    return engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+
+def load_batches(engine: Engine, model, batches, method: str = "auto", progress: bool = True) -> int:
+    """Write batches of row dicts into model's table, committing per batch"""
+    use_copy = method == "copy" or (method == "auto" and supports_copy(engine))
+    if use_copy and not supports_copy(engine):
+        raise ValueError("COPY needs Postgres with psycopg2")
+
+    table = model.__table__
+    total = 0
+    if use_copy:
+        raw_connection = engine.raw_connection()
+        try:
+            for batch in batches:
+                if batch:
+                    _copy_rows(raw_connection, table, batch)
+                    raw_connection.commit()
+                    total += len(batch)
+                if progress:
+                    print(f"  {table.name}: {total}", end="\r")
+        finally:
+            raw_connection.close()
+    else:
+        with engine.connect() as connection:
+            if engine.dialect.name == "sqlite":
+                connection.exec_driver_sql("PRAGMA synchronous=OFF")
+            for batch in batches:
+                if batch:
+                    connection.execute(insert(table), batch)
+                    connection.commit()
+                    total += len(batch)
+                if progress:
+                    print(f"  {table.name}: {total}", end="\r")
+    if progress:
+        print()
+    return total
+
+
+def generate(
+        engine: Engine,
+        generator: CatalogGenerator,
+        batch_size: int = 5000,
+        method: str = "auto",
+        reset: bool = False
+) -> Dict[str, int]:
+    """Create the schema (optionally dropping it first) and load every table"""
+    if reset:
+        Base.metadata.drop_all(engine)
+    create_schema(engine)
+
+    with Session(engine) as db:
+        if db.query(func.count(User.id)).scalar() or db.query(func.count(Product.id)).scalar():
+            raise RuntimeError("Database already has data; pass reset=True to start over")
+
+    counts = {
+        "categories": load_batches(engine, Category, [generator.categories()], method),
+        "products": load_batches(engine, Product, generator.iter_products(batch_size), method),
+        "users": load_batches(engine, User, generator.iter_users(batch_size), method),
+        "product_views": load_batches(engine, UserProductView, generator.iter_product_views(batch_size), method),
+        "bot_users": load_batches(engine, BotUser, generator.iter_bot_users(batch_size), method),
+        "otp_codes": load_batches(engine, OTPCode, generator.iter_otp_codes(batch_size), method),
+    }
+
+    # Like/bookmark counters only touch products in the popular pool
+    with Session(engine) as db:
+        updates = list(generator.counter_updates())
+        for start in range(0, len(updates), batch_size):
+            db.execute(update(Product), updates[start:start + batch_size])
+        db.commit()
+
+    with Session(engine) as db:
+        counts["search_documents"] = sync_search_documents(db)
+
+    return counts
+
+
+def is_seeded(engine: Engine, products: int, users: int) -> bool:
+    create_schema(engine)
+    with Session(engine) as db:
+        product_count = db.query(func.count(Product.id)).scalar()
+        user_count = db.query(func.count(User.id)).scalar()
+    return product_count == products and user_count == users + 1
+
+
+def seed_catalog(engine: Engine, products: int, users: int, seed: int = 42, batch_size: int = 5000) -> Dict[str, int]:
+    """Drop and recreate the schema, then load the benchmark catalog"""
+    generator = CatalogGenerator(products=products, users=users, seed=seed)
+    return generate(engine, generator, batch_size=batch_size, reset=True)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for load and scale testing.
+
+Generates categories, products (tags, colors, sizes, images), users with
+power-law like/bookmark/click distributions, bot users and OTP rows, and
+streams them into Postgres (COPY) or SQLite (batched inserts) with flat
+memory use.
+
+    python generate_data.py --database-url sqlite:///./load.db --size 100k --reset
+    python generate_data.py --database-url postgresql://postgres@localhost/inbazar_load \\
+        --products 2000000 --users 300000 --reset
+"""
+
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+LOCAL_HOSTS = {"", "localhost", "127.0.0.1", "::1", "db", "postgres"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic InBazar data")
+    parser.add_argument("--database-url", default=os.environ.get("LOAD_DATABASE_URL"),
+                        help="Target database (or LOAD_DATABASE_URL)")
+    parser.add_argument("--size", choices=["10k", "100k", "1m"], default="10k", help="Preset row counts")
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--bot-users", type=int)
+    parser.add_argument("--otp-codes", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--method", choices=["auto", "copy", "insert"], default="auto",
+                        help="auto = COPY on Postgres/psycopg2, inserts otherwise")
+    parser.add_argument("--admin-telegram-id", default="bench-admin", help="Also create an admin user with this id")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    parser.add_argument("--allow-remote", action="store_true", help="Allow a non-local database host")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or LOAD_DATABASE_URL is required")
+    host = urlparse(args.database_url).hostname or ""
+    if host not in LOCAL_HOSTS and not args.allow_remote:
+        parser.error(f"Refusing to write to non-local database host {host!r} (use --allow-remote)")
+
+    # Settings are read once at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SECRET_KEY", "load-test")
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:load-test")
+    os.environ.setdefault("TELEGRAM_BOT_USERNAME", "load_test_bot")
+    os.environ.setdefault("SUPABASE_URL", "http://localhost")
+    os.environ.setdefault("SUPABASE_KEY", "load-test")
+    os.environ.setdefault("ADMIN_TELEGRAM_ID", args.admin_telegram_id)
+
+    from app.database import engine
+    from benchmarks.seed import PRESETS, CatalogGenerator, generate
+
+    sizes = dict(PRESETS[args.size])
+    for key in ("products", "users", "bot_users", "otp_codes"):
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+
+    generator = CatalogGenerator(seed=args.seed, admin_telegram_id=args.admin_telegram_id or None, **sizes)
+
+    print(f"🏭 {engine.dialect.name}: {sizes} (seed={args.seed})")
+    started = time.perf_counter()
+    try:
+        counts = generate(engine, generator, batch_size=args.batch_size, method=args.method, reset=args.reset)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(f"✅ {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())